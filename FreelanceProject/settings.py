@@ -21,6 +21,13 @@ SECRET_KEY = 'django-insecure-#q5_$j7=dl8se+qr9x(a)khua-sjtsz^m&6c@9x7kyo^dzv(_k
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
 
+# Escrow checkout gateway (swap for LocalStripeStub in local/benchmark runs)
+ESCROW_CHECKOUT_GATEWAY = os.getenv(
+    "ESCROW_CHECKOUT_GATEWAY",
+    "apps.applications.services.checkout_gateway.StripeCheckoutGateway",
+)
+STRIPE_STUB_LATENCY_MS = int(os.getenv("STRIPE_STUB_LATENCY_MS", "0"))
+
 APPID = os.getenv("APPID")
 ZEGO_SERVER_SECRET = os.getenv("ZEGO_SERVER_SECRET")
 ZEGO_SERVER_URL =  os.getenv('ZEGO_SERVER_URL')
@@ -62,6 +69,7 @@ INSTALLED_APPS = [
     'drf_spectacular',
     'drf_spectacular_sidecar',
     'django_filters',
+    'apps.cores',
     'apps.users',
     'apps.freelancer',
     'apps.adminpanel',
@@ -216,6 +224,24 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploads above this size (screenshots, documents) are streamed to a temp
+# file on disk instead of being held in memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 512 * 1024
+
+# Content-addressed upload store: "local" (MEDIA_ROOT) or "s3" (any S3 API;
+# point CONTENT_STORAGE_S3_ENDPOINT at MinIO for a local stand-in)
+CONTENT_STORAGE_BACKEND = os.getenv("CONTENT_STORAGE_BACKEND", "local")
+CONTENT_STORAGE_S3 = {
+    "bucket": os.getenv("CONTENT_STORAGE_S3_BUCKET", "freelance-uploads"),
+    "endpoint_url": os.getenv("CONTENT_STORAGE_S3_ENDPOINT"),
+    "access_key": os.getenv("CONTENT_STORAGE_S3_ACCESS_KEY"),
+    "secret_key": os.getenv("CONTENT_STORAGE_S3_SECRET_KEY"),
+    "region": os.getenv("CONTENT_STORAGE_S3_REGION"),
+    "public_url": os.getenv("CONTENT_STORAGE_S3_PUBLIC_URL"),
+}
+# Orphaned blobs younger than this are kept (uploads still in flight)
+BLOB_GC_GRACE_HOURS = 24
+
 # During development, also ensure static works
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -265,6 +291,50 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Kolkata"
 
+CELERY_BEAT_SCHEDULE = {
+    "flush-activity-logs": {
+        "task": "apps.tracking.tasks.flush_activity_logs_task",
+        "schedule": 5.0,
+    },
+    "compact-activity-logs": {
+        "task": "apps.tracking.tasks.compact_activity_logs_task",
+        "schedule": 24 * 60 * 60,
+    },
+    "reap-stale-sessions": {
+        "task": "apps.tracking.tasks.reap_stale_sessions_task",
+        "schedule": 60.0,
+    },
+    "flush-device-last-seen": {
+        "task": "apps.tracking.tasks.flush_device_last_seen_task",
+        "schedule": 60.0,
+    },
+    # Safety net; flushes are normally scheduled by the first pending event
+    "flush-live-feed": {
+        "task": "apps.tracking.tasks.flush_live_feed_task",
+        "schedule": 30.0,
+    },
+}
+
+# Write-behind activity log buffer (LocalActivityBuffer for single-process dev)
+ACTIVITY_LOG_BUFFER = os.getenv(
+    "ACTIVITY_LOG_BUFFER",
+    "apps.tracking.services.activity_logger.RedisActivityBuffer",
+)
+ACTIVITY_LOG_FLUSH_BATCH = 500
+
+# Tracker heartbeats (LocalHeartbeatStore for single-process dev). Sessions
+# silent for longer than the timeout are stopped by the reaper.
+TRACKING_HEARTBEAT_STORE = os.getenv(
+    "TRACKING_HEARTBEAT_STORE",
+    "apps.tracking.services.heartbeat.RedisHeartbeatStore",
+)
+TRACKING_HEARTBEAT_TIMEOUT_SECONDS = int(os.getenv("TRACKING_HEARTBEAT_TIMEOUT_SECONDS", "300"))
+TRACKING_REAPER_BATCH_SIZE = 200
+
+# Months kept in the hot ActivityLog table / months of archive segments kept
+ACTIVITY_LOG_HOT_MONTHS = int(os.getenv("ACTIVITY_LOG_HOT_MONTHS", "3"))
+ACTIVITY_LOG_RETENTION_MONTHS = int(os.getenv("ACTIVITY_LOG_RETENTION_MONTHS", "24"))
+
 CACHES = {
     "default": {
         "BACKEND": "django_redis.cache.RedisCache",
@@ -273,6 +343,37 @@ CACHES = {
     }
 }
 
+# Per-user cached offer dashboard lists (invalidated on offer/escrow/contract events)
+OFFER_SUMMARY_CACHE_SECONDS = 300
+
+# Per-freelancer set of applied project ids (invalidated on new proposals)
+APPLIED_PROJECTS_CACHE_SECONDS = 3600
+
+# Per-user running session / open block state for the desktop tracker
+# (written through by the session lifecycle, rebuilt from the DB on a miss)
+TRACKING_STATE_CACHE_SECONDS = 60 * 60 * 12
+
+# Client live tracking feed: events are coalesced per contract for this
+# many seconds before going out (LocalLiveFeedBuffer for single-process dev)
+TRACKING_LIVE_FEED_BUFFER = os.getenv(
+    "TRACKING_LIVE_FEED_BUFFER",
+    "apps.tracking.services.live_feed.RedisLiveFeedBuffer",
+)
+TRACKING_LIVE_COALESCE_SECONDS = 2
+
+# Active tracking policy and per (user, contract) consent resolution
+# (invalidated on consent, policy and contract changes)
+TRACKING_CONSENT_CACHE_SECONDS = 60 * 60 * 12
+
+# Per (user, device_id) registered-device lookups (invalidated on save)
+DEVICE_CACHE_SECONDS = 60 * 60 * 24
+
+# Coalesced Device.last_seen_at updates (LocalDeviceSeenBuffer for single-process dev)
+DEVICE_LAST_SEEN_BUFFER = os.getenv(
+    "DEVICE_LAST_SEEN_BUFFER",
+    "apps.tracking.services.device_registry.RedisDeviceSeenBuffer",
+)
+
 
 
 # Email backend configuration
@@ -17,3 +17,10 @@ class TrackingPolicy(models.Model):
     content = models.TextField()  
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        from apps.tracking.services.tracking_consent import invalidate_active_policy
+
+        super().save(*args, **kwargs)
+        # Also retires every cached consent resolution (keyed by policy)
+        invalidate_active_policy()
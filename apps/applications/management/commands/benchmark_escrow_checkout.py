@@ -0,0 +1,223 @@
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from apps.applications.models import EscrowPayment, Offer, Proposal
+from apps.applications.services import escrow_checkout
+from apps.applications.services.checkout_gateway import LocalStripeStub
+from apps.applications.services.escrow_checkout import reserve_escrow_payment
+from apps.freelancer.models import FreelancerProfile
+from apps.users.models import Project, User
+
+
+class LockProbe:
+    """
+    connection.execute_wrapper timing the first SELECT ... FOR UPDATE
+    of a call: its duration is the lock wait, and from its return to
+    the commit of that transaction the lock is held.
+    """
+
+    def __init__(self):
+        self.acquired = None
+        self.wait = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        if "FOR UPDATE" not in sql or self.acquired is not None:
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.acquired = time.perf_counter()
+            self.wait = self.acquired - started
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark escrow checkout against the local Stripe stub. "
+        "Each round fires --concurrency simultaneous checkouts for one "
+        "offer (double clicks / retries) and reports latency, offer "
+        "row-lock wait and hold time. Every phase commits for real. Runs "
+        "on a throwaway test database unless --current-db (the benchmark "
+        "data is then deleted afterwards). SQLite does not lock rows, so "
+        "lock numbers need PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=10, help="Offers to check out.")
+        parser.add_argument("--concurrency", type=int, default=5, help="Simultaneous checkouts per offer.")
+        parser.add_argument("--latency-ms", type=int, default=300)
+        parser.add_argument(
+            "--legacy",
+            action="store_true",
+            help="Also measure the old flow (Stripe call inside the row lock).",
+        )
+        parser.add_argument(
+            "--current-db",
+            action="store_true",
+            help="Run against the configured database (benchmark rows are deleted afterwards).",
+        )
+
+    def handle(self, *args, **options):
+        gateway = LocalStripeStub(latency_ms=options["latency_ms"])
+        self.user_ids = []
+        self.reserved = threading.local()
+
+        old_config = None
+        if not options["current_db"]:
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+
+        # Records when phase 1 committed, per worker thread
+        with mock.patch.object(escrow_checkout, "reserve_escrow_payment", self._timed_reserve):
+            try:
+                self._run("two-phase", options, lambda offer: self._two_phase(offer, gateway))
+                if options["legacy"]:
+                    self._run("legacy", options, lambda offer: self._legacy(offer, gateway))
+            finally:
+                if old_config is not None:
+                    teardown_databases(old_config, verbosity=0)
+                else:
+                    self._cleanup()
+
+        self.stdout.write(f"Stub calls: {gateway.calls}")
+
+    # -------------------------------------------------
+    # Flows (return the moment the locked transaction committed)
+    # -------------------------------------------------
+    def _timed_reserve(self, **kwargs):
+        try:
+            return reserve_escrow_payment(**kwargs)
+        finally:
+            self.reserved.committed = time.perf_counter()
+
+    def _two_phase(self, offer, gateway):
+        # Reserves under the row lock, then talks to the stub unlocked
+        escrow_checkout.start_escrow_checkout(offer_id=offer.id, client=offer.client, gateway=gateway)
+        return self.reserved.committed
+
+    def _legacy(self, offer, gateway):
+        with transaction.atomic():
+            locked = Offer.objects.select_for_update().get(pk=offer.pk)
+            if not EscrowPayment.objects.filter(offer=locked).exists():
+                gateway.create_session(
+                    amount_cents=int(locked.total_budget * 100),
+                    currency="inr",
+                    product_name=f"Escrow for Offer #{locked.id}",
+                    metadata={"payment_type": "escrow", "offer_id": str(locked.id)},
+                    success_url="http://localhost:3000/payment-success",
+                    cancel_url="http://localhost:3000/payment-failed",
+                    idempotency_key=uuid.uuid4().hex,
+                )
+                EscrowPayment.objects.create(
+                    offer=locked,
+                    amount=locked.total_budget,
+                    status="pending",
+                )
+        return time.perf_counter()
+
+    # -------------------------------------------------
+    # Helpers
+    # -------------------------------------------------
+    def _call(self, flow, offer, barrier):
+        probe = LockProbe()
+        try:
+            with connection.execute_wrapper(probe):
+                barrier.wait()
+                started = time.perf_counter()
+                committed = flow(offer)
+                total = time.perf_counter() - started
+        except Exception as exc:
+            return {"error": repr(exc)}
+        finally:
+            # Each worker thread has its own connection
+            connection.close()
+
+        if probe.acquired is None:
+            return {"total": total}
+        return {"total": total, "wait": probe.wait, "hold": committed - probe.acquired}
+
+    def _run(self, label, options, flow):
+        concurrency = options["concurrency"]
+        results = []
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for _ in range(options["rounds"]):
+                offer = self._make_offer()
+                barrier = threading.Barrier(concurrency)
+                futures = [pool.submit(self._call, flow, offer, barrier) for _ in range(concurrency)]
+                results += [future.result() for future in futures]
+
+        for key in ("total", "wait", "hold"):
+            values = sorted(r[key] * 1000 for r in results if key in r)
+            if not values:
+                self.stdout.write(f"{label:<10} {key:<6} n/a (no row locks on this backend)")
+                continue
+            self.stdout.write(
+                f"{label:<10} {key:<6} "
+                f"p50={statistics.median(values):8.2f}ms "
+                f"p95={values[max(0, int(len(values) * 0.95) - 1)]:8.2f}ms "
+                f"max={values[-1]:8.2f}ms"
+            )
+
+        errors = [r["error"] for r in results if "error" in r]
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{label:<10} {len(errors)} failed call(s), e.g. {errors[0]}"))
+
+    def _make_offer(self):
+        tag = uuid.uuid4().hex[:10]
+        client = User.objects.create_user(
+            email=f"bench-client-{tag}@example.com",
+            username=f"bench-client-{tag}",
+            role="client",
+        )
+        freelancer_user = User.objects.create_user(
+            email=f"bench-freelancer-{tag}@example.com",
+            username=f"bench-freelancer-{tag}",
+            role="freelancer",
+        )
+        self.user_ids += [client.pk, freelancer_user.pk]
+
+        freelancer = FreelancerProfile.objects.create(
+            user=freelancer_user, title="Benchmark", bio="Benchmark"
+        )
+        project = Project.objects.create(
+            client=client,
+            title="Benchmark project",
+            description="Benchmark project description",
+            budget_type="hourly",
+            hourly_min_rate=Decimal("10.00"),
+            hourly_max_rate=Decimal("50.00"),
+            experience_level="entry",
+            duration="1 month",
+        )
+        proposal = Proposal.objects.create(
+            project=project,
+            freelancer=freelancer_user,
+            cover_letter="Benchmark",
+            bid_hourly_rate=Decimal("20.00"),
+            status="accepted",
+        )
+        return Offer.objects.create(
+            proposal=proposal,
+            client=client,
+            freelancer=freelancer,
+            total_budget=Decimal("500.00"),
+            agreed_hourly_rate=Decimal("20.00"),
+            valid_until=timezone.now() + timedelta(days=7),
+            status="accepted",
+        )
+
+    def _cleanup(self):
+        # Projects, proposals, offers and payments cascade from the users
+        User.objects.filter(pk__in=self.user_ids).delete()
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.applications.models import Offer
+from apps.applications.services.offer_summary import refresh_offer_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the OfferSummary projection (all offers, or the given ids)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("offer_ids", nargs="*", type=int)
+
+    def handle(self, *args, **options):
+        offer_ids = options["offer_ids"] or list(
+            Offer.objects.order_by("id").values_list("id", flat=True)
+        )
+
+        rebuilt = 0
+        for offer_id in offer_ids:
+            if refresh_offer_summary(offer_id):
+                rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} offer summary row(s)."))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:20
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+LEDGER_BUCKETS = {
+    'committed_amount': ['pending', 'approved', 'locked', 'paid'],
+    'approved_amount': ['approved', 'locked', 'paid'],
+    'paid_amount': ['paid'],
+}
+
+
+def backfill_offer_ledger(apps, schema_editor):
+    Offer = apps.get_model('applications', 'Offer')
+    BillingUnit = apps.get_model('billing', 'BillingUnit')
+
+    totals = (
+        BillingUnit.objects
+        .values('contract__offer')
+        .annotate(**{
+            field: Sum('gross_amount', filter=Q(status__in=statuses))
+            for field, statuses in LEDGER_BUCKETS.items()
+        })
+    )
+
+    for row in totals:
+        Offer.objects.filter(pk=row['contract__offer']).update(**{
+            field: row[field] or Decimal('0.00')
+            for field in LEDGER_BUCKETS
+        })
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0015_alter_offer_agreed_hourly_rate_and_more'),
+        ('billing', '0004_invoice'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='approved_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Consumed from escrow (approved/locked/paid)', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='committed_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Billed and not rejected (pending/approved/locked/paid)', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Paid out to the freelancer', max_digits=12),
+        ),
+        migrations.RunPython(backfill_offer_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0016_offer_budget_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escrowpayment',
+            name='checkout_url',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='escrowpayment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, help_text='Stripe idempotency key for checkout session creation', max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='escrowpayment',
+            name='stripe_checkout_session_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+DISPLAY_FORMAT = '%d %b %Y, %I:%M %p'
+
+
+def _display_name(user):
+    full_name = f'{user.first_name} {user.last_name}'.strip()
+    return full_name or user.username
+
+
+def backfill_offer_summaries(apps, schema_editor):
+    Offer = apps.get_model('applications', 'Offer')
+    EscrowPayment = apps.get_model('applications', 'EscrowPayment')
+    Contract = apps.get_model('contract', 'Contract')
+    OfferSummary = apps.get_model('applications', 'OfferSummary')
+
+    payments = dict(EscrowPayment.objects.values_list('offer_id', 'status'))
+    contracts = {
+        row['offer_id']: row
+        for row in Contract.objects.values('offer_id', 'id', 'status')
+    }
+
+    offers = Offer.objects.select_related(
+        'proposal__project', 'client', 'freelancer__user'
+    )
+    OfferSummary.objects.bulk_create(
+        [
+            OfferSummary(
+                offer_id=offer.id,
+                client_id=offer.client_id,
+                freelancer_user_id=offer.freelancer.user_id,
+                freelancer_profile_id=offer.freelancer_id,
+                project_id=offer.proposal.project_id,
+                project_title=offer.proposal.project.title,
+                client_name=_display_name(offer.client),
+                freelancer_name=_display_name(offer.freelancer.user),
+                total_budget=offer.total_budget,
+                agreed_hourly_rate=offer.agreed_hourly_rate,
+                estimated_hours=offer.estimated_hours,
+                message=offer.message,
+                status=offer.status,
+                escrow_status=payments.get(offer.id),
+                contract_id=contracts.get(offer.id, {}).get('id'),
+                contract_status=contracts.get(offer.id, {}).get('status'),
+                valid_until=offer.valid_until,
+                created_at=offer.created_at,
+                created_at_display=offer.created_at.strftime(DISPLAY_FORMAT),
+                valid_until_display=offer.valid_until.strftime(DISPLAY_FORMAT),
+            )
+            for offer in offers.iterator(chunk_size=500)
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0017_escrowpayment_two_phase_checkout'),
+        ('contract', '0003_contract_tracking_policy_contract_tracking_required'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfferSummary',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='applications.offer')),
+                ('freelancer_profile_id', models.PositiveBigIntegerField()),
+                ('project_id', models.PositiveBigIntegerField()),
+                ('project_title', models.CharField(max_length=255)),
+                ('client_name', models.CharField(max_length=255)),
+                ('freelancer_name', models.CharField(max_length=255)),
+                ('total_budget', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('agreed_hourly_rate', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('estimated_hours', models.PositiveIntegerField(blank=True, null=True)),
+                ('message', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(max_length=20)),
+                ('escrow_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('contract_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('contract_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('valid_until', models.DateTimeField()),
+                ('created_at', models.DateTimeField()),
+                ('created_at_display', models.CharField(max_length=32)),
+                ('valid_until_display', models.CharField(max_length=32)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offer_summaries_sent', to=settings.AUTH_USER_MODEL)),
+                ('freelancer_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offer_summaries_received', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['client', '-created_at'], name='application_client__ade10c_idx'), models.Index(fields=['freelancer_user', '-created_at'], name='application_freelan_d165e7_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_offer_summaries, migrations.RunPython.noop),
+    ]
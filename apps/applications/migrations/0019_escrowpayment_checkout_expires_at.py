@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0018_offer_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='escrowpayment',
+            name='checkout_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
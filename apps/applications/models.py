@@ -1,7 +1,5 @@
 from decimal import Decimal
 from django.db import models, transaction
-from django.db.models import Sum
-from apps.billing.models import BillingUnit
 from apps.users.models import Project
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -582,6 +580,28 @@ class Offer(models.Model):
         default='pending'
     )
 
+    # Running budget ledger (maintained by apps.billing.ledger)
+    committed_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Billed and not rejected (pending/approved/locked/paid)"
+    )
+
+    approved_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Consumed from escrow (approved/locked/paid)"
+    )
+
+    paid_amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        help_text="Paid out to the freelancer"
+    )
+
     valid_until = models.DateTimeField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -610,10 +630,13 @@ class Offer(models.Model):
             raise ValidationError("Offer expiry must be in the future.")
 
     def save(self, *args, **kwargs):
+        from apps.applications.services.offer_summary import schedule_offer_summary_refresh
+
         if self.status == 'pending' and self.valid_until <= timezone.now():
             self.status = 'expired'
         self.full_clean()
         super().save(*args, **kwargs)
+        schedule_offer_summary_refresh(self.pk)
 
     @property
     def has_escrow(self):
@@ -627,16 +650,9 @@ class Offer(models.Model):
     def total_paid(self):
         """
         Total amount already consumed from escrow.
-        Includes approved/locked/paid units.
+        Includes approved/locked/paid units (ledger, no query).
         """
-        total = BillingUnit.objects.filter(
-            contract__offer=self,
-            status__in=["approved", "locked", "paid"]
-        ).aggregate(
-            total=Sum("gross_amount")
-        )["total"]
-
-        return total or Decimal("0.00")
+        return self.approved_amount
 
 
     @property
@@ -691,6 +707,24 @@ class EscrowPayment(models.Model):
         blank=True
     )
 
+    # Two-phase checkout: reserved first, Stripe session attached after
+    idempotency_key = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Stripe idempotency key for checkout session creation"
+    )
+
+    stripe_checkout_session_id = models.CharField(
+        max_length=255,
+        null=True,
+        blank=True
+    )
+
+    checkout_url = models.TextField(blank=True)
+    checkout_expires_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     escrowed_at = models.DateTimeField(null=True, blank=True)
     released_at = models.DateTimeField(null=True, blank=True)
@@ -713,6 +747,12 @@ class EscrowPayment(models.Model):
                 "Escrow amount must match offer total budget."
             )
 
+    def save(self, *args, **kwargs):
+        from apps.applications.services.offer_summary import schedule_offer_summary_refresh
+
+        super().save(*args, **kwargs)
+        schedule_offer_summary_refresh(self.offer_id)
+
     def __str__(self):
         return f"EscrowPayment #{self.id} ({self.status})"
 
@@ -720,3 +760,66 @@ class EscrowPayment(models.Model):
 
 
 
+
+
+
+
+class OfferSummary(models.Model):
+    """
+    Denormalized read model for the client / freelancer offer dashboards.
+    Rebuilt by apps.applications.services.offer_summary whenever the
+    offer, its escrow payment or its contract changes; project titles
+    and party names are rewritten in place when those are renamed.
+    """
+
+    offer = models.OneToOneField(
+        Offer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary"
+    )
+
+    client = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="offer_summaries_sent"
+    )
+
+    # Freelancer USER (not profile), so lists filter on request.user directly
+    freelancer_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="offer_summaries_received"
+    )
+    freelancer_profile_id = models.PositiveBigIntegerField()
+
+    project_id = models.PositiveBigIntegerField()
+    project_title = models.CharField(max_length=255)
+    client_name = models.CharField(max_length=255)
+    freelancer_name = models.CharField(max_length=255)
+
+    total_budget = models.DecimalField(max_digits=12, decimal_places=2)
+    agreed_hourly_rate = models.DecimalField(max_digits=10, decimal_places=2)
+    estimated_hours = models.PositiveIntegerField(null=True, blank=True)
+    message = models.TextField(blank=True, null=True)
+
+    status = models.CharField(max_length=20)
+    escrow_status = models.CharField(max_length=20, null=True, blank=True)
+    contract_id = models.PositiveBigIntegerField(null=True, blank=True)
+    contract_status = models.CharField(max_length=20, null=True, blank=True)
+
+    valid_until = models.DateTimeField()
+    created_at = models.DateTimeField()
+    created_at_display = models.CharField(max_length=32)
+    valid_until_display = models.CharField(max_length=32)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["client", "-created_at"]),
+            models.Index(fields=["freelancer_user", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"OfferSummary → Offer {self.offer_id} ({self.status})"
@@ -2,6 +2,7 @@
 from django.urls import re_path, path
 from apps.applications.consumers import ChatConsumer
 from apps.notifications.consumers import NotificationConsumer
+from apps.tracking.consumers import LiveTrackingConsumer
 
 websocket_urlpatterns = [
     # Chat
@@ -9,4 +10,7 @@ websocket_urlpatterns = [
 
     # Notifications
     path("ws/notifications/", NotificationConsumer.as_asgi()),
+
+    # Live tracking feed (clients)
+    path("ws/tracking/live/", LiveTrackingConsumer.as_asgi()),
 ]
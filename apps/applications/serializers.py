@@ -8,6 +8,7 @@ from apps. users.models import Project, ClientProfile, User
 from apps. freelancer.models import FreelancerProfile, Skill
 from apps.users.serializers import ProjectSerializer
 from .models import EscrowPayment, Proposal,ProposalScore,Message,ChatRoom,SavedProject,Meeting,Offer
+from apps.applications.services.proposal_apply import DuplicateProposal, applied_project_ids, submit_proposal
 from django.db.models import Q
 
 
@@ -81,10 +82,10 @@ class ProjectDetailSerializer(serializers.ModelSerializer):
         return ClientInfoSerializer(profile, context=self.context).data
 
     def get_already_applied(self, obj):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            return obj.proposals.filter(freelancer=user).exists()
-        return False
+        request = self.context.get('request')
+        if request is None:
+            return False
+        return obj.id in applied_project_ids(request.user)
 
 # ---------------- Proposal Create / Apply ----------------
 from rest_framework import serializers
@@ -104,6 +105,8 @@ class ProposalCreateSerializer(serializers.ModelSerializer):
             'bid_fixed_price',
             'bid_hourly_rate',
         ]
+        # Duplicates are rejected by the unique constraint in create()
+        validators = []
 
     def validate_cover_letter(self, value):
         value = value.strip()
@@ -136,14 +139,6 @@ class ProposalCreateSerializer(serializers.ModelSerializer):
                 "You cannot apply to your own project."
             )
 
-        if Proposal.objects.filter(
-            project=project,
-            freelancer=user
-        ).exists():
-            raise serializers.ValidationError(
-                "You have already applied to this project."
-            )
-
         if project.status != 'open':
             raise serializers.ValidationError(
                 "This project is not accepting proposals."
@@ -171,6 +166,13 @@ class ProposalCreateSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    def create(self, validated_data):
+        try:
+            return submit_proposal(**validated_data)
+        except DuplicateProposal as exc:
+            # Same error shape as the validate() checks
+            raise serializers.ValidationError({"non_field_errors": [str(exc)]})
+
 
 class ProposalScorePublicSerializer(serializers.ModelSerializer):
     class Meta:
@@ -650,6 +652,48 @@ class OfferReadOnlySerializer(serializers.ModelSerializer):
 
 
 
+class OfferSummarySerializer(serializers.Serializer):
+    """
+    Dashboard list rows served from the OfferSummary projection
+    (plain dicts, see services.offer_summary). Same shape as
+    OfferReadOnlySerializer plus escrow / contract state.
+    """
+    id = serializers.IntegerField(source="offer_id")
+
+    # Project
+    project_id = serializers.IntegerField()
+    project_title = serializers.CharField()
+
+    # Client
+    client_id = serializers.IntegerField()
+    client_name = serializers.CharField()
+
+    # Freelancer
+    freelancer_id = serializers.IntegerField(source="freelancer_profile_id")
+    freelancer_name = serializers.CharField()
+
+    # Financial terms
+    total_budget = serializers.DecimalField(max_digits=12, decimal_places=2)
+    agreed_hourly_rate = serializers.DecimalField(max_digits=10, decimal_places=2)
+    estimated_hours = serializers.IntegerField(allow_null=True)
+
+    # Offer state
+    message = serializers.CharField(allow_null=True)
+    status = serializers.CharField()
+    is_expired = serializers.BooleanField()
+    can_respond = serializers.BooleanField()
+    escrow_status = serializers.CharField(allow_null=True)
+    contract_id = serializers.IntegerField(allow_null=True)
+    contract_status = serializers.CharField(allow_null=True)
+
+    # Dates
+    created_at = serializers.DateTimeField()
+    created_at_display = serializers.CharField()
+    valid_until = serializers.DateTimeField()
+    valid_until_display = serializers.CharField()
+
+
+
 class OfferAcceptSerializer(serializers.ModelSerializer):
     class Meta:
         model = Offer
@@ -0,0 +1,117 @@
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import stripe
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+# Stripe's default lifetime of a checkout session
+SESSION_LIFETIME = timedelta(hours=24)
+
+
+class CheckoutGateway:
+    """
+    Creates hosted checkout sessions, returned as {"id", "url",
+    "expires_at"}. Implementations must honour `idempotency_key`: the
+    same key always yields the same session.
+    """
+
+    def create_session(
+        self,
+        *,
+        amount_cents,
+        currency,
+        product_name,
+        metadata,
+        success_url,
+        cancel_url,
+        idempotency_key,
+    ):
+        raise NotImplementedError
+
+
+class StripeCheckoutGateway(CheckoutGateway):
+    def create_session(
+        self,
+        *,
+        amount_cents,
+        currency,
+        product_name,
+        metadata,
+        success_url,
+        cancel_url,
+        idempotency_key,
+    ):
+        session = stripe.checkout.Session.create(
+            api_key=settings.STRIPE_SECRET_KEY,
+            payment_method_types=["card"],
+            mode="payment",
+            line_items=[
+                {
+                    "price_data": {
+                        "currency": currency,
+                        "product_data": {"name": product_name},
+                        "unit_amount": amount_cents,
+                    },
+                    "quantity": 1,
+                }
+            ],
+            metadata=metadata,
+            success_url=success_url,
+            cancel_url=cancel_url,
+            idempotency_key=idempotency_key,
+        )
+        return {
+            "id": session.id,
+            "url": session.url,
+            "expires_at": datetime.fromtimestamp(session.expires_at, tz=dt_timezone.utc),
+        }
+
+
+class LocalStripeStub(CheckoutGateway):
+    """
+    In-process stand-in for Stripe Checkout.
+    Used for local development and for benchmarking lock-hold time
+    against a configurable network latency.
+    """
+
+    def __init__(self, latency_ms=None, lifetime=SESSION_LIFETIME):
+        if latency_ms is None:
+            latency_ms = getattr(settings, "STRIPE_STUB_LATENCY_MS", 0)
+        self.latency_ms = latency_ms
+        self.lifetime = lifetime
+        self.sessions = {}
+        self.calls = 0
+
+    def create_session(
+        self,
+        *,
+        amount_cents,
+        currency,
+        product_name,
+        metadata,
+        success_url,
+        cancel_url,
+        idempotency_key,
+    ):
+        self.calls += 1
+
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        if idempotency_key not in self.sessions:
+            session_id = f"cs_stub_{uuid.uuid4().hex[:24]}"
+            self.sessions[idempotency_key] = {
+                "id": session_id,
+                "url": f"{success_url}?stub_session={session_id}",
+                "expires_at": timezone.now() + self.lifetime,
+            }
+
+        return self.sessions[idempotency_key]
+
+
+def get_checkout_gateway():
+    return import_string(settings.ESCROW_CHECKOUT_GATEWAY)()
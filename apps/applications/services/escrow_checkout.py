@@ -0,0 +1,161 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.applications.models import EscrowPayment, Offer
+from apps.applications.services.checkout_gateway import SESSION_LIFETIME, get_checkout_gateway
+
+
+MINIMUM_AMOUNT_CENTS = 50
+SUCCESS_URL = "http://localhost:3000/payment-success"
+CANCEL_URL = "http://localhost:3000/payment-failed"
+
+# Don't hand out a session that expires while the client is paying
+SESSION_EXPIRY_MARGIN = timedelta(minutes=10)
+
+
+class EscrowCheckoutError(Exception):
+    def __init__(self, detail, status_code=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def _session_expired(payment):
+    expires_at = payment.checkout_expires_at
+    if expires_at is None:
+        # Attached before expiries were stored; reserved just before
+        expires_at = payment.created_at + SESSION_LIFETIME
+    return expires_at <= timezone.now() + SESSION_EXPIRY_MARGIN
+
+
+def _renew_reservation(payment):
+    """
+    Drop an expired checkout session. Stripe would answer the old
+    idempotency key with that same dead session, so a new key is drawn
+    and the next phase 2 creates a fresh one.
+    """
+    payment.idempotency_key = uuid.uuid4().hex
+    payment.stripe_checkout_session_id = None
+    payment.checkout_url = ""
+    payment.checkout_expires_at = None
+    EscrowPayment.objects.filter(pk=payment.pk).update(
+        idempotency_key=payment.idempotency_key,
+        stripe_checkout_session_id=None,
+        checkout_url="",
+        checkout_expires_at=None,
+    )
+
+
+def _amount_cents(offer):
+    return int(
+        (offer.total_budget * 100).quantize(
+            Decimal("1"), rounding=ROUND_HALF_UP
+        )
+    )
+
+
+# =====================================================
+# Phase 1: reserve (short transaction, row lock)
+# =====================================================
+def reserve_escrow_payment(*, offer_id, client):
+    """
+    Lock the offer just long enough to validate it and reserve a
+    pending EscrowPayment carrying the Stripe idempotency key.
+
+    A pending payment without a checkout session (previous attempt died
+    before Stripe answered) is reused with the same key, so Stripe hands
+    back the same session instead of creating a second one. One whose
+    session has expired gets a new key (and so a new session).
+    """
+    with transaction.atomic():
+        offer = (
+            Offer.objects
+            .select_for_update()
+            .select_related("proposal__project")
+            .filter(id=offer_id, client=client)
+            .first()
+        )
+        if not offer:
+            raise EscrowCheckoutError("Offer not found.", status_code=404)
+
+        if offer.status != "accepted":
+            raise EscrowCheckoutError("Offer must be accepted first.")
+
+        payment = EscrowPayment.objects.filter(offer=offer).first()
+        if payment:
+            if payment.status != "pending":
+                raise EscrowCheckoutError("Payment already initiated.")
+            if not payment.idempotency_key:
+                # Legacy row created before two-phase checkout
+                raise EscrowCheckoutError("Payment already initiated.")
+            if payment.stripe_checkout_session_id and _session_expired(payment):
+                _renew_reservation(payment)
+            return offer, payment
+
+        if _amount_cents(offer) < MINIMUM_AMOUNT_CENTS:
+            raise EscrowCheckoutError("Amount below Stripe minimum.")
+
+        payment = EscrowPayment.objects.create(
+            offer=offer,
+            amount=offer.total_budget,
+            status="pending",
+            idempotency_key=uuid.uuid4().hex,
+        )
+
+    return offer, payment
+
+
+# =====================================================
+# Phase 2 + 3: call Stripe (no locks), attach session
+# =====================================================
+def start_escrow_checkout(*, offer_id, client, gateway=None):
+    """
+    Returns the pending EscrowPayment with its checkout session attached.
+    """
+    offer, payment = reserve_escrow_payment(offer_id=offer_id, client=client)
+
+    if payment.stripe_checkout_session_id:
+        return payment
+
+    gateway = gateway or get_checkout_gateway()
+
+    try:
+        session = gateway.create_session(
+            amount_cents=_amount_cents(offer),
+            currency="inr",
+            product_name=f"Escrow for Project #{offer.proposal.project.id}",
+            metadata={
+                "payment_type": "escrow",
+                "offer_id": str(offer.id),
+            },
+            success_url=SUCCESS_URL,
+            cancel_url=CANCEL_URL,
+            idempotency_key=payment.idempotency_key,
+        )
+    except Exception as exc:
+        # Payment stays pending without a session; a retry reuses the key.
+        raise EscrowCheckoutError(
+            f"Payment provider unavailable: {exc}",
+            status_code=502,
+        )
+
+    # Keyed on the idempotency key too: a slow call for a key renewed
+    # meanwhile must not attach its (expired) session
+    EscrowPayment.objects.filter(
+        pk=payment.pk,
+        idempotency_key=payment.idempotency_key,
+        stripe_checkout_session_id__isnull=True,
+    ).update(
+        stripe_checkout_session_id=session["id"],
+        checkout_url=session["url"],
+        checkout_expires_at=session["expires_at"],
+    )
+
+    payment.stripe_checkout_session_id = session["id"]
+    payment.checkout_url = session["url"]
+    payment.checkout_expires_at = session["expires_at"]
+    return payment
@@ -0,0 +1,202 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.applications.models import Offer, OfferSummary
+
+
+DISPLAY_FORMAT = "%d %b %Y, %I:%M %p"
+
+SUMMARY_FIELDS = [
+    "offer_id",
+    "project_id",
+    "project_title",
+    "client_id",
+    "client_name",
+    "freelancer_profile_id",
+    "freelancer_name",
+    "total_budget",
+    "agreed_hourly_rate",
+    "estimated_hours",
+    "message",
+    "status",
+    "escrow_status",
+    "contract_id",
+    "contract_status",
+    "created_at",
+    "created_at_display",
+    "valid_until",
+    "valid_until_display",
+]
+
+
+def _display_name(user):
+    return user.get_full_name() or user.username
+
+
+def _cache_key(role, user_id):
+    return f"offers:summary:{role}:{user_id}"
+
+
+# =====================================================
+# Write side
+# =====================================================
+def refresh_offer_summary(offer_id):
+    """
+    Rebuild the projection row for one offer and drop the cached
+    dashboard lists of both parties.
+    """
+    offer = (
+        Offer.objects
+        .select_related(
+            "proposal__project",
+            "client",
+            "freelancer__user",
+            "payment",
+            "contract",
+        )
+        .filter(pk=offer_id)
+        .first()
+    )
+    if offer is None:
+        return None
+
+    payment = getattr(offer, "payment", None)
+    contract = getattr(offer, "contract", None)
+    project = offer.proposal.project
+    freelancer_user = offer.freelancer.user
+
+    summary, _ = OfferSummary.objects.update_or_create(
+        offer=offer,
+        defaults={
+            "client": offer.client,
+            "freelancer_user": freelancer_user,
+            "freelancer_profile_id": offer.freelancer_id,
+            "project_id": project.id,
+            "project_title": project.title,
+            "client_name": _display_name(offer.client),
+            "freelancer_name": _display_name(freelancer_user),
+            "total_budget": offer.total_budget,
+            "agreed_hourly_rate": offer.agreed_hourly_rate,
+            "estimated_hours": offer.estimated_hours,
+            "message": offer.message,
+            "status": offer.status,
+            "escrow_status": payment.status if payment else None,
+            "contract_id": contract.id if contract else None,
+            "contract_status": contract.status if contract else None,
+            "valid_until": offer.valid_until,
+            "created_at": offer.created_at,
+            "created_at_display": offer.created_at.strftime(DISPLAY_FORMAT),
+            "valid_until_display": offer.valid_until.strftime(DISPLAY_FORMAT),
+        },
+    )
+
+    invalidate_offer_lists(offer.client_id, freelancer_user.id)
+    return summary
+
+
+def schedule_offer_summary_refresh(offer_id):
+    """
+    Called from model save() hooks: refresh once the change is committed.
+    A failed refresh is logged; `rebuild_offer_summaries` repairs rows.
+    """
+    if offer_id:
+        transaction.on_commit(lambda: refresh_offer_summary(offer_id), robust=True)
+
+
+def invalidate_offer_lists(client_id, freelancer_user_id):
+    cache.delete_many([
+        _cache_key("client", client_id),
+        _cache_key("freelancer", freelancer_user_id),
+    ])
+
+
+# =====================================================
+# Write side (renames of denormalized names)
+# =====================================================
+RENAME_FIELDS = {"title", "username", "first_name", "last_name"}
+
+
+def schedule_project_title_refresh(project, update_fields=None):
+    """Called from Project.save(): copy a new title into its summaries."""
+    if update_fields is not None and not RENAME_FIELDS & set(update_fields):
+        return
+    project_id, client_id, title = project.pk, project.client_id, project.title
+    transaction.on_commit(
+        lambda: _rename(
+            OfferSummary.objects.filter(client_id=client_id, project_id=project_id),
+            project_title=title,
+        ),
+        robust=True,
+    )
+
+
+def schedule_party_name_refresh(user, update_fields=None):
+    """Called from User.save(): copy a new display name into summaries."""
+    if update_fields is not None and not RENAME_FIELDS & set(update_fields):
+        return
+    user_id, name = user.pk, _display_name(user)
+
+    def _refresh():
+        _rename(OfferSummary.objects.filter(client_id=user_id), client_name=name)
+        _rename(OfferSummary.objects.filter(freelancer_user_id=user_id), freelancer_name=name)
+
+    transaction.on_commit(_refresh, robust=True)
+
+
+def _rename(rows, **values):
+    """
+    Rewrite one denormalized column on the rows that still hold an old
+    value and drop the cached lists of everyone who sees those rows.
+    Saves that did not rename anything cost a single indexed SELECT.
+    """
+    stale = rows.exclude(**values)
+    parties = set(stale.values_list("client_id", "freelancer_user_id"))
+    if not parties:
+        return 0
+
+    updated = stale.update(**values, refreshed_at=timezone.now())
+    cache.delete_many([
+        key
+        for client_id, freelancer_user_id in parties
+        for key in (_cache_key("client", client_id), _cache_key("freelancer", freelancer_user_id))
+    ])
+    return updated
+
+
+# =====================================================
+# Read side
+# =====================================================
+def _offer_rows(role, user):
+    key = _cache_key(role, user.id)
+    rows = cache.get(key)
+
+    if rows is None:
+        owner_filter = {"client": user} if role == "client" else {"freelancer_user": user}
+        rows = list(
+            OfferSummary.objects
+            .filter(**owner_filter)
+            .order_by("-created_at")
+            .values(*SUMMARY_FIELDS)
+        )
+        cache.set(key, rows, settings.OFFER_SUMMARY_CACHE_SECONDS)
+
+    # Expiry is time-dependent: derive it per request, never cache it
+    now = timezone.now()
+    return [
+        {
+            **row,
+            "is_expired": row["valid_until"] < now,
+            "can_respond": row["status"] == "pending" and row["valid_until"] >= now,
+        }
+        for row in rows
+    ]
+
+
+def client_offer_rows(user):
+    return _offer_rows("client", user)
+
+
+def freelancer_offer_rows(user):
+    return _offer_rows("freelancer", user)
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
+from apps.applications.models import Proposal
+
+
+class DuplicateProposal(Exception):
+    pass
+
+
+def _applied_key(user_id):
+    return f"proposals:applied:{user_id}"
+
+
+# =====================================================
+# Apply
+# =====================================================
+def submit_proposal(**fields):
+    """
+    Insert the proposal and let the (project, freelancer) unique
+    constraint reject duplicates, instead of checking with a query first.
+    Other integrity errors are not duplicates and propagate.
+    """
+    proposal = Proposal(**fields)
+    try:
+        with transaction.atomic():
+            proposal.save(force_insert=True)
+    except IntegrityError:
+        # Only reached on a failed insert: confirm it was the unique pair
+        if Proposal.objects.filter(
+            project_id=proposal.project_id,
+            freelancer_id=proposal.freelancer_id,
+        ).exists():
+            raise DuplicateProposal("You have already applied to this project.")
+        raise
+
+    freelancer_id = proposal.freelancer_id
+    transaction.on_commit(lambda: cache.delete(_applied_key(freelancer_id)), robust=True)
+    return proposal
+
+
+# =====================================================
+# Applied-projects set
+# =====================================================
+def applied_project_ids(user):
+    """
+    Project ids the user has applied to, cached per user.
+    One query on a cold cache, none afterwards; listings check
+    membership for a whole page against this set.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    key = _applied_key(user.id)
+    project_ids = cache.get(key)
+
+    if project_ids is None:
+        project_ids = frozenset(
+            Proposal.objects
+            .filter(freelancer=user)
+            .values_list("project_id", flat=True)
+        )
+        cache.set(key, project_ids, settings.APPLIED_PROJECTS_CACHE_SECONDS)
+
+    return project_ids
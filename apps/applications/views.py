@@ -3,9 +3,11 @@ from rest_framework import generics,permissions,status,viewsets
 from rest_framework.response import Response
 from apps.notifications.services.create_notifications import notify_user
 from apps. users.models import Project
-from.models import EscrowPayment, Offer, Proposal,SavedProject,Meeting
-from.serializers import MeetingPublicSerializer, OfferAcceptSerializer, OfferCreateSerializer, OfferReadOnlySerializer, OfferRejectSerializer, ProjectDetailSerializer,ProposalCreateSerializer,MyProposalSerializer,ProposalDetailSerializer
+from.models import Offer, Proposal,SavedProject,Meeting
+from.serializers import MeetingPublicSerializer, OfferAcceptSerializer, OfferCreateSerializer, OfferReadOnlySerializer, OfferSummarySerializer, OfferRejectSerializer, ProjectDetailSerializer,ProposalCreateSerializer,MyProposalSerializer,ProposalDetailSerializer
 from apps.applications.services.proposal_scoring_service import ProposalScoringService
+from apps.applications.services.escrow_checkout import EscrowCheckoutError, start_escrow_checkout
+from apps.applications.services.offer_summary import client_offer_rows, freelancer_offer_rows
 from rest_framework.permissions import IsAuthenticated
 from apps.applications.models import FreelancerProfile
 from rest_framework.decorators import action
@@ -14,7 +16,6 @@ from django.db.models import Q
 from django.db import transaction
 from apps.applications.tasks import send_meeting_created_email
 import stripe
-from decimal import Decimal,ROUND_HALF_UP
 
 
 from rest_framework import generics, permissions
@@ -381,18 +382,17 @@ class OfferCreateView(generics.CreateAPIView):
         return Offer.objects.none()
 
 class ClientOfferListView(generics.ListAPIView):
-    serializer_class = OfferReadOnlySerializer
+    """
+    Served from the OfferSummary projection (cached per user). The rows
+    are plain dicts, so the queryset filter backends are switched off;
+    pagination works on the list as-is.
+    """
+    serializer_class = OfferSummarySerializer
+    filter_backends = []
     permission_classes = [permissions.IsAuthenticated, IsClient]
 
     def get_queryset(self):
-        return Offer.objects.filter(
-            client=self.request.user
-        ).select_related(
-            "proposal",
-            "client",
-            "freelancer",
-            "proposal__project"
-        ).order_by("-created_at")
+        return client_offer_rows(self.request.user)
 
 
 class ClientOfferDetailView(generics.RetrieveAPIView):
@@ -409,24 +409,17 @@ class ClientOfferDetailView(generics.RetrieveAPIView):
 
 
 class FreelancerOfferListView(generics.ListAPIView):
-    serializer_class = OfferReadOnlySerializer
+    """
+    Served from the OfferSummary projection (cached per user). The rows
+    are plain dicts, so the queryset filter backends are switched off;
+    pagination works on the list as-is.
+    """
+    serializer_class = OfferSummarySerializer
+    filter_backends = []
     permission_classes = [permissions.IsAuthenticated, IsFreelancer]
 
     def get_queryset(self):
-        freelancer_profile = FreelancerProfile.objects.get(
-            user=self.request.user
-        )
-
-        return (
-            Offer.objects
-            .filter(freelancer=freelancer_profile)
-            .select_related(
-                "proposal",
-                "client",
-                "proposal__project"
-            )
-            .order_by("-created_at")
-        )
+        return freelancer_offer_rows(self.request.user)
 
 
 class FreelancerOfferDetailView(generics.RetrieveAPIView):
@@ -444,75 +437,30 @@ class FreelancerOfferDetailView(generics.RetrieveAPIView):
 
 
 class CreateEscrowCheckoutSession(APIView):
+    """
+    Two-phase escrow checkout:
+    1. Reserve a pending EscrowPayment (short row lock on the offer)
+    2. Create the Stripe session outside any transaction, keyed by the
+       payment's idempotency key, then attach it to the payment
+    """
     permission_classes = [IsAuthenticated]
-    MINIMUM_AMOUNT_CENTS = 50
 
     def post(self, request):
-        offer_id = request.data.get("offer_id")
-
-        with transaction.atomic():
-            offer = get_object_or_404(
-                Offer.objects.select_for_update(),
-                id=offer_id,
-                client=request.user
-            )
-
-            if offer.status != "accepted":
-                return Response(
-                    {"detail": "Offer must be accepted first."},
-                    status=400
-                )
-
-            if hasattr(offer, "payment"):
-                return Response(
-                    {"detail": "Payment already initiated."},
-                    status=400
-                )
-
-            amount_cents = int(
-                (offer.total_budget * 100).quantize(
-                    Decimal("1"), rounding=ROUND_HALF_UP
-                )
-            )
-
-            if amount_cents < self.MINIMUM_AMOUNT_CENTS:
-                return Response(
-                    {"detail": "Amount below Stripe minimum."},
-                    status=400
-                )
-
-            session = stripe.checkout.Session.create(
-                payment_method_types=["card"],
-                mode="payment",
-                line_items=[
-                    {
-                        "price_data": {
-                            "currency": "inr",
-                            "product_data": {
-                                "name": f"Escrow for Project #{offer.proposal.project.id}",
-                            },
-                            "unit_amount": amount_cents,
-                        },
-                        "quantity": 1,
-                    }
-                ],
-                metadata={
-                    "offer_id": str(offer.id),
-                },
-                success_url="http://localhost:3000/payment-success",
-                cancel_url="http://localhost:3000/payment-failed",
+        try:
+            payment = start_escrow_checkout(
+                offer_id=request.data.get("offer_id"),
+                client=request.user,
             )
-
-            EscrowPayment.objects.create(
-                offer=offer,
-                amount=offer.total_budget,
-                status="pending",
+        except EscrowCheckoutError as exc:
+            return Response(
+                {"detail": exc.detail},
+                status=exc.status_code
             )
 
         return Response(
             {
-                "checkout_url": session.url,
-                "session_id": session.id,
+                "checkout_url": payment.checkout_url,
+                "session_id": payment.stripe_checkout_session_id,
             },
             status=201
         )
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.applications.models import Offer
+
+
+# =====================================================
+# Ledger buckets
+# =====================================================
+# Each Offer keeps running totals of its billing units.
+# A unit counts towards a bucket while its status is in the set.
+LEDGER_BUCKETS = {
+    "committed_amount": {"pending", "approved", "locked", "paid"},
+    "approved_amount": {"approved", "locked", "paid"},
+    "paid_amount": {"paid"},
+}
+
+
+def _ledger_deltas(amount, old_status, new_status):
+    deltas = {}
+    for field, statuses in LEDGER_BUCKETS.items():
+        direction = int(new_status in statuses) - int(old_status in statuses)
+        if direction:
+            deltas[field] = F(field) + (amount * direction)
+    return deltas
+
+
+def apply_ledger_transition(unit, old_status, new_status):
+    """
+    Move a billing unit's gross amount between ledger buckets.
+
+    Must run inside the same transaction that changes the unit status,
+    so the ledger and the units never drift apart.
+    """
+    deltas = _ledger_deltas(unit.gross_amount, old_status, new_status)
+    if not deltas:
+        return
+
+    Offer.objects.filter(contract=unit.contract_id).update(**deltas)
+
+
+def record_billing_unit_created(unit):
+    apply_ledger_transition(unit, None, unit.status)
+
+
+# =====================================================
+# Reconciliation
+# =====================================================
+def _bucket_sum(statuses):
+    return Coalesce(
+        Sum(
+            "contract__billing_units__gross_amount",
+            filter=Q(contract__billing_units__status__in=statuses),
+        ),
+        Value(Decimal("0.00")),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def offers_with_raw_totals():
+    """
+    Offers annotated with totals recomputed from BillingUnit rows.
+    """
+    return Offer.objects.annotate(
+        **{
+            f"raw_{field}": _bucket_sum(statuses)
+            for field, statuses in LEDGER_BUCKETS.items()
+        }
+    )
+
+
+def find_ledger_mismatches(queryset=None):
+    """
+    Yield (offer, {field: (ledger_value, raw_value)}) for offers whose
+    running totals disagree with the raw aggregates.
+    """
+    queryset = queryset if queryset is not None else offers_with_raw_totals()
+
+    for offer in queryset.iterator(chunk_size=500):
+        diff = {}
+        for field in LEDGER_BUCKETS:
+            ledger_value = getattr(offer, field)
+            raw_value = getattr(offer, f"raw_{field}")
+            if ledger_value != raw_value:
+                diff[field] = (ledger_value, raw_value)
+        if diff:
+            yield offer, diff
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.applications.models import Offer
+from apps.billing.ledger import LEDGER_BUCKETS, find_ledger_mismatches
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify the running offer budget ledger against raw BillingUnit "
+        "aggregates. Use --fix to overwrite drifted totals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Rewrite mismatched ledger totals from the raw aggregates.",
+        )
+
+    def handle(self, *args, **options):
+        fix = options["fix"]
+        mismatches = 0
+
+        for offer, diff in find_ledger_mismatches():
+            mismatches += 1
+            details = ", ".join(
+                f"{field}: ledger={ledger} raw={raw}"
+                for field, (ledger, raw) in diff.items()
+            )
+            self.stdout.write(f"Offer #{offer.id} → {details}")
+
+            if fix:
+                with transaction.atomic():
+                    Offer.objects.filter(pk=offer.pk).update(
+                        **{
+                            field: getattr(offer, f"raw_{field}")
+                            for field in LEDGER_BUCKETS
+                        }
+                    )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Offer ledger is consistent."))
+        elif fix:
+            self.stdout.write(self.style.WARNING(f"Fixed {mismatches} offer(s)."))
+        else:
+            self.stdout.write(self.style.ERROR(f"{mismatches} offer(s) out of sync."))
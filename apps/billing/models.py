@@ -1,5 +1,5 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -98,16 +98,42 @@ class BillingUnit(models.Model):
     def productive_seconds(self):
         return self.billable_seconds - self.idle_seconds
 
+    def transition_to(self, status: str, **extra_fields):
+        """
+        Change status and keep the offer budget ledger in step.
+        The status update is conditional on the current status, so a
+        concurrent transition can never be counted twice.
+        """
+        from apps.billing.ledger import apply_ledger_transition
+
+        old_status = self.status
+        if old_status == status:
+            return
+
+        with transaction.atomic():
+            updated = BillingUnit.objects.filter(
+                pk=self.pk,
+                status=old_status,
+            ).update(status=status, **extra_fields)
+
+            if not updated:
+                raise ValidationError(
+                    f"Billing unit {self.pk} is no longer '{old_status}'."
+                )
+
+            apply_ledger_transition(self, old_status, status)
+
+        self.status = status
+        for field, value in extra_fields.items():
+            setattr(self, field, value)
+
     def lock_for_payout(self, batch: PayoutBatch):
         if self.status != "approved":
             raise ValidationError("Only approved billing units can be paid.")
-        self.status = "locked"
-        self.payout_batch = batch
-        self.save(update_fields=["status", "payout_batch"])
+        self.transition_to("locked", payout_batch=batch)
 
     def mark_paid(self):
-        self.status = "paid"
-        self.save(update_fields=["status"])
+        self.transition_to("paid")
 
     def __str__(self):
         return f"BillingUnit #{self.id} → Freelancer {self.freelancer_id}"
@@ -52,10 +52,9 @@ class BillingUnitReviewSerializer(serializers.Serializer):
     action = serializers.ChoiceField(choices=["approve", "reject"])
 
     def update(self, instance, validated_data):
-        instance.status = (
+        instance.transition_to(
             "approved" if validated_data["action"] == "approve" else "rejected"
         )
-        instance.save(update_fields=["status"])
         return instance
 
 
@@ -165,6 +164,8 @@ class PayoutConfirmSerializer(serializers.Serializer):
                 status="pending",
             )
 
+            # approved -> locked stays inside the same ledger buckets,
+            # so a bulk update keeps the offer ledger consistent.
             units.update(
                 status="locked",
                 payout_batch=payout,
@@ -2,6 +2,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from django.db import transaction
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from apps.applications.models import Offer
 from apps.tracking.models import WorkSession
 from .models import BillingUnit, Invoice, PayoutBatch
 
@@ -9,6 +10,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from django.core.exceptions import ValidationError
 from apps.tracking.models import WorkSession
 from .models import BillingUnit
+from .ledger import record_billing_unit_created
 
 def create_billing_unit_for_session(session: WorkSession):
     contract = session.contract
@@ -22,25 +24,57 @@ def create_billing_unit_for_session(session: WorkSession):
     if not offer.has_escrow:
         raise ValidationError("Cannot bill session: escrow not funded yet.")
 
-    # Prevent duplicate billing
-    if BillingUnit.objects.filter(session=session).exists():
-        return None
-
-    tracked_seconds = session.total_seconds
+    tracked_seconds = session.closed_seconds
     if tracked_seconds <= 0:
         return None
 
-    # Bill full tracked duration (ignore idle for payment)
-    billable_seconds = tracked_seconds
     hourly_rate = offer.agreed_hourly_rate
+
+    with transaction.atomic():
+        # Row lock on the offer: concurrent sessions of one contract take
+        # their share of the budget one after another, so the cap below
+        # always sees the units committed before it.
+        locked_offer = Offer.objects.select_for_update().get(pk=offer.pk)
+
+        # Prevent duplicate billing
+        if BillingUnit.objects.filter(session=session).exists():
+            return None
+
+        # Bill full tracked duration (ignore idle for payment)
+        billable_seconds, gross_amount = _cap_to_budget(
+            locked_offer, tracked_seconds, hourly_rate
+        )
+
+        billing_unit = BillingUnit.objects.create(
+            contract=contract,
+            freelancer=offer.freelancer,
+            session=session,
+            period_start=session.started_at,
+            period_end=session.ended_at,
+            billable_seconds=billable_seconds,
+            idle_seconds=session.closed_idle_seconds,
+            hourly_rate=hourly_rate,
+            gross_amount=gross_amount,
+            status="pending",
+        )
+        record_billing_unit_created(billing_unit)
+
+    return billing_unit
+
+
+def _cap_to_budget(offer, billable_seconds, hourly_rate):
+    """
+    (billable_seconds, gross_amount) for a session, capped to what is
+    left of the offer's budget. `offer` must be the row-locked one;
+    pending units already claim their amount (committed_amount).
+    """
     billable_hours = Decimal(billable_seconds) / Decimal("3600")
     gross_amount = (billable_hours * hourly_rate).quantize(
         Decimal("0.01"),
         rounding=ROUND_HALF_UP,
     )
 
-    # --- New Budget Validation ---
-    remaining_budget = offer.remaining_budget
+    remaining_budget = offer.total_budget - offer.committed_amount
     if remaining_budget <= 0:
         raise ValidationError("Cannot bill session: offer budget exhausted.")
 
@@ -53,18 +87,7 @@ def create_billing_unit_for_session(session: WorkSession):
         )
         billable_seconds = int(billable_hours * 3600)
 
-    return BillingUnit.objects.create(
-        contract=contract,
-        freelancer=offer.freelancer,
-        session=session,
-        period_start=session.started_at,
-        period_end=session.ended_at,
-        billable_seconds=billable_seconds,
-        idle_seconds=session.total_idle_seconds,  
-        hourly_rate=hourly_rate,
-        gross_amount=gross_amount,
-        status="pending",
-    )
+    return billable_seconds, gross_amount
 
 
 
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:42
+
+import apps.cores.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contract', '0003_contract_tracking_policy_contract_tracking_required'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contractdocument',
+            name='file',
+            field=models.FileField(storage=apps.cores.storage.get_content_addressed_storage, upload_to='contract_documents/'),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from apps.adminpanel.models import TrackingPolicy
 from apps.contract.constants import contract_document_upload_path
+from apps.cores.storage import get_content_addressed_storage
 
 User = settings.AUTH_USER_MODEL
 
@@ -65,6 +66,15 @@ class Contract(models.Model):
     def __str__(self):
         return f"Contract #{self.id} | Offer #{self.offer.id} | Freelancer {self.offer.freelancer}"
 
+    def save(self, *args, **kwargs):
+        from apps.applications.services.offer_summary import schedule_offer_summary_refresh
+        from apps.tracking.services.tracking_consent import invalidate_contract_consent
+
+        super().save(*args, **kwargs)
+        schedule_offer_summary_refresh(self.offer_id)
+        # Status / tracking policy are part of the cached consent check
+        invalidate_contract_consent(self.pk)
+
     def is_active(self):
         return self.status == "active"
 
@@ -137,7 +147,7 @@ class ContractDocument(models.Model):
         related_name="documents"
     )
 
-    file = models.FileField(upload_to="contract_documents/")
+    file = models.FileField(upload_to="contract_documents/", storage=get_content_addressed_storage)
     original_name = models.CharField(max_length=255)
 
     mime_type = models.CharField(max_length=100)
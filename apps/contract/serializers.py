@@ -4,6 +4,7 @@ from apps.applications.models import EscrowPayment, Offer
 from apps.contract.models import Contract, ContractDocument, ContractDocumentFolder
 from apps.contract.utils.file_validation import validate_contract_document
 from apps.tracking.models import Device, WorkConsent
+from apps.tracking.services.tracking_consent import get_active_policy
 from django.db import transaction
 
 
@@ -172,7 +173,7 @@ class AcceptTrackingPolicySerializer(serializers.Serializer):
             raise serializers.ValidationError("Tracking already accepted on this contract.")
 
         # 🔹 Active policy check
-        policy = TrackingPolicy.objects.filter(is_active=True).first()
+        policy = get_active_policy()
         if not policy:
             raise serializers.ValidationError("No active tracking policy.")
 
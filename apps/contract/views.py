@@ -1,4 +1,4 @@
-from amqp import NotFound
+from rest_framework.exceptions import NotFound
 from django.shortcuts import render
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.db.models import Q
@@ -7,13 +7,13 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from apps.adminpanel.models import TrackingPolicy
 from apps.applications.serializers import MessageSerializer
 from apps.applications.models import Message
 from apps.contract.permissions import IsContractParty
 from apps.contract.serializers import AcceptTrackingPolicySerializer, ContractDocumentSerializer, ContractSerializer, ContractDocumentFolderSerializer, TrackingPolicySerializer
 from apps.contract.models import Contract, ContractDocument, ContractDocumentFolder
 from apps.freelancer.models import FreelancerProfile
+from apps.tracking.services.tracking_consent import get_active_policy
 
 
 
@@ -314,12 +314,7 @@ class ActiveTrackingPolicyView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        policy = (
-            TrackingPolicy.objects
-            .filter(is_active=True)
-            .order_by("-created_at")
-            .first()
-        )
+        policy = get_active_policy()
 
         if not policy:
             raise NotFound("No active tracking policy available")
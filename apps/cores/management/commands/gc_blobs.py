@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.cores.services.blob_gc import collect_garbage
+
+
+class Command(BaseCommand):
+    help = "Recount content-addressed blob references and delete orphaned blobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--grace-hours", type=int, help="Keep orphans referenced within this window.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        summary = collect_garbage(
+            grace_hours=options["grace_hours"],
+            dry_run=options["dry_run"],
+        )
+
+        self.stdout.write(
+            f"Checked {summary['checked']} blob(s), "
+            f"recounted {summary['recounted']}, "
+            f"{'would delete' if options['dry_run'] else 'deleted'} {summary['deleted']} "
+            f"({summary['freed_bytes']} bytes) and {summary['orphans']} orphaned file(s)."
+        )
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+# =====================================================
+# Content-addressed blobs
+# =====================================================
+class StoredBlob(models.Model):
+    """
+    One physical file in the content-addressed store.
+
+    `refcount` is bumped on every save that resolves to this blob and
+    lowered on explicit storage deletes; the garbage collector recounts
+    it from the referencing FileFields before removing anything.
+    """
+    key = models.CharField(max_length=128, primary_key=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.PositiveBigIntegerField()
+
+    refcount = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_referenced_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["refcount", "last_referenced_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.refcount} refs)"
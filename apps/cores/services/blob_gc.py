@@ -0,0 +1,149 @@
+from collections import Counter
+from datetime import timedelta
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from apps.cores.models import StoredBlob
+from apps.cores.storage import CAS_PREFIX, ContentAddressedStorage, get_content_addressed_storage
+
+
+CHUNK_SIZE = 1000
+
+
+def content_addressed_fields():
+    """(model, field) for every FileField backed by the content-addressed store."""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField) and isinstance(field.storage, ContentAddressedStorage):
+                yield model, field
+
+
+def count_references(fields):
+    """
+    Counter of stored name -> referencing rows, one streamed pass per
+    field. The file columns are not indexed, so looking keys up with
+    __in per chunk would scan every referencing table each time.
+    """
+    counts = Counter()
+    for model, field in fields:
+        names = (
+            model._default_manager
+            .exclude(**{field.name: ""})
+            .values_list(field.name, flat=True)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+        counts.update(name for name in names if name)
+    return counts
+
+
+# =====================================================
+# Mark & sweep
+# =====================================================
+def collect_garbage(*, grace_hours=None, dry_run=False):
+    """
+    1. Recount references for every blob from the referencing columns
+       (row deletes and cascades never call storage.delete, so stored
+       refcounts can only be trusted as a hint). References added after
+       the count bump last_referenced_at, so the grace period and the
+       locked re-check in _sweep keep those blobs.
+    2. Delete blobs with no references that have not been referenced
+       within the grace period (protects uploads whose rows are not
+       committed yet).
+    3. Delete stored bytes with no blob row at all (written by a save
+       whose transaction rolled back) once older than the grace period.
+    """
+    grace_hours = settings.BLOB_GC_GRACE_HOURS if grace_hours is None else grace_hours
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    counts = count_references(content_addressed_fields())
+    storage = get_content_addressed_storage()
+
+    summary = {"checked": 0, "recounted": 0, "deleted": 0, "freed_bytes": 0, "orphans": 0}
+
+    last_key = ""
+    while True:
+        blobs = list(
+            StoredBlob.objects
+            .filter(pk__gt=last_key)
+            .order_by("pk")[:CHUNK_SIZE]
+        )
+        if not blobs:
+            break
+        last_key = blobs[-1].pk
+        summary["checked"] += len(blobs)
+
+        drifted = [b for b in blobs if b.refcount != counts[b.pk]]
+        summary["recounted"] += len(drifted)
+
+        if not dry_run:
+            for blob in drifted:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=counts[blob.pk])
+
+        for blob in blobs:
+            if counts[blob.pk] or blob.last_referenced_at >= cutoff:
+                continue
+            if dry_run:
+                summary["deleted"] += 1
+                summary["freed_bytes"] += blob.size
+                continue
+            if _sweep(blob.pk, cutoff, storage):
+                summary["deleted"] += 1
+                summary["freed_bytes"] += blob.size
+
+    summary["orphans"] = _sweep_orphans(storage.backend, cutoff, dry_run)
+    return summary
+
+
+def _sweep(key, cutoff, storage):
+    with transaction.atomic():
+        blob = (
+            StoredBlob.objects
+            .select_for_update()
+            .filter(pk=key, refcount=0, last_referenced_at__lt=cutoff)
+            .first()
+        )
+        if blob is None:
+            return False
+
+        # A save in flight blocks on this row lock and re-creates the
+        # blob (and its bytes) after we commit.
+        storage.backend.delete(key)
+        blob.delete()
+    return True
+
+
+# =====================================================
+# Orphaned bytes
+# =====================================================
+def _stored_keys(backend, path=CAS_PREFIX):
+    """Every key under the content-addressed prefix (walks the shards)."""
+    try:
+        dirs, files = backend.listdir(path)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f"{path}/{name}"
+    for name in dirs:
+        yield from _stored_keys(backend, f"{path}/{name}")
+
+
+def _sweep_orphans(backend, cutoff, dry_run):
+    """
+    Delete stored keys that have no StoredBlob row. The grace period
+    (on the file's modified time) covers saves whose row has not
+    committed yet; a later save of the same bytes rewrites the file.
+    """
+    removed = 0
+    keys = _stored_keys(backend)
+    while batch := list(islice(keys, CHUNK_SIZE)):
+        known = set(StoredBlob.objects.filter(pk__in=batch).values_list("pk", flat=True))
+        for key in batch:
+            if key in known or backend.get_modified_time(key) >= cutoff:
+                continue
+            if not dry_run:
+                backend.delete(key)
+            removed += 1
+    return removed
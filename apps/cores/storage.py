@@ -0,0 +1,285 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from tempfile import NamedTemporaryFile
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, Storage
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+CAS_PREFIX = "cas"
+
+
+def blob_key(sha256, extension=""):
+    """cas/ab/cd/abcd…<ext> – two levels of sharding keep directories small."""
+    return f"{CAS_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+# =====================================================
+# S3-compatible backend
+# =====================================================
+class S3CompatibleStorage(Storage):
+    """
+    Minimal S3 backend (AWS, MinIO, any S3 API). `endpoint_url` points it
+    at a local stand-in such as MinIO or moto for development and tests.
+    boto3 is only needed when this backend is configured.
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket,
+        endpoint_url=None,
+        access_key=None,
+        secret_key=None,
+        region=None,
+        public_url=None,
+        url_expires=3600,
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.url_expires = url_expires
+
+    @cached_property
+    def client(self):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("The S3 content storage backend requires boto3.")
+
+        return boto3.client(
+            "s3",
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=self.access_key,
+            aws_secret_access_key=self.secret_key,
+            region_name=self.region,
+        )
+
+    def _save(self, name, content):
+        if hasattr(content, "seek"):
+            content.seek(0)
+        self.client.upload_fileobj(content, self.bucket, name)
+        return name
+
+    def _open(self, name, mode="rb"):
+        body = self.client.get_object(Bucket=self.bucket, Key=name)["Body"]
+        return ContentFile(body.read(), name=name)
+
+    def _head(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    def exists(self, name):
+        return self._head(name) is not None
+
+    def size(self, name):
+        head = self._head(name)
+        return head["ContentLength"] if head else 0
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def listdir(self, path):
+        prefix = f"{path.rstrip('/')}/" if path else ""
+        dirs, files = [], []
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket,
+            Prefix=prefix,
+            Delimiter="/",
+        )
+        for page in pages:
+            dirs += [p["Prefix"][len(prefix):].rstrip("/") for p in page.get("CommonPrefixes", [])]
+            files += [o["Key"][len(prefix):] for o in page.get("Contents", [])]
+        return dirs, files
+
+    def get_modified_time(self, name):
+        head = self._head(name)
+        if head is None:
+            raise FileNotFoundError(name)
+        return head["LastModified"]
+
+    def url(self, name):
+        if self.public_url:
+            return f"{self.public_url}/{name}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": name},
+            ExpiresIn=self.url_expires,
+        )
+
+
+def build_backend():
+    if settings.CONTENT_STORAGE_BACKEND == "s3":
+        return S3CompatibleStorage(**settings.CONTENT_STORAGE_S3)
+    return FileSystemStorage(allow_overwrite=True)
+
+
+# =====================================================
+# Content-addressed storage
+# =====================================================
+class ContentAddressedStorage(Storage):
+    """
+    Stores every upload under the sha256 of its bytes, so identical
+    files are written once and shared. The `upload_to` prefix of the
+    field is ignored; names stored before the switch still resolve
+    through the same backend.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @cached_property
+    def backend(self):
+        return self._backend or build_backend()
+
+    # ----------------------------
+    # Write
+    # ----------------------------
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save()
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()[:10]
+        key = blob_key(sha256, extension)
+
+        acquire_blob(key, sha256, size, write=lambda: self._write(key, content))
+        return key
+
+    def _write(self, key, content):
+        if hasattr(content, "seek"):
+            content.seek(0)
+        self.backend.save(key, content)
+
+    def delete(self, name):
+        """
+        Drops one reference. The bytes are removed later by the
+        garbage collector once nothing points at them.
+        """
+        if name.startswith(f"{CAS_PREFIX}/"):
+            release_blob(name)
+        else:
+            self.backend.delete(name)
+
+    # ----------------------------
+    # Read (pass-through)
+    # ----------------------------
+    def _open(self, name, mode="rb"):
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+
+# =====================================================
+# Refcounts
+# =====================================================
+def acquire_blob(key, sha256, size, *, write):
+    """
+    Add a reference to `key`, writing the bytes only if no blob row
+    exists. The row UPDATE waits on the garbage collector's row lock,
+    so a blob is never re-referenced while it is being removed.
+
+    The row commits with the caller's transaction; if that rolls back
+    the bytes stay behind without a row, and the garbage collector's
+    orphan sweep removes them once they are older than the grace period.
+    """
+    from apps.cores.models import StoredBlob
+
+    now = timezone.now()
+    referenced = StoredBlob.objects.filter(pk=key).update(
+        refcount=F("refcount") + 1,
+        last_referenced_at=now,
+    )
+    if referenced:
+        return False
+
+    write()
+
+    with transaction.atomic():
+        blob, created = StoredBlob.objects.select_for_update().get_or_create(
+            pk=key,
+            defaults={
+                "sha256": sha256,
+                "size": size,
+                "refcount": 1,
+                "last_referenced_at": now,
+            },
+        )
+        if not created:
+            StoredBlob.objects.filter(pk=key).update(
+                refcount=F("refcount") + 1,
+                last_referenced_at=now,
+            )
+    return created
+
+
+def release_blob(key):
+    from apps.cores.models import StoredBlob
+
+    StoredBlob.objects.filter(pk=key, refcount__gt=0).update(
+        refcount=F("refcount") - 1,
+    )
+
+
+content_addressed_storage = ContentAddressedStorage()
+
+
+@contextmanager
+def local_path(field_file):
+    """
+    A filesystem path for a stored file. Backends without one (S3) get
+    a temporary copy, removed on exit, so path-based readers still work.
+    """
+    try:
+        path = field_file.path
+    except NotImplementedError:
+        path = None
+
+    if path:
+        yield path
+        return
+
+    suffix = os.path.splitext(field_file.name)[1]
+    with NamedTemporaryFile(suffix=suffix) as tmp:
+        with field_file.open("rb") as source:
+            for chunk in source.chunks():
+                tmp.write(chunk)
+        tmp.flush()
+        yield tmp.name
+
+
+def get_content_addressed_storage():
+    """Callable passed as `storage=` so migrations don't serialize the instance."""
+    return content_addressed_storage
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:42
+
+import apps.cores.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0008_remove_pricing_fixed_price_remove_pricing_max_price_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='freelancerprofile',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=apps.cores.storage.get_content_addressed_storage, upload_to='freelancer_profiles/'),
+        ),
+        migrations.AlterField(
+            model_name='freelancerprofile',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=apps.cores.storage.get_content_addressed_storage, upload_to='freelancer_resumes/'),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.core.exceptions import ValidationError
 User = settings.AUTH_USER_MODEL
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from apps.cores.storage import get_content_addressed_storage
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     def __str__(self):
@@ -37,8 +38,8 @@ class FreelancerProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    resume = models.FileField(upload_to="freelancer_resumes/", null=True, blank=True)
-    profile_picture = models.ImageField(upload_to="freelancer_profiles/", blank=True, null=True)
+    resume = models.FileField(upload_to="freelancer_resumes/", storage=get_content_addressed_storage, null=True, blank=True)
+    profile_picture = models.ImageField(upload_to="freelancer_profiles/", storage=get_content_addressed_storage, blank=True, null=True)
 
     def __str__(self):
         return f"{self.user.email} - Freelancer"
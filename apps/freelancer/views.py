@@ -13,7 +13,9 @@ from rest_framework import generics
 from .models import FreelancerProfile, Category, Skill, FreelancerSkill, Education, EmploymentHistory
 from .serializers import FreelancerProfileSerializer, CategorySerializer, SkillSerializer
 from .utils import process_freelancer_document
-from apps.users.serializers import ProjectSerializer
+from apps.cores.storage import local_path
+from apps.users.serializers import OpenProjectSerializer
+from apps.applications.services.proposal_apply import applied_project_ids
 from apps.users.models import Project
 
 logger = logging.getLogger(__name__)
@@ -170,19 +172,18 @@ def upload_resume(request):
 
             extracted_data = {}
             if resume_file:
-                file_path = profile.resume.path if hasattr(profile.resume, 'path') else None
-                if file_path:
+                with local_path(profile.resume) as file_path:
                     ai_response = process_freelancer_document(file_path)
-                    extracted_data = {
-                        "title": ai_response.get("positions", [""])[0] if ai_response.get("positions") else "",
-                        "bio": ai_response.get("bio", ""),
-                        "contact_number": "",
-                        "hourly_rate": "",
-                        "skills": [skill["name"] for skill in ai_response.get("skills", [])],
-                        "categories": list(set([skill.get("category") for skill in ai_response.get("skills", []) if skill.get("category")])) or ["General"],
-                        "education": ai_response.get("education", []),
-                        "experience": ai_response.get("experience", []),
-                    }
+                extracted_data = {
+                    "title": ai_response.get("positions", [""])[0] if ai_response.get("positions") else "",
+                    "bio": ai_response.get("bio", ""),
+                    "contact_number": "",
+                    "hourly_rate": "",
+                    "skills": [skill["name"] for skill in ai_response.get("skills", [])],
+                    "categories": list(set([skill.get("category") for skill in ai_response.get("skills", []) if skill.get("category")])) or ["General"],
+                    "education": ai_response.get("education", []),
+                    "experience": ai_response.get("experience", []),
+                }
 
             profile.refresh_from_db()
             serializer = FreelancerProfileSerializer(profile, context={'request': request})
@@ -203,7 +204,18 @@ def upload_resume(request):
 # Open Projects List
 # ---------------------------
 class OpenProjectListView(generics.ListAPIView):
-    serializer_class = ProjectSerializer
+    serializer_class = OpenProjectSerializer
 
     def get_queryset(self):
-        return Project.objects.filter(status="open").order_by("-created_at")
+        return (
+            Project.objects
+            .filter(status="open")
+            .select_related("client")
+            .prefetch_related("skills_required")
+            .order_by("-created_at")
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["applied_project_ids"] = applied_project_ids(self.request.user)
+        return context
@@ -0,0 +1,82 @@
+import json
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+
+class LiveTrackingConsumer(AsyncWebsocketConsumer):
+    """
+    Live tracking feed for a client's active contracts (or one of them
+    with ?contract_id=). Sends a snapshot of the running sessions on
+    connect, then coalesced batches of session / block / screenshot
+    events pushed by the tracking endpoints.
+    """
+
+    async def connect(self):
+        user = self.scope["user"]
+
+        if user.is_anonymous:
+            await self.close()
+            return
+
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        contract_id = query.get("contract_id", [None])[0]
+
+        self.contract_ids = await self.get_contract_ids(user, contract_id)
+        if not self.contract_ids:
+            await self.close()
+            return
+
+        from apps.tracking.services.live_feed import contract_group
+
+        self.group_names = [contract_group(cid) for cid in self.contract_ids]
+        for group_name in self.group_names:
+            await self.channel_layer.group_add(group_name, self.channel_name)
+
+        await self.accept()
+        await self.send(text_data=json.dumps({
+            "type": "snapshot",
+            "contract_ids": self.contract_ids,
+            "sessions": await self.get_running_sessions(),
+        }))
+
+    async def disconnect(self, close_code):
+        for group_name in getattr(self, "group_names", []):
+            await self.channel_layer.group_discard(group_name, self.channel_name)
+
+    async def tracking_batch(self, event):
+        await self.send(text_data=json.dumps({
+            "type": "batch",
+            "events": event["events"],
+        }))
+
+    @database_sync_to_async
+    def get_contract_ids(self, user, contract_id):
+        from apps.contract.models import Contract
+
+        contracts = Contract.objects.filter(status="active")
+        if contract_id:
+            if not contract_id.isdigit():
+                return []
+            contracts = contracts.filter(pk=contract_id)
+        elif user.is_staff:
+            # Staff watch one contract at a time
+            return []
+
+        if not user.is_staff:
+            contracts = contracts.filter(offer__client=user)
+        return list(contracts.values_list("pk", flat=True))
+
+    @database_sync_to_async
+    def get_running_sessions(self):
+        from apps.tracking.models import WorkSession
+        from apps.tracking.services.live_feed import session_event
+
+        return [
+            session_event(session)
+            for session in WorkSession.objects.filter(
+                contract_id__in=self.contract_ids,
+                ended_at__isnull=True,
+            )
+        ]
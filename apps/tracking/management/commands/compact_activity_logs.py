@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.tracking.services.activity_archive import compact_activity_logs
+
+
+class Command(BaseCommand):
+    help = (
+        "Move ActivityLog months older than the hot window into archive "
+        "segments and drop segments past retention."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hot-months", type=int, help="Months kept in the hot table.")
+        parser.add_argument("--retention-months", type=int, help="Months of segments kept.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        summary = compact_activity_logs(
+            hot_months=options["hot_months"],
+            retention_months=options["retention_months"],
+            dry_run=options["dry_run"],
+        )
+
+        for month, count in summary["compacted"]:
+            self.stdout.write(f"Compacted {month:%Y-%m}: {count} row(s)")
+        for month, count in summary["expired"]:
+            self.stdout.write(f"Expired {month:%Y-%m}: {count} row(s)")
+
+        if not summary["compacted"] and not summary["expired"]:
+            self.stdout.write(self.style.SUCCESS("Nothing to compact."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run, nothing changed."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.tracking.models import Screenshot
+from apps.tracking.tasks import process_screenshot_task
+
+
+class Command(BaseCommand):
+    help = "Queue thumbnail / hash processing for screenshots that are still pending."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--include-failed", action="store_true")
+        parser.add_argument("--sync", action="store_true", help="Process inline instead of queueing.")
+
+    def handle(self, *args, **options):
+        statuses = ["PENDING", "FAILED"] if options["include_failed"] else ["PENDING"]
+        ids = Screenshot.objects.filter(processing_status__in=statuses).values_list("id", flat=True)
+
+        queued = 0
+        for screenshot_id in ids.iterator(chunk_size=500):
+            if options["sync"]:
+                process_screenshot_task(screenshot_id)
+            else:
+                process_screenshot_task.delay(screenshot_id)
+            queued += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Queued {queued} screenshot(s)."))
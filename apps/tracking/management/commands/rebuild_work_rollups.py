@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.tracking.services.work_rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily worked-time rollups from closed time blocks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--freelancer", type=int, help="FreelancerProfile id.")
+        parser.add_argument("--contract", type=int, help="Contract id.")
+
+    def handle(self, *args, **options):
+        summary = rebuild_rollups(
+            freelancer_id=options["freelancer"],
+            contract_id=options["contract"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {summary['pairs']} freelancer/contract pair(s), "
+            f"removed {summary['removed']} stale row(s)."
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tracking.models import FlagRuleSet
+from apps.tracking.services.timeblock_flagger import get_active_rules, reevaluate_timeblock_flags
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-apply the SYSTEM flag rules to closed time blocks evaluated "
+        "under another rule version. ADMIN flags are never touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rules-version", type=int, help="Rule set version (default: active).")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--all", action="store_true", help="Also re-check blocks already on this version.")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        rules = get_active_rules()
+        if options["rules_version"] is not None:
+            rules = FlagRuleSet.objects.filter(version=options["rules_version"]).first()
+            if rules is None:
+                raise CommandError(f"No flag rule set with version {options['rules_version']}.")
+
+        summary = reevaluate_timeblock_flags(
+            rules=rules,
+            chunk_size=options["chunk_size"],
+            include_current=options["all"],
+            dry_run=options["dry_run"],
+        )
+
+        self.stdout.write(
+            f"Rules v{summary['version']}: scanned {summary['scanned']}, "
+            f"changed {summary['changed']} (flagged {summary['flagged']}, "
+            f"cleared {summary['cleared']})"
+        )
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Dry run, nothing changed."))
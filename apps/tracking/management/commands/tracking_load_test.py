@@ -0,0 +1,75 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test.utils import setup_databases, teardown_databases
+
+from apps.tracking.services.load_test import run_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate N desktop trackers against the tracking endpoints and "
+        "report p50/p95/p99 latency, lock wait and query counts per "
+        "endpoint. Runs on a throwaway test database unless --current-db. "
+        "SQLite serialises writers, so use PostgreSQL for meaningful "
+        "concurrency and lock-wait numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trackers", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=6, help="Idle / screenshot / heartbeat rounds per tracker.")
+        parser.add_argument("--concurrency", type=int, default=10, help="Trackers running at once (threads).")
+        parser.add_argument("--pause-every", type=int, default=3, help="Pause + resume every N rounds (0: never).")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--current-db", action="store_true", help="Run against the configured database (data is kept).")
+        parser.add_argument("--eager-tasks", action="store_true", help="Run queued Celery tasks inline.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options["eager_tasks"]:
+            from celery import current_app
+            current_app.conf.task_always_eager = True
+
+        old_config = None
+        if not options["current_db"]:
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+
+        try:
+            rows, elapsed = run_load_test(
+                trackers=options["trackers"],
+                rounds=options["rounds"],
+                concurrency=options["concurrency"],
+                pause_every=options["pause_every"],
+                seed=options["seed"],
+            )
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+
+        total = sum(row["requests"] for row in rows)
+        if options["json"]:
+            self.stdout.write(json.dumps({
+                "trackers": options["trackers"],
+                "concurrency": options["concurrency"],
+                "elapsed_seconds": round(elapsed, 2),
+                "requests": total,
+                "endpoints": rows,
+            }, indent=2))
+            return
+
+        header = f"{'endpoint':<18}{'reqs':>6}{'errs':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'q avg':>7}{'q max':>7}{'lock ms':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<18}{row['requests']:>6}{row['errors']:>6}"
+                f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['queries_avg']:>7.1f}{row['queries_max']:>7}{row['lock_wait_total_ms']:>9.1f}"
+            )
+        self.stdout.write(
+            f"\n{options['trackers']} trackers, {total} requests in {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:.0f} req/s)"
+        )
+        for row in rows:
+            if row["errors"]:
+                self.stdout.write(self.style.WARNING(f"{row['endpoint']}: statuses {row['statuses']}"))
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:31
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_closed_totals(apps, schema_editor):
+    WorkSession = apps.get_model('tracking', 'WorkSession')
+    TimeBlock = apps.get_model('tracking', 'TimeBlock')
+
+    totals = defaultdict(lambda: {
+        'closed_seconds': 0,
+        'closed_idle_seconds': 0,
+        'closed_active_seconds': 0,
+        'open_block_started_at': None,
+    })
+
+    blocks = TimeBlock.objects.values_list(
+        'session_id', 'started_at', 'ended_at', 'idle_seconds', 'active_seconds'
+    )
+    for session_id, started_at, ended_at, idle_seconds, active_seconds in blocks.iterator(chunk_size=2000):
+        row = totals[session_id]
+        if ended_at is None:
+            row['open_block_started_at'] = started_at
+            continue
+        row['closed_seconds'] += max(0, int((ended_at - started_at).total_seconds()))
+        row['closed_idle_seconds'] += idle_seconds
+        row['closed_active_seconds'] += active_seconds
+
+    sessions = list(WorkSession.objects.filter(pk__in=totals.keys()))
+    for session in sessions:
+        for field, value in totals[session.pk].items():
+            setattr(session, field, value)
+
+    WorkSession.objects.bulk_update(
+        sessions,
+        [
+            'closed_seconds',
+            'closed_idle_seconds',
+            'closed_active_seconds',
+            'open_block_started_at',
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0017_alter_activitylog_freelancer'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksession',
+            name='closed_active_seconds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='closed_idle_seconds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='closed_seconds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='worksession',
+            name='open_block_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_closed_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0018_worksession_closed_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worksession',
+            name='last_event_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('freelancer', '0008_remove_pricing_fixed_price_remove_pricing_max_price_and_more'),
+        ('tracking', '0020_activitylog_event_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityLogSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True)),
+                ('archive', models.FileField(upload_to='activity_logs/')),
+                ('row_count', models.PositiveIntegerField()),
+                ('first_created_at', models.DateTimeField()),
+                ('last_created_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['month', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['freelancer', '-created_at'], name='tracking_ac_freelan_e3cfcd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['session', 'created_at'], name='tracking_ac_session_73f7b6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activitylog',
+            index=models.Index(fields=['-created_at'], name='tracking_ac_created_b9b5f4_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0021_activitylog_indexes_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screenshot',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='near_duplicates', to='tracking.screenshot'),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='image_bytes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='is_near_duplicate',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='phash',
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, upload_to='screenshots/previews/'),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='preview_bytes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='processing_status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='PENDING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='screenshots/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='screenshot',
+            name='thumbnail_bytes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:40
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+WINDOW_DURATION = timedelta(minutes=10)
+
+
+def backfill_window_slots(apps, schema_editor):
+    """
+    Legacy windows were opened at arbitrary times; give each the slot it
+    falls in, leaving NULL where two legacy windows share a slot.
+    """
+    ScreenshotWindow = apps.get_model('tracking', 'ScreenshotWindow')
+
+    taken = set()
+    updated = []
+    windows = (
+        ScreenshotWindow.objects
+        .select_related('block')
+        .order_by('block_id', 'start_at', 'id')
+    )
+    for window in windows.iterator(chunk_size=2000):
+        slot = max(0, int((window.start_at - window.block.started_at) // WINDOW_DURATION))
+        if (window.block_id, slot) in taken:
+            continue
+        taken.add((window.block_id, slot))
+        window.slot = slot
+        updated.append(window)
+
+    ScreenshotWindow.objects.bulk_update(updated, ['slot'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0022_screenshot_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screenshotwindow',
+            name='slot',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_window_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='screenshotwindow',
+            constraint=models.UniqueConstraint(fields=('block', 'slot'), name='one_window_per_block_slot'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:42
+
+import apps.cores.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0023_screenshotwindow_slot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='screenshot',
+            name='image',
+            field=models.ImageField(storage=apps.cores.storage.get_content_addressed_storage, upload_to='screenshots/'),
+        ),
+        migrations.AlterField(
+            model_name='screenshot',
+            name='preview',
+            field=models.ImageField(blank=True, null=True, storage=apps.cores.storage.get_content_addressed_storage, upload_to='screenshots/previews/'),
+        ),
+        migrations.AlterField(
+            model_name='screenshot',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, storage=apps.cores.storage.get_content_addressed_storage, upload_to='screenshots/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contract', '0004_content_addressed_storage'),
+        ('tracking', '0024_content_addressed_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['user', 'ended_at'], name='tracking_wo_user_id_a63eab_idx'),
+        ),
+    ]
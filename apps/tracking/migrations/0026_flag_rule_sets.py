@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:51
+
+from django.db import migrations, models
+
+
+def stamp_default_rules(apps, schema_editor):
+    # Existing SYSTEM decisions came from the old hard-coded thresholds,
+    # which are the built-in defaults (version 0)
+    TimeBlock = apps.get_model("tracking", "TimeBlock")
+    TimeBlock.objects.filter(ended_at__isnull=False).exclude(
+        flag_source="ADMIN"
+    ).update(flag_rules_version=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0025_worksession_user_ended_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeblock',
+            name='flag_rules_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='FlagRuleSet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(editable=False, unique=True)),
+                ('is_active', models.BooleanField(default=False)),
+                ('min_block_seconds', models.PositiveIntegerField(default=300)),
+                ('idle_seconds_threshold', models.PositiveIntegerField(blank=True, default=1800, null=True)),
+                ('idle_ratio_threshold', models.FloatField(blank=True, null=True)),
+                ('screenshot_gap_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('off_hours_start', models.TimeField(blank=True, null=True)),
+                ('off_hours_end', models.TimeField(blank=True, null=True)),
+                ('off_hours_min_seconds', models.PositiveIntegerField(default=900)),
+                ('notes', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-version'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='one_active_flag_rule_set')],
+            },
+        ),
+        migrations.RunPython(stamp_default_rules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contract', '0004_content_addressed_storage'),
+        ('freelancer', '0009_content_addressed_storage'),
+        ('tracking', '0026_flag_rule_sets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyWorkRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('tracked_seconds', models.PositiveIntegerField(default=0)),
+                ('worked_seconds', models.PositiveIntegerField(default=0)),
+                ('idle_seconds', models.PositiveIntegerField(default=0)),
+                ('flagged_seconds', models.PositiveIntegerField(default=0)),
+                ('block_count', models.PositiveIntegerField(default=0)),
+                ('screenshot_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contract', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='contract.contract')),
+                ('freelancer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='freelancer.freelancerprofile')),
+            ],
+            options={
+                'ordering': ['day'],
+                'indexes': [models.Index(fields=['contract', 'day'], name='tracking_da_contrac_e61aa7_idx'), models.Index(fields=['day'], name='tracking_da_day_af899e_idx')],
+                'constraints': [models.UniqueConstraint(fields=('freelancer', 'contract', 'day'), name='one_rollup_per_freelancer_contract_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contract', '0004_content_addressed_storage'),
+        ('tracking', '0027_daily_work_rollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='worksession',
+            name='tracking_wo_user_id_a63eab_idx',
+        ),
+        migrations.AddIndex(
+            model_name='timeblock',
+            index=models.Index(fields=['session', 'started_at'], name='timeblock_session_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timeblock',
+            index=models.Index(condition=models.Q(('is_flagged', True)), fields=['-flagged_at'], name='timeblock_flagged_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(condition=models.Q(('ended_at__isnull', True)), fields=['user', 'paused_at'], name='worksession_running_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['user', '-started_at'], name='worksession_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['-started_at'], name='worksession_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0028_tracking_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='last_sync_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracking', '0029_device_last_sync_seq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='device',
+            name='sync_secret',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
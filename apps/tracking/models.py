@@ -1,9 +1,11 @@
 from datetime import timedelta
 from django.conf import settings
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import F, Q
 from apps.contract.models import Contract
+from apps.cores.storage import get_content_addressed_storage
 from apps.freelancer.models import FreelancerProfile
 
 User = settings.AUTH_USER_MODEL
@@ -23,9 +25,21 @@ class Device(models.Model):
     last_seen_at = models.DateTimeField(null=True, blank=True)
     registered_at = models.DateTimeField(auto_now_add=True)
 
+    # Highest offline-log sequence number synced from this device (replay dedupe)
+    last_sync_seq = models.PositiveBigIntegerField(default=0)
+
+    # Random HMAC key for signed offline syncs, handed out once at pairing
+    sync_secret = models.CharField(max_length=64, blank=True)
+
     class Meta:
         unique_together = ("freelancer", "device_id")
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # is_active is part of the cached lookup
+        from apps.tracking.services.device_registry import invalidate_device
+        invalidate_device(self.freelancer_id, self.device_id)
+
 
 # =====================================================
 # Work Session
@@ -46,34 +60,60 @@ class WorkSession(models.Model):
     ended_at = models.DateTimeField(null=True, blank=True)
     paused_at = models.DateTimeField(null=True, blank=True)
 
+    # --------------------------------------------------
+    # Running totals of CLOSED blocks (maintained by TimeBlock)
+    # --------------------------------------------------
+    closed_seconds = models.PositiveIntegerField(default=0)
+    closed_idle_seconds = models.PositiveIntegerField(default=0)
+    closed_active_seconds = models.PositiveIntegerField(default=0)
+    open_block_started_at = models.DateTimeField(null=True, blank=True)
+
+    # Highest client telemetry sequence number applied (replay dedupe)
+    last_event_seq = models.PositiveBigIntegerField(default=0)
+
+    TOTAL_FIELDS = [
+        "closed_seconds",
+        "closed_idle_seconds",
+        "closed_active_seconds",
+        "open_block_started_at",
+    ]
+
+    class Meta:
+        # Partial indexes only cover running sessions (a handful per user
+        # against a long history). Backends without partial index support
+        # (MySQL) build them as plain composite indexes.
+        indexes = [
+            # Running / running-and-not-paused lookups per user
+            models.Index(
+                fields=["user", "paused_at"],
+                condition=Q(ended_at__isnull=True),
+                name="worksession_running_idx",
+            ),
+            # Freelancer session history, newest first
+            models.Index(fields=["user", "-started_at"], name="worksession_user_recent_idx"),
+            # Admin session list / export, newest first
+            models.Index(fields=["-started_at"], name="worksession_recent_idx"),
+        ]
+
     def __str__(self):
         return f"Session {self.id} – {self.user}"
 
     @property
     def total_seconds(self):
         """Closed blocks only (billing-safe)."""
-        return sum(
-            b.total_seconds
-            for b in self.time_blocks.all()
-            if b.ended_at is not None
-        )
+        return self.closed_seconds
 
     @property
     def live_total_seconds(self):
         """Includes open block (UI only, never billing)."""
-        total = self.total_seconds
-        open_block = self.time_blocks.filter(ended_at__isnull=True).first()
-        if open_block:
-            total += int((timezone.now() - open_block.started_at).total_seconds())
+        total = self.closed_seconds
+        if self.open_block_started_at:
+            total += int((timezone.now() - self.open_block_started_at).total_seconds())
         return total
 
     @property
     def total_idle_seconds(self):
-        return sum(
-            b.idle_seconds
-            for b in self.time_blocks.all()
-            if b.ended_at is not None
-        )
+        return self.closed_idle_seconds
 
 
 # =====================================================
@@ -139,6 +179,9 @@ class TimeBlock(models.Model):
     flag_reason = models.TextField(blank=True)
     flagged_at = models.DateTimeField(null=True, blank=True)
 
+    # FlagRuleSet version that last evaluated this block (0 = built-in defaults)
+    flag_rules_version = models.PositiveIntegerField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
 
     # --------------------------------------------------
@@ -147,6 +190,21 @@ class TimeBlock(models.Model):
     def __str__(self):
         return f"Block {self.id} (Session {self.session_id})"
 
+    def save(self, *args, **kwargs):
+        opening = self._state.adding and self.ended_at is None
+        super().save(*args, **kwargs)
+
+        if opening:
+            WorkSession.objects.filter(pk=self.session_id).update(
+                open_block_started_at=self.started_at
+            )
+            self._refresh_cached_session()
+
+    def _refresh_cached_session(self):
+        # Keep a session instance the caller already holds in sync
+        if TimeBlock.session.is_cached(self):
+            self.session.refresh_from_db(fields=WorkSession.TOTAL_FIELDS)
+
     @property
     def total_seconds(self):
         if not self.ended_at:
@@ -175,27 +233,53 @@ class TimeBlock(models.Model):
     # --------------------------------------------------
     # Close block
     # --------------------------------------------------
-    def close(self, *, reason: str):
-        if self.ended_at:
-            return
+    CLOSE_FIELDS = [
+        "ended_at",
+        "end_reason",
+        "idle_seconds",
+        "active_seconds",
+        "idle_ratio",
+    ]
 
-        self.ended_at = timezone.now()
+    def finish(self, *, reason: str, at=None):
+        """
+        Set the closing fields in memory (no save) and return the
+        duration in seconds. Used by close() and by bulk closers.
+        """
+        self.ended_at = at or timezone.now()
         self.end_reason = reason
 
-        duration = int((self.ended_at - self.started_at).total_seconds())
+        duration = max(0, int((self.ended_at - self.started_at).total_seconds()))
         self.idle_seconds = min(self.idle_seconds, duration)
 
         if duration > 0:
             self.active_seconds = max(0, duration - self.idle_seconds)
             self.idle_ratio = round(self.idle_seconds / duration, 2)
 
-        self.save(update_fields=[
-            "ended_at",
-            "end_reason",
-            "idle_seconds",
-            "active_seconds",
-            "idle_ratio",
-        ])
+        return duration
+
+    def close(self, *, reason: str):
+        if self.ended_at:
+            return
+
+        duration = self.finish(reason=reason)
+        self.save(update_fields=self.CLOSE_FIELDS)
+
+        # Roll the closed block into the session totals
+        WorkSession.objects.filter(pk=self.session_id).update(
+            closed_seconds=F("closed_seconds") + duration,
+            closed_idle_seconds=F("closed_idle_seconds") + self.idle_seconds,
+            closed_active_seconds=F("closed_active_seconds") + self.active_seconds,
+            open_block_started_at=None,
+        )
+        self._refresh_cached_session()
+        self._schedule_rollup_refresh()
+
+    def _schedule_rollup_refresh(self):
+        from apps.tracking.services.work_rollups import schedule_rollup_refresh
+
+        if self.ended_at:
+            schedule_rollup_refresh([self.pk])
 
     # --------------------------------------------------
     # Flag helpers
@@ -214,6 +298,7 @@ class TimeBlock(models.Model):
             "flag_reason",
             "flagged_at",
         ])
+        self._schedule_rollup_refresh()
 
     def admin_flag(self, reason: str):
         """
@@ -229,6 +314,7 @@ class TimeBlock(models.Model):
             "flag_reason",
             "flagged_at",
         ])
+        self._schedule_rollup_refresh()
 
     def admin_deflag(self, reason: str = ""):
         """
@@ -244,21 +330,164 @@ class TimeBlock(models.Model):
             "flag_reason",
             "flagged_at",
         ])
+        self._schedule_rollup_refresh()
 
     # --------------------------------------------------
     # Constraints
     # --------------------------------------------------
     class Meta:
         constraints = [
+            # Also the open-block lookup index: (session, ended_at IS NULL)
             models.UniqueConstraint(
                 fields=["session"],
                 condition=Q(ended_at__isnull=True),
                 name="one_open_block_per_session",
             )
         ]
+        indexes = [
+            # Closed blocks of a session in time order (timeline, export, rollups)
+            models.Index(fields=["session", "started_at"], name="timeblock_session_start_idx"),
+            # Flag review queue, newest flags first
+            models.Index(
+                fields=["-flagged_at"],
+                condition=Q(is_flagged=True),
+                name="timeblock_flagged_idx",
+            ),
+        ]
 
 
 
+# =====================================================
+# Daily Work Rollup
+# =====================================================
+class DailyWorkRollup(models.Model):
+    """
+    Worked time per freelancer, contract and local day (freelancer's
+    timezone), built from closed blocks. Blocks crossing midnight are
+    split between the days; idle / active time is prorated.
+    """
+    freelancer = models.ForeignKey(
+        FreelancerProfile,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+    )
+    contract = models.ForeignKey(
+        Contract,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups",
+    )
+    day = models.DateField()
+
+    tracked_seconds = models.PositiveIntegerField(default=0)
+    worked_seconds = models.PositiveIntegerField(default=0)
+    idle_seconds = models.PositiveIntegerField(default=0)
+    flagged_seconds = models.PositiveIntegerField(default=0)
+    block_count = models.PositiveIntegerField(default=0)
+    screenshot_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["day"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["freelancer", "contract", "day"],
+                name="one_rollup_per_freelancer_contract_day",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["contract", "day"]),
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"Rollup {self.day} – freelancer {self.freelancer_id} / contract {self.contract_id}"
+
+
+# =====================================================
+# Flag Rules (versioned SYSTEM flagging thresholds)
+# =====================================================
+class FlagRuleSet(models.Model):
+    """
+    One immutable version of the SYSTEM flagging rules. Changing a
+    threshold means saving a new version and activating it; blocks keep
+    the version that evaluated them so they can be re-evaluated.
+    A blank threshold disables its rule.
+    """
+    RULE_FIELDS = [
+        "min_block_seconds",
+        "idle_seconds_threshold",
+        "idle_ratio_threshold",
+        "screenshot_gap_seconds",
+        "off_hours_start",
+        "off_hours_end",
+        "off_hours_min_seconds",
+    ]
+
+    version = models.PositiveIntegerField(unique=True, editable=False)
+    is_active = models.BooleanField(default=False)
+
+    # Blocks shorter than this are never flagged
+    min_block_seconds = models.PositiveIntegerField(default=5 * 60)
+
+    idle_seconds_threshold = models.PositiveIntegerField(null=True, blank=True, default=30 * 60)
+    idle_ratio_threshold = models.FloatField(null=True, blank=True)
+
+    # Longest allowed stretch of a block without a screenshot
+    screenshot_gap_seconds = models.PositiveIntegerField(null=True, blank=True)
+
+    # Local time window (freelancer's timezone), may wrap midnight
+    off_hours_start = models.TimeField(null=True, blank=True)
+    off_hours_end = models.TimeField(null=True, blank=True)
+    off_hours_min_seconds = models.PositiveIntegerField(default=15 * 60)
+
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-version"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["is_active"],
+                condition=Q(is_active=True),
+                name="one_active_flag_rule_set",
+            )
+        ]
+
+    def __str__(self):
+        return f"Flag rules v{self.version}"
+
+    @classmethod
+    def defaults(cls):
+        """Built-in rules (version 0) used until a rule set is activated."""
+        return cls(version=0, is_active=True)
+
+    def clean(self):
+        if self.idle_ratio_threshold is not None and not 0 < self.idle_ratio_threshold <= 1:
+            raise ValidationError("Idle ratio threshold must be between 0 and 1.")
+
+        if (self.off_hours_start is None) != (self.off_hours_end is None):
+            raise ValidationError("Off-hours needs both a start and an end.")
+
+        if self.pk:
+            stored = FlagRuleSet.objects.filter(pk=self.pk).values(*self.RULE_FIELDS).first()
+            if stored and any(stored[f] != getattr(self, f) for f in self.RULE_FIELDS):
+                raise ValidationError("Rule sets are immutable, save a new version instead.")
+
+    def save(self, *args, **kwargs):
+        if self.version is None:
+            latest = FlagRuleSet.objects.aggregate(v=models.Max("version"))["v"]
+            self.version = (latest or 0) + 1
+        self.full_clean()
+        super().save(*args, **kwargs)
+
+    def activate(self):
+        with transaction.atomic():
+            FlagRuleSet.objects.filter(is_active=True).exclude(pk=self.pk).update(is_active=False)
+            self.is_active = True
+            self.save(update_fields=["is_active"])
+
+
 # =====================================================
 # Screenshot Window
 # =====================================================
@@ -269,12 +498,23 @@ class ScreenshotWindow(models.Model):
         related_name="windows",
     )
 
+    # floor((start_at - block.started_at) / window length); NULL on legacy rows
+    slot = models.PositiveIntegerField(null=True, blank=True)
+
     start_at = models.DateTimeField()
     end_at = models.DateTimeField()
 
     max_count = models.PositiveSmallIntegerField(default=3)
     used_count = models.PositiveSmallIntegerField(default=0)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["block", "slot"],
+                name="one_window_per_block_slot",
+            )
+        ]
+
     def __str__(self):
         return f"Window {self.id} (Block {self.block_id})"
 
@@ -283,6 +523,12 @@ class ScreenshotWindow(models.Model):
 # Screenshot
 # =====================================================
 class Screenshot(models.Model):
+    PROCESSING_STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("READY", "Ready"),
+        ("FAILED", "Failed"),
+    ]
+
     block = models.ForeignKey(
         TimeBlock,
         on_delete=models.CASCADE,
@@ -294,7 +540,7 @@ class Screenshot(models.Model):
         related_name="screenshots",
     )
 
-    image = models.ImageField(upload_to="screenshots/")
+    image = models.ImageField(upload_to="screenshots/", storage=get_content_addressed_storage)
     taken_at_client = models.DateTimeField()
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
@@ -303,6 +549,34 @@ class Screenshot(models.Model):
     # How much idle increased since previous screenshot
     idle_seconds_delta = models.PositiveIntegerField(default=0)
 
+    # --------------------------------------------------
+    # Derived by the background image pipeline
+    # --------------------------------------------------
+    thumbnail = models.ImageField(upload_to="screenshots/thumbs/", storage=get_content_addressed_storage, null=True, blank=True)
+    preview = models.ImageField(upload_to="screenshots/previews/", storage=get_content_addressed_storage, null=True, blank=True)
+
+    image_bytes = models.PositiveIntegerField(default=0)
+    thumbnail_bytes = models.PositiveIntegerField(default=0)
+    preview_bytes = models.PositiveIntegerField(default=0)
+
+    # 64-bit difference hash (hex) for near-duplicate detection
+    phash = models.CharField(max_length=16, blank=True, db_index=True)
+    is_near_duplicate = models.BooleanField(default=False)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="near_duplicates",
+    )
+
+    processing_status = models.CharField(
+        max_length=10,
+        choices=PROCESSING_STATUS_CHOICES,
+        default="PENDING",
+    )
+    processed_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"Screenshot {self.id} (Block {self.block_id})"
 
@@ -334,6 +608,11 @@ class WorkConsent(models.Model):
             models.Index(fields=["is_active"]),
         ]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        from apps.tracking.services.tracking_consent import invalidate_consent
+        invalidate_consent(self.freelancer_id, self.contract_id)
+
     def revoke(self):
         if not self.is_active:
             return
@@ -372,10 +651,38 @@ class ActivityLog(models.Model):
     action = models.CharField(max_length=50, choices=ACTION_CHOICES)
     metadata = models.JSONField(default=dict)
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Event time, set when the action happened (rows are written later in bulk)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["freelancer", "-created_at"]),
+            models.Index(fields=["session", "created_at"]),
+            models.Index(fields=["-created_at"]),
+        ]
+
+
+class ActivityLogSegment(models.Model):
+    """
+    A compacted month of ActivityLog rows (gzipped NDJSON), moved out of
+    the hot table by the compaction job. A month can have several
+    segments when late rows arrive after it was first compacted.
+    """
+    month = models.DateField(db_index=True)
+    archive = models.FileField(upload_to="activity_logs/")
+
+    row_count = models.PositiveIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["month", "id"]
+
+    def __str__(self):
+        return f"Activity segment {self.month:%Y-%m} ({self.row_count} rows)"
 
 
 
@@ -1,13 +1,16 @@
 from rest_framework import serializers
+from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
-from datetime import timedelta
 from django.db import transaction
+from django.db.models import F
+from django.core.exceptions import ValidationError as DjangoValidationError
 from apps.tracking.services.activity_logger import log_activity
 
 from apps.billing.services import create_billing_unit_for_session
 from apps.tracking.models import (
     ActivityLog,
     Device,
+    FlagRuleSet,
     Screenshot,
     TimeBlock,
     TimeBlockExplanation,
@@ -16,6 +19,31 @@ from apps.tracking.models import (
     WorkConsent,
 )
 from apps.tracking.services.timeblock_flagger import evaluate_timeblock_flag
+from apps.tracking.services.screenshot_window import ScreenshotQuotaExceeded, claim_screenshot_slot
+from apps.tracking.tasks import process_screenshot_task
+from apps.tracking.services.device_registry import registered_device, touch_device
+from apps.tracking.services.live_feed import publish_block_closed, publish_session
+from apps.tracking.services.heartbeat import forget_heartbeats_on_commit, record_heartbeat_on_commit
+from apps.tracking.services.screenshot_batch import parse_manifest, store_screenshot_batch
+from apps.tracking.services.offline_sync import (
+    MAX_SYNC_EVENTS,
+    SyncRejected,
+    device_sync_secret,
+    sync_offline_log,
+    verify_signature,
+)
+from apps.tracking.services.tracking_consent import resolve_consent
+from apps.tracking.services.telemetry import MAX_BATCH_EVENTS, TelemetryRejected, ingest_telemetry
+from apps.tracking.services.tracking_state import (
+    build_state,
+    get_tracking_state,
+    load_tracking_state,
+    publish_tracking_state,
+    remember_window,
+    state_block,
+    state_freelancer,
+    state_session,
+)
 
 
 # =====================================================
@@ -42,6 +70,22 @@ class WorkSessionStartSerializer(serializers.Serializer):
     contract_id = serializers.IntegerField()
     device_id = serializers.CharField(max_length=128)
 
+    def validate_contract_id(self, value):
+        # Cached per (user, contract); no queries on the hot path
+        consent = resolve_consent(self.context["request"].user.id, value)
+        if not consent["allowed"]:
+            raise serializers.ValidationError(consent["reason"])
+        return value
+
+    def validate_device_id(self, value):
+        # Served from the device lookup cache once the tracker has checked in
+        device = registered_device(self.context["request"].user.id, value)
+        if device is None:
+            raise serializers.ValidationError("Device is not registered")
+        if not device["is_active"]:
+            raise serializers.ValidationError("Device has been deactivated")
+        return value
+
     def create(self, validated_data):
         user = self.context["request"].user
         freelancer = user.freelancer_profile
@@ -53,7 +97,11 @@ class WorkSessionStartSerializer(serializers.Serializer):
                 device_id=validated_data["device_id"],
             )
 
-            TimeBlock.objects.create(session=session)
+            block = TimeBlock.objects.create(session=session)
+            publish_tracking_state(user.id, build_state(session, block))
+            record_heartbeat_on_commit(session.id)
+            touch_device(user.id, session.device_id)
+            publish_session(session)
 
             log_activity(
                 freelancer_profile=freelancer,
@@ -102,6 +150,9 @@ class WorkSessionPauseSerializer(serializers.Serializer):
 
             session.paused_at = timezone.now()
             session.save(update_fields=["paused_at"])
+            publish_tracking_state(session.user_id, build_state(session))
+            publish_block_closed(block, session.contract_id)
+            publish_session(session)
 
             log_activity(
                 freelancer_profile=session.user.freelancer_profile,
@@ -133,13 +184,17 @@ class WorkSessionResumeSerializer(serializers.Serializer):
             if not session.paused_at:
                 raise serializers.ValidationError("Session is not paused")
 
-            if session.time_blocks.filter(ended_at__isnull=True).exists():
+            # Maintained by TimeBlock, read off the locked row
+            if session.open_block_started_at:
                 raise serializers.ValidationError("Active block already exists")
 
             session.paused_at = None
             session.save(update_fields=["paused_at"])
 
             block = TimeBlock.objects.create(session=session)
+            publish_tracking_state(session.user_id, build_state(session, block))
+            record_heartbeat_on_commit(session.id)
+            publish_session(session)
 
             log_activity(
                 freelancer_profile=session.user.freelancer_profile,
@@ -176,10 +231,14 @@ class WorkSessionStopSerializer(serializers.Serializer):
 
                 block.close(reason="STOP")
                 evaluate_timeblock_flag(block)
+                publish_block_closed(block, session.contract_id)
 
             session.ended_at = timezone.now()
             session.paused_at = None
             session.save(update_fields=["ended_at", "paused_at"])
+            publish_tracking_state(session.user_id, None)
+            publish_session(session)
+            forget_heartbeats_on_commit([session.id])
 
             # Create billing unit
             billing_unit = create_billing_unit_for_session(session)
@@ -208,58 +267,54 @@ class ScreenshotUploadSerializer(serializers.ModelSerializer):
             "image",
             "taken_at_client",
             "resolution",
+            "idle_seconds_delta",
         ]
 
     def create(self, validated_data):
         user = self.context["request"].user
 
-        session = (
-            WorkSession.objects.filter(
-                user=user,
-                ended_at__isnull=True,
-                paused_at__isnull=True,
-            )
-            .order_by("-started_at")
-            .first()
-        )
-
-        if not session:
-            raise serializers.ValidationError("No active session")
-
-        block = session.time_blocks.filter(ended_at__isnull=True).first()
-        if not block:
-            raise serializers.ValidationError("No active time block")
-
-        now = timezone.now()
-
-        window = (
-            block.windows.filter(end_at__gt=now)
-            .order_by("-start_at")
-            .first()
-        )
-
-        if not window:
-            window = ScreenshotWindow.objects.create(
-                block=block,
-                start_at=now,
-                end_at=now + timedelta(minutes=10),
-            )
-
-        if window.used_count >= window.max_count:
-            raise serializers.ValidationError("Screenshot limit reached")
+        # Block / window come from the tracking state cache. A stale
+        # entry fails the guarded slot claim; reload from the DB once.
+        state = get_tracking_state(user.id)
+        for attempt in range(2):
+            if not state or state["paused"]:
+                raise serializers.ValidationError("No active session")
+
+            try:
+                return self._store(user, state, validated_data)
+            except ScreenshotQuotaExceeded as exc:
+                fresh = load_tracking_state(user.id)
+                if attempt or (fresh and fresh["block_id"] == state["block_id"]):
+                    raise serializers.ValidationError(str(exc))
+                state = fresh
+
+    def _store(self, user, state, validated_data):
+        consent = resolve_consent(user.id, state["contract_id"])
+        if not consent["allowed"]:
+            raise serializers.ValidationError(consent["reason"])
+
+        block = state_block(state)
+        session = state_session(state)
 
         with transaction.atomic():
+            window = claim_screenshot_slot(block, window_id=state["window_id"])
+            remember_window(state, window)
+
             screenshot = Screenshot.objects.create(
                 block=block,
                 window=window,
+                image_bytes=validated_data["image"].size,
                 **validated_data,
             )
 
-            window.used_count += 1
-            window.save(update_fields=["used_count"])
+            # Thumbnails / hashing happen off the request path
+            transaction.on_commit(
+                lambda: process_screenshot_task.delay(screenshot.id),
+                robust=True,
+            )
 
             log_activity(
-                freelancer_profile=user.freelancer_profile,
+                freelancer_profile=state_freelancer(state),
                 action="SCREENSHOT",
                 session=session,
                 metadata={
@@ -272,6 +327,46 @@ class ScreenshotUploadSerializer(serializers.ModelSerializer):
         return screenshot
 
 
+class ScreenshotBatchSerializer(serializers.Serializer):
+    """
+    Several screenshots in one multipart request. `manifest` is a JSON
+    array of positional rows (see parse_manifest) naming each image's
+    file part; `resolution` applies to the whole batch.
+    """
+    manifest = serializers.JSONField()
+    resolution = serializers.CharField(max_length=32, required=False, default="full")
+
+    def validate_manifest(self, value):
+        try:
+            return parse_manifest(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(str(exc))
+
+    def validate(self, attrs):
+        files = self.context["files"]
+        missing = [item["part"] for item in attrs["manifest"] if item["part"] not in files]
+        if missing:
+            raise serializers.ValidationError({"manifest": f"Missing file parts: {', '.join(missing)}"})
+
+        # A broken image only rejects its own item
+        image_field = serializers.ImageField()
+        for item in attrs["manifest"]:
+            try:
+                image_field.run_validation(files[item["part"]])
+            except (serializers.ValidationError, DjangoValidationError) as exc:
+                detail = exc.detail if isinstance(exc, serializers.ValidationError) else exc.messages
+                item["error"] = str(detail[0])
+        return attrs
+
+    def create(self, validated_data):
+        return store_screenshot_batch(
+            user=self.context["request"].user,
+            items=validated_data["manifest"],
+            files=self.context["files"],
+            resolution=validated_data["resolution"],
+        )
+
+
 # =====================================================
 # Idle Flush
 # =====================================================
@@ -280,6 +375,31 @@ class IdleFlushSerializer(serializers.Serializer):
     idle_seconds = serializers.IntegerField(min_value=1)
 
     def create(self, validated_data):
+        user = self.context["request"].user
+        state = get_tracking_state(user.id)
+
+        if state and state["session_id"] == validated_data["session_id"] and state["block_id"]:
+            with transaction.atomic():
+                # Guarded on the block still being open, so a stale cache
+                # entry just falls through to the locked path below
+                applied = TimeBlock.objects.filter(
+                    pk=state["block_id"],
+                    session_id=state["session_id"],
+                    ended_at__isnull=True,
+                ).update(idle_seconds=F("idle_seconds") + validated_data["idle_seconds"])
+
+                if applied:
+                    log_activity(
+                        freelancer_profile=state_freelancer(state),
+                        action="IDLE",
+                        session=state_session(state),
+                        metadata={
+                            "idle_seconds": validated_data["idle_seconds"],
+                            "block_id": state["block_id"],
+                        },
+                    )
+                    return state_block(state)
+
         with transaction.atomic():
             session = WorkSession.objects.select_for_update().get(
                 id=validated_data["session_id"],
@@ -305,6 +425,95 @@ class IdleFlushSerializer(serializers.Serializer):
 
         return block
 
+# =====================================================
+# Batched Telemetry (idle / heartbeat)
+# =====================================================
+class TelemetryEventSerializer(serializers.Serializer):
+    seq = serializers.IntegerField(min_value=1)
+    type = serializers.ChoiceField(choices=["IDLE", "HEARTBEAT"])
+    idle_seconds = serializers.IntegerField(min_value=0, required=False, default=0)
+
+
+class TelemetryBatchSerializer(serializers.Serializer):
+    session_id = serializers.IntegerField()
+    events = TelemetryEventSerializer(many=True, allow_empty=False)
+
+    def validate_events(self, value):
+        if len(value) > MAX_BATCH_EVENTS:
+            raise serializers.ValidationError(
+                f"At most {MAX_BATCH_EVENTS} events per batch."
+            )
+        return value
+
+    def create(self, validated_data):
+        try:
+            return ingest_telemetry(
+                user=self.context["request"].user,
+                session_id=validated_data["session_id"],
+                events=validated_data["events"],
+            )
+        except TelemetryRejected as exc:
+            raise serializers.ValidationError(str(exc))
+
+
+# =====================================================
+# Offline Sync
+# =====================================================
+class OfflineSyncEventSerializer(serializers.Serializer):
+    seq = serializers.IntegerField(min_value=1)
+    type = serializers.ChoiceField(choices=["BLOCK_START", "BLOCK_END", "IDLE", "SCREENSHOT"])
+    at = serializers.DateTimeField()
+    reason = serializers.ChoiceField(choices=TimeBlock.END_REASON_CHOICES, required=False)
+    idle_seconds = serializers.IntegerField(min_value=0, required=False, default=0)
+    ref = serializers.CharField(max_length=64, required=False)
+
+    def validate(self, attrs):
+        if attrs["type"] == "BLOCK_END" and not attrs.get("reason"):
+            raise serializers.ValidationError("BLOCK_END needs a reason.")
+        return attrs
+
+
+class OfflineSyncSerializer(serializers.Serializer):
+    """
+    Signed, ordered log of tracking events recorded while offline. The
+    X-Tracker-Signature header is the hex HMAC-SHA256 of the raw body
+    under the device's sync secret (returned when the device is first
+    registered or re-paired).
+    """
+    device_id = serializers.CharField(max_length=128)
+    contract_id = serializers.IntegerField()
+    events = OfflineSyncEventSerializer(many=True, allow_empty=False)
+
+    def validate_events(self, value):
+        if len(value) > MAX_SYNC_EVENTS:
+            raise serializers.ValidationError(
+                f"At most {MAX_SYNC_EVENTS} events per sync."
+            )
+        seqs = [e["seq"] for e in value]
+        if any(later <= earlier for earlier, later in zip(seqs, seqs[1:])):
+            raise serializers.ValidationError("Events must be in increasing seq order.")
+        return value
+
+    def validate(self, attrs):
+        request = self.context["request"]
+        if not verify_signature(
+            device_sync_secret(request.user.id, attrs["device_id"]),
+            self.context["body"],
+            request.headers.get("X-Tracker-Signature"),
+        ):
+            raise PermissionDenied("Invalid sync signature")
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return sync_offline_log(
+                user=self.context["request"].user,
+                **validated_data,
+            )
+        except SyncRejected as exc:
+            raise serializers.ValidationError(str(exc))
+
+
 # =====================================================
 # Read serializers
 # =====================================================
@@ -337,16 +546,45 @@ class TimeBlockSerializer(serializers.ModelSerializer):
 
 
 class FreelancerScreenshotSerializer(serializers.ModelSerializer):
+    """
+    `image` is the WebP thumbnail by default (the original until the
+    pipeline has processed it). Pass `full_resolution=True` in the
+    context to get originals.
+    """
+    image = serializers.SerializerMethodField()
+    preview = serializers.SerializerMethodField()
+    original = serializers.SerializerMethodField()
+
     class Meta:
         model = Screenshot
         fields = [
             "id",
             "image",
+            "preview",
+            "original",
             "taken_at_client",
             "uploaded_at",
             "resolution",
+            "is_near_duplicate",
+            "image_bytes",
+            "thumbnail_bytes",
+            "processing_status",
         ]
 
+    def _url(self, field):
+        return field.url if field else None
+
+    def get_image(self, obj):
+        if self.context.get("full_resolution") or not obj.thumbnail:
+            return self._url(obj.image)
+        return self._url(obj.thumbnail)
+
+    def get_preview(self, obj):
+        return self._url(obj.preview) or self._url(obj.image)
+
+    def get_original(self, obj):
+        return self._url(obj.image)
+
 
 class ScreenshotWindowDetailSerializer(serializers.ModelSerializer):
     screenshots = FreelancerScreenshotSerializer(many=True, read_only=True)
@@ -401,6 +639,33 @@ class FreelancerSessionListSerializer(serializers.ModelSerializer):
 
 
 
+class AdminWorkSessionSummarySerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source="user.username", read_only=True)
+    is_running = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WorkSession
+        fields = [
+            "id",
+            "user_id",
+            "username",
+            "contract_id",
+            "device_id",
+            "started_at",
+            "ended_at",
+            "paused_at",
+            "is_running",
+            "closed_seconds",
+            "closed_idle_seconds",
+            "closed_active_seconds",
+        ]
+        read_only_fields = fields
+
+    def get_is_running(self, obj):
+        return obj.ended_at is None
+
+
+
 class TimeBlockExplanationCreateSerializer(serializers.ModelSerializer):
     block_id = serializers.IntegerField(write_only=True)
 
@@ -473,6 +738,27 @@ class TimeBlockExplanationReviewSerializer(serializers.Serializer):
 
 
 
+class FlagRuleSetSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = FlagRuleSet
+        fields = [
+            "id",
+            "version",
+            "is_active",
+            *FlagRuleSet.RULE_FIELDS,
+            "notes",
+            "created_at",
+        ]
+        read_only_fields = ["id", "version", "is_active", "created_at"]
+
+    def validate(self, attrs):
+        try:
+            FlagRuleSet(**attrs).clean()
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError(exc.messages)
+        return attrs
+
+
 class TimeBlockFlagUpdateSerializer(serializers.Serializer):
     is_flagged = serializers.BooleanField()
     flag_reason = serializers.CharField(
@@ -0,0 +1,134 @@
+import gzip
+import json
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from apps.tracking.models import ActivityLog, ActivityLogSegment
+
+
+ROW_FIELDS = ["id", "freelancer_id", "session_id", "action", "metadata", "created_at"]
+DELETE_CHUNK = 1000
+
+
+def month_start(dt):
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(dt, months):
+    years, month_index = divmod(dt.month - 1 + months, 12)
+    return dt.replace(year=dt.year + years, month=month_index + 1)
+
+
+# =====================================================
+# Compaction
+# =====================================================
+def compact_activity_logs(*, hot_months=None, retention_months=None, dry_run=False):
+    """
+    Move every full month older than the hot window out of the
+    ActivityLog table into gzipped NDJSON segments, then drop segments
+    past retention. Keeps the hot table (and the admin log queries on
+    it) bounded no matter how much history accumulates.
+    """
+    hot_months = hot_months or settings.ACTIVITY_LOG_HOT_MONTHS
+    retention_months = retention_months or settings.ACTIVITY_LOG_RETENTION_MONTHS
+
+    current_month = month_start(timezone.now())
+    hot_cutoff = add_months(current_month, -hot_months)
+    retention_cutoff = add_months(current_month, -retention_months)
+
+    summary = {"compacted": [], "expired": []}
+
+    oldest = (
+        ActivityLog.objects
+        .filter(created_at__lt=hot_cutoff)
+        .order_by("created_at")
+        .values_list("created_at", flat=True)
+        .first()
+    )
+
+    month = month_start(oldest) if oldest else hot_cutoff
+    while month < hot_cutoff:
+        next_month = add_months(month, 1)
+        rows = ActivityLog.objects.filter(created_at__gte=month, created_at__lt=next_month)
+
+        if month < retention_cutoff:
+            # Already past retention: drop instead of archiving
+            count = rows.count() if dry_run else rows.delete()[0]
+            bucket = "expired"
+        else:
+            count = rows.count() if dry_run else _compact_month(month, rows)
+            bucket = "compacted"
+
+        if count:
+            summary[bucket].append((month.date(), count))
+        month = next_month
+
+    expired = ActivityLogSegment.objects.filter(month__lt=retention_cutoff.date())
+    for segment in expired:
+        summary["expired"].append((segment.month, segment.row_count))
+        if not dry_run:
+            segment.archive.delete(save=False)
+            segment.delete()
+
+    return summary
+
+
+def _compact_month(month, rows):
+    ids = []
+    first = last = None
+
+    with tempfile.TemporaryFile() as tmp:
+        with gzip.GzipFile(fileobj=tmp, mode="wb") as gz:
+            for row in rows.order_by("created_at", "id").values(*ROW_FIELDS).iterator(chunk_size=2000):
+                ids.append(row["id"])
+                first = first or row["created_at"]
+                last = row["created_at"]
+                row["created_at"] = row["created_at"].isoformat()
+                gz.write(json.dumps(row).encode() + b"\n")
+
+        if not ids:
+            return 0
+
+        tmp.seek(0)
+        segment = ActivityLogSegment(
+            month=month.date(),
+            row_count=len(ids),
+            first_created_at=first,
+            last_created_at=last,
+        )
+        segment.archive.save(
+            f"{month:%Y-%m}-{timezone.now():%Y%m%d%H%M%S}.ndjson.gz",
+            File(tmp),
+            save=False,
+        )
+
+    try:
+        with transaction.atomic():
+            segment.save()
+            for i in range(0, len(ids), DELETE_CHUNK):
+                ActivityLog.objects.filter(pk__in=ids[i:i + DELETE_CHUNK]).delete()
+    except Exception:
+        segment.archive.delete(save=False)
+        raise
+
+    return len(ids)
+
+
+# =====================================================
+# Reading archived rows
+# =====================================================
+def iter_segment_rows(segment):
+    with segment.archive.open("rb") as fh, gzip.GzipFile(fileobj=fh) as gz:
+        for line in gz:
+            yield json.loads(line)
+
+
+def segments_between(start, end):
+    return ActivityLogSegment.objects.filter(
+        last_created_at__gte=start,
+        first_created_at__lte=end,
+    )
@@ -1,9 +1,202 @@
+import json
+import logging
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
 from apps.tracking.models import ActivityLog
 
+
+ACTIVITY_BUFFER_KEY = "tracking:activity_log:buffer"
+ACTIVITY_DEAD_KEY = "tracking:activity_log:dead"
+
+# Errors the database raises for the entry itself (an FK to a deleted
+# session, a value that does not fit); retrying them would fail every
+# later flush too. Anything else is treated as transient.
+POISON_ERRORS = (IntegrityError, DataError)
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# Public API (write-behind)
+# =====================================================
 def log_activity(freelancer_profile, action, session=None, metadata=None):
-    ActivityLog.objects.create(
-        freelancer=freelancer_profile,
-        session=session,
-        action=action,
-        metadata=metadata or {},
-    )
+    log_activities([{
+        "freelancer_profile": freelancer_profile,
+        "action": action,
+        "session": session,
+        "metadata": metadata,
+    }])
+
+
+def log_activities(entries):
+    """
+    Queue activity entries for a background bulk insert.
+
+    The timestamp is taken now (inside the caller's transaction), unless
+    the entry carries its own "at" (replayed offline events), but the
+    entries are only buffered once that transaction commits, so a
+    rolled-back action never leaves a log row and tracking transactions
+    only touch session / block rows. Timestamps are stored as UTC ISO
+    strings so the flush can order them as plain strings.
+    """
+    now = timezone.now().astimezone(dt_timezone.utc).isoformat()
+    payload = [
+        {
+            "freelancer_id": entry["freelancer_profile"].pk,
+            "session_id": entry["session"].pk if entry.get("session") else None,
+            "action": entry["action"],
+            "metadata": entry.get("metadata") or {},
+            "created_at": entry["at"].astimezone(dt_timezone.utc).isoformat() if entry.get("at") else now,
+        }
+        for entry in entries
+    ]
+    if payload:
+        transaction.on_commit(lambda: get_activity_buffer().push(payload), robust=True)
+
+
+def flush_activity_logs(limit=None):
+    """
+    Drain the buffer into ActivityLog with bulk inserts.
+    Returns the number of rows written.
+    """
+    return get_activity_buffer().flush(limit or settings.ACTIVITY_LOG_FLUSH_BATCH)
+
+
+# =====================================================
+# Buffers
+# =====================================================
+def _write(entries):
+    # Stable sort keeps per-session order even if two web workers pushed
+    # their (already committed) entries out of order.
+    entries = sorted(entries, key=lambda e: e["created_at"])
+    ActivityLog.objects.bulk_create([
+        ActivityLog(
+            freelancer_id=e["freelancer_id"],
+            session_id=e["session_id"],
+            action=e["action"],
+            metadata=e["metadata"],
+            created_at=datetime.fromisoformat(e["created_at"]),
+        )
+        for e in entries
+    ])
+    return len(entries)
+
+
+def _write_batch(entries, *, requeue, dead_letter):
+    """
+    Bulk insert `entries`. If an entry is rejected, fall back to one
+    row at a time and hand the rejected ones to `dead_letter`, so a
+    single bad entry cannot block the buffer. Other errors (database
+    down) give the unwritten entries back to `requeue` and re-raise.
+    """
+    try:
+        return _write(entries)
+    except POISON_ERRORS:
+        pass
+    except Exception:
+        requeue(entries)
+        raise
+
+    written = 0
+    for i, entry in enumerate(entries):
+        try:
+            # Deferred FK checks fail on commit, i.e. leaving the block
+            with transaction.atomic():
+                _write([entry])
+        except POISON_ERRORS as exc:
+            logger.warning("Dead-lettering activity log entry %s: %r", entry, exc)
+            dead_letter({**entry, "error": repr(exc)})
+        except Exception:
+            requeue(entries[i:])
+            raise
+        else:
+            written += 1
+    return written
+
+
+class ActivityBuffer:
+    def push(self, entries):
+        raise NotImplementedError
+
+    def flush(self, limit):
+        raise NotImplementedError
+
+
+class RedisActivityBuffer(ActivityBuffer):
+    """
+    FIFO Redis list shared by all web workers, drained by the
+    `flush_activity_logs` Celery task. Entries the database rejects
+    are moved to the ACTIVITY_DEAD_KEY list.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection("default")
+
+    def push(self, entries):
+        self.redis.rpush(ACTIVITY_BUFFER_KEY, *[json.dumps(e) for e in entries])
+
+    def flush(self, limit):
+        written = 0
+        while True:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.lrange(ACTIVITY_BUFFER_KEY, 0, limit - 1)
+            pipe.ltrim(ACTIVITY_BUFFER_KEY, limit, -1)
+            raw, _ = pipe.execute()
+            if not raw:
+                return written
+
+            written += _write_batch(
+                [json.loads(item) for item in raw],
+                requeue=self._requeue,
+                dead_letter=lambda entry: self.redis.rpush(ACTIVITY_DEAD_KEY, json.dumps(entry)),
+            )
+
+            if len(raw) < limit:
+                return written
+
+    def _requeue(self, entries):
+        # Back at the head, in their original order
+        self.redis.lpush(ACTIVITY_BUFFER_KEY, *[json.dumps(e) for e in reversed(entries)])
+
+
+class LocalActivityBuffer(ActivityBuffer):
+    """
+    In-process queue for development / single-process setups.
+    Flushes right after the pushing transaction commits.
+    """
+
+    def __init__(self):
+        self.queue = deque()
+        self.dead = []
+
+    def push(self, entries):
+        self.queue.extend(entries)
+        self.flush(settings.ACTIVITY_LOG_FLUSH_BATCH)
+
+    def flush(self, limit):
+        written = 0
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(limit, len(self.queue)))]
+            written += _write_batch(
+                batch,
+                requeue=lambda entries: self.queue.extendleft(reversed(entries)),
+                dead_letter=self.dead.append,
+            )
+        return written
+
+
+_buffer = None
+
+
+def get_activity_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = import_string(settings.ACTIVITY_LOG_BUFFER)()
+    return _buffer
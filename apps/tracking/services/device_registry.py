@@ -0,0 +1,161 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.tracking.models import Device
+
+
+LAST_SEEN_KEY = "tracking:device:last_seen"
+
+
+def _device_key(user_id, device_id):
+    # device_id is client supplied (up to 255 chars), keep the key bounded
+    digest = hashlib.sha1(device_id.encode()).hexdigest()
+    return f"tracking:device:{user_id}:{digest}"
+
+
+def _entry(device):
+    return {"id": device.pk, "is_active": device.is_active}
+
+
+# =====================================================
+# Lookups (cached per user + device_id)
+# =====================================================
+def get_or_register_device(user, device_id, defaults):
+    """
+    ({"id", "is_active"}, created) for the user's device, registering it
+    on first sight. Repeat tracker starts are a cache hit.
+    """
+    key = _device_key(user.pk, device_id)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry, False
+
+    device, created = Device.objects.get_or_create(
+        freelancer=user,
+        device_id=device_id,
+        defaults=defaults,
+    )
+    entry = _entry(device)
+    transaction.on_commit(lambda: cache.set(key, entry, settings.DEVICE_CACHE_SECONDS), robust=True)
+    return entry, created
+
+
+def registered_device(user_id, device_id):
+    """Cached entry for a registered device, or None if unknown."""
+    key = _device_key(user_id, device_id)
+    entry = cache.get(key)
+    if entry is None:
+        device = Device.objects.filter(freelancer_id=user_id, device_id=device_id).first()
+        if device is None:
+            return None
+        entry = _entry(device)
+        cache.set(key, entry, settings.DEVICE_CACHE_SECONDS)
+    return entry
+
+
+def invalidate_device(user_id, device_id):
+    key = _device_key(user_id, device_id)
+    transaction.on_commit(lambda: cache.delete(key), robust=True)
+
+
+# =====================================================
+# last_seen_at (coalesced, flushed in bulk)
+# =====================================================
+def touch_device(user_id, device_id, at=None):
+    """Record a sighting. Only the latest per device survives until flush."""
+    get_device_seen_buffer().touch(f"{user_id}:{device_id}", at or time.time())
+
+
+def flush_device_last_seen():
+    """
+    Write the buffered sightings to Device.last_seen_at with one
+    bulk_update. Returns the number of devices updated.
+    """
+    seen = get_device_seen_buffer().drain()
+    if not seen:
+        return 0
+
+    pairs = {}
+    for field, at in seen.items():
+        user_id, _, device_id = field.partition(":")
+        pairs[(int(user_id), device_id)] = at
+
+    # Resolve pks from the lookup cache, hitting the DB only for misses
+    keys = {_device_key(*pair): pair for pair in pairs}
+    cached = cache.get_many(list(keys))
+    by_pk = {cached[key]["id"]: pairs[pair] for key, pair in keys.items() if key in cached}
+
+    for pair, at in pairs.items():
+        if _device_key(*pair) not in cached:
+            entry = registered_device(*pair)
+            if entry:
+                by_pk[entry["id"]] = at
+
+    devices = list(Device.objects.filter(pk__in=list(by_pk)).only("id", "last_seen_at"))
+    for device in devices:
+        seen_at = datetime.fromtimestamp(by_pk[device.pk], tz=dt_timezone.utc)
+        if device.last_seen_at is None or seen_at > device.last_seen_at:
+            device.last_seen_at = seen_at
+
+    Device.objects.bulk_update(devices, ["last_seen_at"], batch_size=500)
+    return len(devices)
+
+
+class DeviceSeenBuffer:
+    def touch(self, field, at):
+        raise NotImplementedError
+
+    def drain(self):
+        """{"user_id:device_id": timestamp} accumulated since the last drain."""
+        raise NotImplementedError
+
+
+class RedisDeviceSeenBuffer(DeviceSeenBuffer):
+    """
+    One Redis hash, field per device, so N heartbeats from a device
+    between flushes cost N HSETs in Redis and one row update in the DB.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection("default")
+
+    def touch(self, field, at):
+        self.redis.hset(LAST_SEEN_KEY, field, at)
+
+    def drain(self):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hgetall(LAST_SEEN_KEY)
+        pipe.delete(LAST_SEEN_KEY)
+        raw, _ = pipe.execute()
+        return {field.decode(): float(at) for field, at in raw.items()}
+
+
+class LocalDeviceSeenBuffer(DeviceSeenBuffer):
+    """In-process buffer for development / single-process setups."""
+
+    def __init__(self):
+        self.seen = {}
+
+    def touch(self, field, at):
+        self.seen[field] = at
+
+    def drain(self):
+        seen, self.seen = self.seen, {}
+        return seen
+
+
+_buffer = None
+
+
+def get_device_seen_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = import_string(settings.DEVICE_LAST_SEEN_BUFFER)()
+    return _buffer
@@ -0,0 +1,110 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+HEARTBEAT_KEY = "tracking:heartbeats"
+
+
+# =====================================================
+# Public API
+# =====================================================
+def record_heartbeat(session_id, at=None):
+    get_heartbeat_store().beat([session_id], at or time.time())
+
+
+def record_heartbeat_on_commit(session_id):
+    """For session ids created or reopened inside the current transaction."""
+    transaction.on_commit(lambda: record_heartbeat(session_id), robust=True)
+
+
+def forget_heartbeats_on_commit(session_ids):
+    session_ids = list(session_ids)
+    if session_ids:
+        transaction.on_commit(lambda: get_heartbeat_store().forget(session_ids), robust=True)
+
+
+# =====================================================
+# Stores
+# =====================================================
+class HeartbeatStore:
+    """Last heartbeat (unix seconds) per running session."""
+
+    def beat(self, session_ids, at, only_new=False):
+        raise NotImplementedError
+
+    def last_beats(self, session_ids):
+        """{session_id: timestamp or None}"""
+        raise NotImplementedError
+
+    def expired(self, cutoff, limit):
+        """[(session_id, timestamp)] with the last beat at or before `cutoff`, oldest first."""
+        raise NotImplementedError
+
+    def forget(self, session_ids):
+        raise NotImplementedError
+
+
+class RedisHeartbeatStore(HeartbeatStore):
+    """
+    One sorted set (member = session id, score = last beat), so a beat
+    is a single ZADD and the reaper finds expired sessions with one
+    range query instead of scanning sessions.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection("default")
+
+    def beat(self, session_ids, at, only_new=False):
+        if session_ids:
+            self.redis.zadd(HEARTBEAT_KEY, {str(sid): at for sid in session_ids}, nx=only_new)
+
+    def last_beats(self, session_ids):
+        pipe = self.redis.pipeline(transaction=False)
+        for sid in session_ids:
+            pipe.zscore(HEARTBEAT_KEY, str(sid))
+        return dict(zip(session_ids, pipe.execute()))
+
+    def expired(self, cutoff, limit):
+        rows = self.redis.zrangebyscore(HEARTBEAT_KEY, "-inf", cutoff, start=0, num=limit, withscores=True)
+        return [(int(member), score) for member, score in rows]
+
+    def forget(self, session_ids):
+        if session_ids:
+            self.redis.zrem(HEARTBEAT_KEY, *[str(sid) for sid in session_ids])
+
+
+class LocalHeartbeatStore(HeartbeatStore):
+    """In-process store for development / single-process setups."""
+
+    def __init__(self):
+        self.beats = {}
+
+    def beat(self, session_ids, at, only_new=False):
+        for sid in session_ids:
+            if not (only_new and sid in self.beats):
+                self.beats[sid] = at
+
+    def last_beats(self, session_ids):
+        return {sid: self.beats.get(sid) for sid in session_ids}
+
+    def expired(self, cutoff, limit):
+        rows = sorted((at, sid) for sid, at in self.beats.items() if at <= cutoff)
+        return [(sid, at) for at, sid in rows[:limit]]
+
+    def forget(self, session_ids):
+        for sid in session_ids:
+            self.beats.pop(sid, None)
+
+
+_store = None
+
+
+def get_heartbeat_store():
+    global _store
+    if _store is None:
+        _store = import_string(settings.TRACKING_HEARTBEAT_STORE)()
+    return _store
@@ -0,0 +1,202 @@
+import json
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+LIVE_DIRTY_KEY = "tracking:live:dirty"
+
+
+def _pending_key(contract_id):
+    return f"tracking:live:{contract_id}"
+
+
+def contract_group(contract_id):
+    return f"tracking_contract_{contract_id}"
+
+
+# =====================================================
+# Events
+# =====================================================
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def session_status(session):
+    if session.ended_at:
+        return "stopped"
+    return "paused" if session.paused_at else "running"
+
+
+def session_event(session):
+    """Current state of a session (also the connect snapshot rows)."""
+    return {
+        "event": "session",
+        "status": session_status(session),
+        "session_id": session.pk,
+        "contract_id": session.contract_id,
+        "started_at": _iso(session.started_at),
+        "paused_at": _iso(session.paused_at),
+        "ended_at": _iso(session.ended_at),
+        "total_seconds": session.closed_seconds,
+        "open_block_started_at": _iso(session.open_block_started_at),
+    }
+
+
+def block_closed_event(block):
+    return {
+        "event": "block_closed",
+        "block_id": block.pk,
+        "session_id": block.session_id,
+        "started_at": _iso(block.started_at),
+        "ended_at": _iso(block.ended_at),
+        "duration_seconds": block.total_seconds,
+        "idle_seconds": block.idle_seconds,
+        "active_seconds": block.active_seconds,
+        "end_reason": block.end_reason,
+        "is_flagged": block.is_flagged,
+    }
+
+
+def screenshot_ready_event(screenshot):
+    return {
+        "event": "screenshot_ready",
+        "screenshot_id": screenshot.pk,
+        "block_id": screenshot.block_id,
+        "session_id": screenshot.block.session_id,
+        "taken_at": _iso(screenshot.taken_at_client),
+        "thumbnail_url": screenshot.thumbnail.url if screenshot.thumbnail else None,
+        "is_near_duplicate": screenshot.is_near_duplicate,
+    }
+
+
+# =====================================================
+# Publishing (coalesced per contract)
+# =====================================================
+def publish_live_event(contract_id, key, event):
+    """
+    Queue `event` for the contract's live feed once the current
+    transaction commits. Events with the same `key` (e.g. one session's
+    state) inside one coalescing window collapse into the latest, and
+    the window goes out to the contract group as a single message.
+
+    The feed is best effort: a Redis or broker failure is logged, not
+    raised into the request whose data already committed, and a window
+    whose flush never got scheduled is picked up by the periodic flush.
+    """
+    event = {**event, "at": timezone.now().isoformat()}
+    transaction.on_commit(lambda: _queue(contract_id, key, event), robust=True)
+
+
+def publish_session(session):
+    publish_live_event(session.contract_id, f"session:{session.pk}", session_event(session))
+
+
+def publish_block_closed(block, contract_id):
+    publish_live_event(contract_id, f"block:{block.pk}", block_closed_event(block))
+
+
+def publish_screenshot_ready(screenshot):
+    publish_live_event(
+        screenshot.block.session.contract_id,
+        f"screenshot:{screenshot.pk}",
+        screenshot_ready_event(screenshot),
+    )
+
+
+def _queue(contract_id, key, event):
+    from apps.tracking.tasks import flush_live_feed_task
+
+    # Only the first event of a window schedules the flush
+    if get_live_feed_buffer().add(contract_id, key, event):
+        flush_live_feed_task.apply_async(countdown=settings.TRACKING_LIVE_COALESCE_SECONDS)
+
+
+def flush_live_feed():
+    """Send each contract's pending events to its group as one batch."""
+    layer = get_channel_layer()
+    sent = 0
+    for contract_id, events in get_live_feed_buffer().drain():
+        events.sort(key=lambda e: e["at"])
+        async_to_sync(layer.group_send)(
+            contract_group(contract_id),
+            {"type": "tracking.batch", "events": events},
+        )
+        sent += len(events)
+    return sent
+
+
+# =====================================================
+# Buffers
+# =====================================================
+class LiveFeedBuffer:
+    def add(self, contract_id, key, event):
+        """Store the latest event for `key`; True if the contract was idle."""
+        raise NotImplementedError
+
+    def drain(self):
+        """[(contract_id, [event, ...])] pending since the last drain."""
+        raise NotImplementedError
+
+
+class RedisLiveFeedBuffer(LiveFeedBuffer):
+    """
+    A hash of pending events per contract (field = coalescing key) and
+    a set of contracts with something pending. Draining one contract
+    is a MULTI, so an event landing meanwhile marks it dirty again and
+    schedules its own flush.
+    """
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection("default")
+
+    def add(self, contract_id, key, event):
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(_pending_key(contract_id), key, json.dumps(event))
+        pipe.sadd(LIVE_DIRTY_KEY, contract_id)
+        _, added = pipe.execute()
+        return bool(added)
+
+    def drain(self):
+        batches = []
+        for member in self.redis.smembers(LIVE_DIRTY_KEY):
+            contract_id = int(member)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.srem(LIVE_DIRTY_KEY, contract_id)
+            pipe.hgetall(_pending_key(contract_id))
+            pipe.delete(_pending_key(contract_id))
+            _, pending, _ = pipe.execute()
+            if pending:
+                batches.append((contract_id, [json.loads(v) for v in pending.values()]))
+        return batches
+
+
+class LocalLiveFeedBuffer(LiveFeedBuffer):
+    """In-process buffer for development / single-process setups."""
+
+    def __init__(self):
+        self.pending = {}
+
+    def add(self, contract_id, key, event):
+        idle = contract_id not in self.pending
+        self.pending.setdefault(contract_id, {})[key] = event
+        return idle
+
+    def drain(self):
+        pending, self.pending = self.pending, {}
+        return [(contract_id, list(events.values())) for contract_id, events in pending.items()]
+
+
+_buffer = None
+
+
+def get_live_feed_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = import_string(settings.TRACKING_LIVE_FEED_BUFFER)()
+    return _buffer
@@ -0,0 +1,318 @@
+import io
+import random
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+# Report order
+ENDPOINTS = [
+    "device_check",
+    "session_start",
+    "idle_flush",
+    "screenshot_upload",
+    "heartbeat",
+    "session_pause",
+    "session_resume",
+    "session_stop",
+]
+
+
+# =====================================================
+# Measurements
+# =====================================================
+class QueryProbe:
+    """
+    connection.execute_wrapper counting the queries of one request and
+    the time spent in row-locking statements (SELECT ... FOR UPDATE).
+    On backends that ignore FOR UPDATE (SQLite) lock wait stays 0 and
+    contention shows up as latency / errors instead.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.queries = 0
+        self.lock_wait = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if "FOR UPDATE" not in sql:
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.lock_wait += time.perf_counter() - started
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class LoadStats:
+    """Per-endpoint samples, shared by the tracker threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+
+    def record(self, endpoint, seconds, status, queries, lock_wait):
+        with self.lock:
+            self.samples[endpoint].append((seconds, queries, lock_wait))
+            self.statuses[endpoint][status] += 1
+
+    def summary(self):
+        rows = []
+        for endpoint in sorted(self.samples, key=lambda e: ENDPOINTS.index(e) if e in ENDPOINTS else len(ENDPOINTS)):
+            latencies = [s[0] * 1000 for s in self.samples[endpoint]]
+            queries = [s[1] for s in self.samples[endpoint]]
+            waits = [s[2] * 1000 for s in self.samples[endpoint]]
+            statuses = self.statuses[endpoint]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(latencies),
+                "errors": sum(count for status, count in statuses.items() if status >= 400),
+                "statuses": dict(statuses),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "queries_avg": round(sum(queries) / len(queries), 1),
+                "queries_max": max(queries),
+                "lock_wait_total_ms": round(sum(waits), 2),
+                "lock_wait_p95_ms": round(percentile(waits, 95), 2),
+            })
+        return rows
+
+
+# =====================================================
+# Fleet
+# =====================================================
+def build_fleet(size):
+    """
+    One client and `size` freelancers, each with a funded contract and
+    accepted tracking consent. Returns the tracker identities.
+    """
+    from apps.applications.models import EscrowPayment, Offer, Proposal
+    from apps.contract.models import Contract
+    from apps.freelancer.models import FreelancerProfile
+    from apps.tracking.models import WorkConsent
+    from apps.users.models import Project, User
+
+    tag = uuid.uuid4().hex[:8]
+    client = User.objects.create_user(
+        email=f"load-client-{tag}@example.com",
+        username=f"load-client-{tag}",
+        password=uuid.uuid4().hex,
+        role="client",
+    )
+    project = Project.objects.create(
+        client=client,
+        title=f"Load test {tag}",
+        description="Synthetic project created by the tracking load test.",
+        budget_type="hourly",
+        hourly_min_rate=10,
+        hourly_max_rate=200,
+        experience_level="entry",
+        duration="1m",
+    )
+
+    fleet = []
+    for i in range(size):
+        user = User.objects.create_user(
+            email=f"load-{tag}-{i}@example.com",
+            username=f"load-{tag}-{i}",
+            password=uuid.uuid4().hex,
+            role="freelancer",
+        )
+        profile = FreelancerProfile.objects.create(user=user, title="Load tester", bio="Synthetic")
+        proposal = Proposal.objects.create(
+            project=project,
+            freelancer=user,
+            cover_letter="Synthetic proposal created by the tracking load test. " * 3,
+            bid_hourly_rate=Decimal("50.00"),
+            status="accepted",
+        )
+        offer = Offer.objects.create(
+            proposal=proposal,
+            client=client,
+            freelancer=profile,
+            total_budget=Decimal("100000.00"),
+            agreed_hourly_rate=Decimal("50.00"),
+            valid_until=timezone.now() + timedelta(days=3),
+            status="accepted",
+        )
+        EscrowPayment.objects.create(offer=offer, amount=offer.total_budget, status="escrowed")
+        contract = Contract.objects.create(offer=offer, scope_summary="Load test")
+        WorkConsent.objects.create(freelancer=user, contract=contract, policy_version="load-test")
+
+        fleet.append({
+            "user_id": user.pk,
+            "contract_id": contract.pk,
+            "device_id": f"load-device-{tag}-{i}",
+            "token": str(AccessToken.for_user(user)),
+        })
+    return fleet
+
+
+def synthetic_screenshot(rng, size=(320, 200)):
+    """A small PNG of random coloured tiles (distinct per call)."""
+    image = Image.new("RGB", size)
+    tile = 20
+    for x in range(0, size[0], tile):
+        for y in range(0, size[1], tile):
+            colour = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+            image.paste(colour, (x, y, x + tile, y + tile))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    buffer.name = "screenshot.png"
+    buffer.seek(0)
+    return buffer
+
+
+# =====================================================
+# Simulated tracker
+# =====================================================
+class SimulatedTracker:
+    """
+    One desktop tracker: device check, session start, then `rounds` of
+    idle flush + screenshot + heartbeat, pausing / resuming every
+    `pause_every` rounds, and a final stop.
+    """
+
+    def __init__(self, member, stats, *, rounds, pause_every, seed, prefix="/api/"):
+        self.member = member
+        self.stats = stats
+        self.rounds = rounds
+        self.pause_every = pause_every
+        self.rng = random.Random(seed)
+        self.prefix = prefix
+        self.client = Client(
+            raise_request_exception=False,
+            HTTP_AUTHORIZATION=f"Bearer {member['token']}",
+        )
+        self.probe = QueryProbe()
+
+    def request(self, endpoint, path, data=None, multipart=False):
+        self.probe.reset()
+        started = time.perf_counter()
+        if multipart:
+            response = self.client.post(self.prefix + path, data)
+        else:
+            response = self.client.post(self.prefix + path, data or {}, content_type="application/json")
+        self.stats.record(
+            endpoint,
+            time.perf_counter() - started,
+            response.status_code,
+            self.probe.queries,
+            self.probe.lock_wait,
+        )
+        return response
+
+    def run(self):
+        try:
+            with connection.execute_wrapper(self.probe):
+                self._scenario()
+        finally:
+            # Each worker thread has its own connection
+            connection.close()
+
+    def _scenario(self):
+        device_id = self.member["device_id"]
+        self.request("device_check", "tracker/device/check-or-create/", {"device_id": device_id})
+
+        response = self.request(
+            "session_start",
+            "tracker/session/start/",
+            {"contract_id": self.member["contract_id"], "device_id": device_id},
+        )
+        if response.status_code >= 400:
+            return
+        session_id = response.json()["session_id"]
+
+        for round_no in range(1, self.rounds + 1):
+            self.request(
+                "idle_flush",
+                f"tracker/session/{session_id}/idle-flush/",
+                {"session_id": session_id, "idle_seconds": self.rng.randint(1, 90)},
+            )
+            self.request(
+                "screenshot_upload",
+                "tracker/screenshot/",
+                {
+                    "image": synthetic_screenshot(self.rng),
+                    "taken_at_client": timezone.now().isoformat(),
+                    "resolution": "full",
+                },
+                multipart=True,
+            )
+            self.request("heartbeat", f"tracker/session/{session_id}/heartbeat/")
+
+            if self.pause_every and round_no % self.pause_every == 0 and round_no < self.rounds:
+                self.request("session_pause", f"tracker/session/{session_id}/pause/", {"session_id": session_id})
+                self.request("session_resume", f"tracker/session/{session_id}/resume/", {"session_id": session_id})
+
+        self.request("session_stop", f"tracker/session/{session_id}/stop/", {"session_id": session_id})
+
+
+# =====================================================
+# Runner
+# =====================================================
+def run_load_test(*, trackers, rounds=6, concurrency=10, pause_every=3, seed=0):
+    """
+    Build a fleet and run it through the tracking endpoints in
+    `concurrency` threads with Django's test client. Throttling is off
+    for the run so the numbers are the endpoints' own cost: views bind
+    the default throttle classes at import time, so the APIView
+    attribute they inherit is patched rather than the setting.
+    Returns (summary rows, wall-clock seconds).
+    """
+    fleet = build_fleet(trackers)
+    stats = LoadStats()
+
+    allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+
+    with (
+        override_settings(ALLOWED_HOSTS=allowed_hosts),
+        mock.patch.object(APIView, "throttle_classes", []),
+    ):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(
+                    SimulatedTracker(
+                        member,
+                        stats,
+                        rounds=rounds,
+                        pause_every=pause_every,
+                        seed=seed + i,
+                    ).run
+                )
+                for i, member in enumerate(fleet)
+            ]
+            for future in futures:
+                future.result()
+        elapsed = time.perf_counter() - started
+
+    return stats.summary(), elapsed
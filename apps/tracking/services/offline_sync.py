@@ -0,0 +1,301 @@
+import hashlib
+import hmac
+import secrets
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.tracking.models import Device, ScreenshotWindow, TimeBlock, WorkSession
+from apps.tracking.services.activity_logger import log_activities
+from apps.tracking.services.device_registry import touch_device
+from apps.tracking.services.live_feed import publish_session
+from apps.tracking.services.screenshot_window import SCREENSHOTS_PER_WINDOW, WINDOW_DURATION, window_slot
+from apps.tracking.services.session_reaper import SESSION_CLOSE_FIELDS, schedule_session_billing
+from apps.tracking.services.timeblock_flagger import FLAG_FIELDS, evaluate_blocks
+from apps.tracking.services.tracking_consent import resolve_consent
+from apps.tracking.services.work_rollups import schedule_rollup_refresh
+
+
+MAX_SYNC_EVENTS = 5000
+
+# Tolerated drift between the tracker clock and ours
+CLOCK_SKEW = timedelta(minutes=5)
+
+
+class SyncRejected(Exception):
+    pass
+
+
+# =====================================================
+# Signing
+# =====================================================
+def new_sync_secret():
+    return secrets.token_hex(32)
+
+
+def rotate_sync_secret(device):
+    """Replace the device's sync secret; the old one stops verifying."""
+    device.sync_secret = new_sync_secret()
+    device.save(update_fields=["sync_secret"])
+    return device.sync_secret
+
+
+def device_sync_secret(user_id, device_id):
+    return (
+        Device.objects
+        .filter(freelancer_id=user_id, device_id=device_id, is_active=True)
+        .values_list("sync_secret", flat=True)
+        .first()
+    )
+
+
+def verify_signature(secret, body, signature):
+    """`signature` is the hex HMAC-SHA256 of the raw request body."""
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+# =====================================================
+# Replay
+# =====================================================
+def build_sessions(events, now=None):
+    """
+    Turn an ordered offline log into closed blocks grouped by session
+    (a block ending with STOP ends its session). Pure; raises
+    SyncRejected on a malformed log. The log must not end inside an
+    open block — the tracker keeps that part until the block closes.
+    """
+    now = now or timezone.now()
+    sessions, blocks, block = [], [], None
+    previous = None
+
+    for event in events:
+        seq, kind, at = event["seq"], event["type"], event["at"]
+
+        if at > now + CLOCK_SKEW:
+            raise SyncRejected(f"Event {seq} is in the future")
+        if previous and at < previous:
+            raise SyncRejected(f"Event {seq} is earlier than the event before it")
+        previous = at
+
+        if kind == "BLOCK_START":
+            if block:
+                raise SyncRejected(f"Event {seq} starts a block while one is open")
+            block = {"started_at": at, "idle_seconds": 0, "screenshots": []}
+            continue
+
+        if block is None:
+            raise SyncRejected(f"Event {seq} is outside a block")
+
+        if kind == "IDLE":
+            block["idle_seconds"] += event["idle_seconds"]
+        elif kind == "SCREENSHOT":
+            block["screenshots"].append(event)
+        else:  # BLOCK_END
+            block.update(ended_at=at, reason=event["reason"])
+            blocks.append(block)
+            block = None
+            if event["reason"] == "STOP":
+                sessions.append(blocks)
+                blocks = []
+
+    if block:
+        raise SyncRejected("The log ends inside an open block")
+    if blocks:
+        sessions.append(blocks)
+    return sessions
+
+
+def _check_overlaps(user, sessions):
+    """Replayed blocks must not overlap any tracked time the user already has."""
+    intervals = [(b["started_at"], b["ended_at"]) for blocks in sessions for b in blocks]
+    ends = [end for _, end in intervals]
+
+    existing = (
+        TimeBlock.objects
+        .filter(session__user=user, started_at__lt=intervals[-1][1])
+        .filter(Q(ended_at__isnull=True) | Q(ended_at__gt=intervals[0][0]))
+        .values_list("started_at", "ended_at")
+    )
+    now = timezone.now()
+    for started_at, ended_at in existing:
+        # First replayed interval ending after this block starts
+        i = bisect_right(ends, started_at)
+        if i < len(intervals) and intervals[i][0] < (ended_at or now):
+            raise SyncRejected(
+                f"Offline work at {intervals[i][0].isoformat()} overlaps tracked time"
+            )
+
+
+# =====================================================
+# Sync
+# =====================================================
+def sync_offline_log(*, user, device_id, contract_id, events):
+    """
+    Validate an ordered offline log against the device and the cached
+    contract / WorkConsent resolution, then write its sessions, blocks
+    and screenshot windows in bulk in one transaction.
+
+    Events at or below the device's `last_sync_seq` were applied by an
+    earlier sync (a retry after a lost response) and are skipped.
+    """
+    events = sorted(events, key=lambda e: e["seq"])
+
+    with transaction.atomic():
+        # Serializes syncs from one device
+        device = (
+            Device.objects
+            .select_for_update()
+            .filter(freelancer=user, device_id=device_id)
+            .first()
+        )
+        if not device or not device.is_active:
+            raise SyncRejected("Device is not registered or has been deactivated")
+
+        fresh = [e for e in events if e["seq"] > device.last_sync_seq]
+        result = {
+            "accepted": len(fresh),
+            "duplicates": len(events) - len(fresh),
+            "last_seq": max(device.last_sync_seq, events[-1]["seq"]),
+            "sessions": [],
+            "screenshots": [],
+        }
+        if not fresh:
+            return result
+
+        sessions = build_sessions(fresh)
+        if not sessions:
+            raise SyncRejected("The log has no complete block")
+        first_at = sessions[0][0]["started_at"]
+
+        consent = resolve_consent(user.id, contract_id)
+        if not consent["allowed"]:
+            raise SyncRejected(consent["reason"])
+        if first_at < datetime.fromisoformat(consent["contract_started_at"]):
+            raise SyncRejected("Offline work predates the contract")
+        if first_at < datetime.fromisoformat(consent["consented_at"]):
+            raise SyncRejected("Offline work predates the tracking consent")
+
+        _check_overlaps(user, sessions)
+
+        work_sessions, blocks, specs = _create_sessions(user, contract_id, device_id, sessions)
+        placements = _create_windows(blocks, specs)
+
+        Device.objects.filter(pk=device.pk).update(last_sync_seq=fresh[-1]["seq"])
+
+        freelancer = user.freelancer_profile
+        log_activities(
+            {
+                "freelancer_profile": freelancer,
+                "action": action,
+                "session": session,
+                "at": at,
+                "metadata": {"offline": True, "device_id": device_id, "total_seconds": session.closed_seconds},
+            }
+            for session in work_sessions
+            for action, at in (("SESSION_START", session.started_at), ("SESSION_STOP", session.ended_at))
+        )
+
+        # One event per replayed session; its blocks are history by now
+        # and would flood the live feed (a long offline day has hundreds)
+        for session in work_sessions:
+            publish_session(session)
+
+        schedule_rollup_refresh(block.pk for block in blocks)
+        schedule_session_billing([session.pk for session in work_sessions])
+
+    touch_device(user.id, device_id)
+
+    result["sessions"] = [
+        {
+            "session_id": session.pk,
+            "started_at": session.started_at,
+            "ended_at": session.ended_at,
+            "total_seconds": session.closed_seconds,
+            "block_ids": [block.pk for block in blocks if block.session_id == session.pk],
+        }
+        for session in work_sessions
+    ]
+    result["screenshots"] = [
+        {
+            "ref": shot.get("ref") or str(shot["seq"]),
+            "block_id": block.pk,
+            "window_id": window.pk if accepted else None,
+            "accepted": accepted,
+        }
+        for shot, block, window, accepted in placements
+    ]
+    return result
+
+
+def _create_sessions(user, contract_id, device_id, sessions):
+    # started_at is auto_now_add on both models, so bulk_create stamps
+    # "now"; the client times are put back with one bulk_update each
+    work_sessions = [
+        WorkSession(user=user, contract_id=contract_id, device_id=device_id)
+        for _ in sessions
+    ]
+    WorkSession.objects.bulk_create(work_sessions)
+
+    blocks, specs = [], []
+    for session, session_blocks in zip(work_sessions, sessions):
+        for spec in session_blocks:
+            block = TimeBlock(session=session, idle_seconds=spec["idle_seconds"])
+            block.started_at = spec["started_at"]
+            session.closed_seconds += block.finish(reason=spec["reason"], at=spec["ended_at"])
+            session.closed_idle_seconds += block.idle_seconds
+            session.closed_active_seconds += block.active_seconds
+            block.user_timezone = user.timezone
+            blocks.append(block)
+            specs.append(spec)
+
+        session.started_at = session_blocks[0]["started_at"]
+        session.ended_at = session_blocks[-1]["ended_at"]
+
+    WorkSession.objects.bulk_update(work_sessions, ["started_at", *SESSION_CLOSE_FIELDS])
+
+    TimeBlock.objects.bulk_create(blocks, batch_size=1000)
+    for block, spec in zip(blocks, specs):
+        block.started_at = spec["started_at"]
+    evaluate_blocks(blocks)
+    TimeBlock.objects.bulk_update(blocks, ["started_at", *FLAG_FIELDS], batch_size=1000)
+
+    return work_sessions, blocks, specs
+
+
+def _create_windows(blocks, specs):
+    """
+    One ScreenshotWindow per (block, slot) with the quota already used
+    by the offline screenshots. Returns (screenshot event, block,
+    window, accepted) per screenshot; those over the quota are not
+    accepted. Images are uploaded separately against the window.
+    """
+    windows, placements = {}, []
+    for block, spec in zip(blocks, specs):
+        used = Counter()
+        for shot in spec["screenshots"]:
+            slot = window_slot(block, shot["at"])
+            used[slot] += 1
+            accepted = used[slot] <= SCREENSHOTS_PER_WINDOW
+            if (block.pk, slot) not in windows:
+                start_at = block.started_at + slot * WINDOW_DURATION
+                windows[(block.pk, slot)] = ScreenshotWindow(
+                    block=block,
+                    slot=slot,
+                    start_at=start_at,
+                    end_at=start_at + WINDOW_DURATION,
+                    max_count=SCREENSHOTS_PER_WINDOW,
+                )
+            placements.append((shot, block, windows[(block.pk, slot)], accepted))
+
+        for slot, count in used.items():
+            windows[(block.pk, slot)].used_count = min(count, SCREENSHOTS_PER_WINDOW)
+
+    ScreenshotWindow.objects.bulk_create(list(windows.values()), batch_size=1000)
+    return placements
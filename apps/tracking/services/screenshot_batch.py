@@ -0,0 +1,215 @@
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.tracking.models import Screenshot, ScreenshotWindow, WorkSession
+from apps.tracking.services.activity_logger import log_activities
+from apps.tracking.services.offline_sync import CLOCK_SKEW
+from apps.tracking.services.screenshot_window import ScreenshotQuotaExceeded, claim_screenshot_slot
+from apps.tracking.services.tracking_consent import resolve_consent
+from apps.tracking.services.tracking_state import (
+    get_tracking_state,
+    load_tracking_state,
+    remember_window,
+    state_block,
+)
+
+
+MAX_BATCH_SCREENSHOTS = 20
+
+
+class ItemRejected(Exception):
+    pass
+
+
+# =====================================================
+# Manifest
+# =====================================================
+def _is_number(value, integer=True):
+    types = int if integer else (int, float)
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def parse_manifest(rows):
+    """
+    The manifest is a JSON array of positional rows, one per image:
+
+        [part, taken_at, idle_seconds_delta]             live capture
+        [part, taken_at, idle_seconds_delta, window_id]  offline capture
+
+    `part` names the file field, `taken_at` is epoch seconds and
+    `window_id` one returned by the offline sync. Raises ValueError.
+    """
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("The manifest must be a non-empty list.")
+    if len(rows) > MAX_BATCH_SCREENSHOTS:
+        raise ValueError(f"At most {MAX_BATCH_SCREENSHOTS} screenshots per batch.")
+
+    items, parts = [], set()
+    for row in rows:
+        if not isinstance(row, list) or len(row) not in (3, 4):
+            raise ValueError("Manifest rows are [part, taken_at, idle_seconds_delta(, window_id)].")
+
+        part, taken_at, idle, *window = row
+        if not isinstance(part, str) or not part or part in parts:
+            raise ValueError("Manifest parts must be unique file field names.")
+        if not _is_number(taken_at, integer=False) or not _is_number(idle) or idle < 0:
+            raise ValueError("taken_at and idle_seconds_delta must be non-negative numbers.")
+        if window and not _is_number(window[0]):
+            raise ValueError("window_id must be an integer.")
+
+        parts.add(part)
+        items.append({
+            "part": part,
+            "taken_at": datetime.fromtimestamp(taken_at, tz=dt_timezone.utc),
+            "idle_seconds_delta": idle,
+            "window_id": window[0] if window else None,
+        })
+    return items
+
+
+# =====================================================
+# Store
+# =====================================================
+def store_screenshot_batch(*, user, items, files, resolution):
+    """
+    Store each manifest item in its own savepoint and return one result
+    per item, so a full window or a bad image only rejects that image.
+
+    Live captures go into the running block's window covering their
+    capture time; offline captures into the window the offline sync
+    reserved for them. The SCREENSHOT activity is logged once per
+    session instead of once per image.
+    """
+    from apps.tracking.tasks import process_screenshot_task
+
+    batch = {
+        "now": timezone.now(),
+        "state": get_tracking_state(user.id) if any(not i["window_id"] for i in items) else None,
+        "consent": {},
+    }
+
+    results, stored = [], defaultdict(list)
+    for item in items:
+        result = {"part": item["part"]}
+        results.append(result)
+
+        if item.get("error"):
+            result.update(status="rejected", error=item["error"])
+            continue
+
+        upload = files[item["part"]]
+        try:
+            with transaction.atomic():
+                if item["window_id"]:
+                    block, window = _reserved_window(user, batch, item)
+                else:
+                    block, window = _live_window(user, batch, item)
+
+                screenshot = Screenshot.objects.create(
+                    block=block,
+                    window=window,
+                    image=upload,
+                    image_bytes=upload.size,
+                    taken_at_client=item["taken_at"],
+                    resolution=resolution,
+                    idle_seconds_delta=item["idle_seconds_delta"],
+                )
+                transaction.on_commit(
+                    lambda pk=screenshot.pk: process_screenshot_task.delay(pk),
+                    robust=True,
+                )
+        except ItemRejected as exc:
+            result.update(status="rejected", error=str(exc))
+            continue
+
+        stored[block.session_id].append(screenshot.pk)
+        result.update(
+            status="created",
+            screenshot_id=screenshot.pk,
+            block_id=block.pk,
+            window_id=window.pk,
+        )
+
+    if stored:
+        freelancer = user.freelancer_profile
+        log_activities(
+            {
+                "freelancer_profile": freelancer,
+                "action": "SCREENSHOT",
+                "session": WorkSession(id=session_id),
+                "metadata": {"batch": True, "screenshot_ids": screenshot_ids, "resolution": resolution},
+            }
+            for session_id, screenshot_ids in stored.items()
+        )
+
+    return {
+        "created": sum(len(ids) for ids in stored.values()),
+        "rejected": sum(r["status"] == "rejected" for r in results),
+        "results": results,
+    }
+
+
+def _check_consent(user, batch, contract_id):
+    if contract_id not in batch["consent"]:
+        batch["consent"][contract_id] = resolve_consent(user.id, contract_id)
+    consent = batch["consent"][contract_id]
+    if not consent["allowed"]:
+        raise ItemRejected(consent["reason"])
+
+
+def _live_window(user, batch, item):
+    state = batch["state"]
+    if item["taken_at"] > batch["now"] + CLOCK_SKEW:
+        raise ItemRejected("Captured in the future")
+
+    # A stale cache entry fails the guarded claim; reload it once
+    for attempt in range(2):
+        if not state or state["paused"]:
+            raise ItemRejected("No active session")
+        _check_consent(user, batch, state["contract_id"])
+
+        block = state_block(state)
+        if item["taken_at"] < block.started_at - CLOCK_SKEW:
+            raise ItemRejected("Captured before the running block")
+
+        try:
+            window = claim_screenshot_slot(block, at=item["taken_at"], window_id=state["window_id"])
+        except ScreenshotQuotaExceeded as exc:
+            fresh = load_tracking_state(user.id)
+            if attempt or not fresh or fresh["block_id"] == state["block_id"]:
+                raise ItemRejected(str(exc))
+            state = batch["state"] = fresh
+            continue
+
+        remember_window(state, window)
+        batch["state"] = {**state, "window_slot": window.slot, "window_id": window.id}
+        return block, window
+
+
+def _reserved_window(user, batch, item):
+    """
+    The offline sync already counted its screenshots into the window's
+    used_count; an image is accepted while fewer are stored than that.
+    The row lock serializes concurrent uploads into one window.
+    """
+    window = (
+        ScreenshotWindow.objects
+        .select_for_update(of=("self",))
+        .select_related("block__session")
+        .filter(pk=item["window_id"], block__session__user=user)
+        .first()
+    )
+    if not window:
+        raise ItemRejected("Unknown screenshot window")
+
+    _check_consent(user, batch, window.block.session.contract_id)
+
+    if not window.start_at <= item["taken_at"] < window.end_at:
+        raise ItemRejected("Captured outside the screenshot window")
+    if window.screenshots.count() >= window.used_count:
+        raise ItemRejected("Screenshot limit reached")
+
+    return window.block, window
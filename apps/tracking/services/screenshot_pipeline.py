@@ -0,0 +1,134 @@
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image
+
+from apps.tracking.models import Screenshot
+from apps.tracking.services.live_feed import publish_screenshot_ready
+
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes (aspect ratio kept) for the derived WebP renditions
+RENDITIONS = {
+    "thumbnail": (320, 200),
+    "preview": (1280, 800),
+}
+WEBP_QUALITY = 70
+
+# Max differing bits (of 64) for two screenshots to count as near-duplicates
+NEAR_DUPLICATE_DISTANCE = 5
+
+
+# =====================================================
+# Perceptual hash
+# =====================================================
+def difference_hash(image):
+    """
+    64-bit dHash: grayscale 9x8, one bit per horizontal gradient.
+    Robust to scaling / recompression, cheap enough for every upload.
+    """
+    small = image.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = list(small.getdata())
+
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def hash_distance(a, b):
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+# =====================================================
+# Processing
+# =====================================================
+def _render_webp(image, size):
+    rendition = image.copy()
+    rendition.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    rendition.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def _previous_in_session(screenshot):
+    return (
+        Screenshot.objects
+        .filter(
+            block__session_id=screenshot.block.session_id,
+            processing_status="READY",
+            taken_at_client__lte=screenshot.taken_at_client,
+        )
+        .exclude(pk=screenshot.pk)
+        .order_by("-taken_at_client", "-id")
+        .only("id", "phash")
+        .first()
+    )
+
+
+def process_screenshot(screenshot_id):
+    """
+    Generate WebP renditions, record byte sizes and flag near-duplicates
+    of the previous screenshot in the same session. Idempotent.
+    """
+    screenshot = (
+        Screenshot.objects
+        .select_related("block__session")
+        .filter(pk=screenshot_id)
+        .first()
+    )
+    if not screenshot or screenshot.processing_status == "READY":
+        return screenshot
+
+    try:
+        with screenshot.image.open("rb") as fh:
+            image = Image.open(fh)
+            image.load()
+        image = image.convert("RGB")
+
+        for field, size in RENDITIONS.items():
+            data = _render_webp(image, size)
+            getattr(screenshot, field).save(
+                f"{screenshot.pk}_{field}.webp",
+                ContentFile(data),
+                save=False,
+            )
+            setattr(screenshot, f"{field}_bytes", len(data))
+
+        screenshot.image_bytes = screenshot.image.size
+        screenshot.phash = difference_hash(image)
+
+        previous = _previous_in_session(screenshot)
+        if previous and previous.phash:
+            if hash_distance(previous.phash, screenshot.phash) <= NEAR_DUPLICATE_DISTANCE:
+                screenshot.is_near_duplicate = True
+                screenshot.duplicate_of = previous
+
+        screenshot.processing_status = "READY"
+    except (OSError, ValueError) as exc:
+        logger.warning("Screenshot %s processing failed: %s", screenshot_id, exc)
+        screenshot.processing_status = "FAILED"
+
+    screenshot.processed_at = timezone.now()
+    screenshot.save(update_fields=[
+        "thumbnail",
+        "preview",
+        "image_bytes",
+        "thumbnail_bytes",
+        "preview_bytes",
+        "phash",
+        "is_near_duplicate",
+        "duplicate_of",
+        "processing_status",
+        "processed_at",
+    ])
+
+    if screenshot.processing_status == "READY":
+        publish_screenshot_ready(screenshot)
+    return screenshot
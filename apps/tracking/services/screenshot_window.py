@@ -1,29 +1,71 @@
-from django.utils import timezone
 from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
 from apps.tracking.models import ScreenshotWindow
 
 WINDOW_DURATION = timedelta(minutes=10)
 SCREENSHOTS_PER_WINDOW = 3
 
-def get_or_create_active_window(time_block):
-    # Check for an active window first
-    window = ScreenshotWindow.objects.filter(
-        time_block=time_block,
-        start_at__lte=timezone.now(),
-        end_at__gt=timezone.now()
-    ).first()
-
-    if window:
-        return window
-
-    # Otherwise, create next window
-    last_window = ScreenshotWindow.objects.filter(time_block=time_block).order_by('-end_at').first()
-    start = last_window.end_at if last_window else time_block.started_at
-    end = start + WINDOW_DURATION
-
-    return ScreenshotWindow.objects.create(
-        time_block=time_block,
-        start_at=start,
-        end_at=end,
-        expected_count=SCREENSHOTS_PER_WINDOW
+
+class ScreenshotQuotaExceeded(Exception):
+    pass
+
+
+def window_slot(time_block, at):
+    """Deterministic window index inside the block."""
+    return max(0, int((at - time_block.started_at) // WINDOW_DURATION))
+
+
+def claim_screenshot_slot(time_block, at=None, window_id=None):
+    """
+    Claim one screenshot in the window covering `at`.
+
+    The window row is keyed by (block, slot), so concurrent uploads can
+    never create two windows for the same slot, and the quota is taken
+    with a conditional UPDATE (used_count < max_count, block still open)
+    that both checks and increments in one statement. Call inside the
+    transaction that stores the screenshot so a failed insert gives the
+    slot back.
+
+    `window_id` is the window the caller already knows for this block
+    (from the tracking state cache); when it covers the slot the claim
+    is that single UPDATE.
+    """
+    at = at or timezone.now()
+    slot = window_slot(time_block, at)
+    start_at = time_block.started_at + slot * WINDOW_DURATION
+
+    if window_id and _take_slot(pk=window_id, block=time_block, slot=slot):
+        return ScreenshotWindow(
+            id=window_id,
+            block=time_block,
+            slot=slot,
+            start_at=start_at,
+            end_at=start_at + WINDOW_DURATION,
+        )
+
+    window, _ = ScreenshotWindow.objects.get_or_create(
+        block=time_block,
+        slot=slot,
+        defaults={
+            "start_at": start_at,
+            "end_at": start_at + WINDOW_DURATION,
+            "max_count": SCREENSHOTS_PER_WINDOW,
+        },
     )
+
+    if not _take_slot(pk=window.pk):
+        raise ScreenshotQuotaExceeded("Screenshot limit reached")
+
+    window.used_count += 1
+    return window
+
+
+def _take_slot(**lookup):
+    return ScreenshotWindow.objects.filter(
+        used_count__lt=F("max_count"),
+        block__ended_at__isnull=True,
+        **lookup,
+    ).update(used_count=F("used_count") + 1)
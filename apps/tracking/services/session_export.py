@@ -0,0 +1,138 @@
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from apps.tracking.models import TimeBlock
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+SESSION_COLUMNS = [
+    "id",
+    "user_id",
+    "username",
+    "contract_id",
+    "device_id",
+    "started_at",
+    "ended_at",
+    "paused_at",
+    "closed_seconds",
+    "closed_idle_seconds",
+    "closed_active_seconds",
+]
+
+BLOCK_COLUMNS = [
+    "session_id",
+    "user_id",
+    "contract_id",
+    "id",
+    "started_at",
+    "ended_at",
+    "end_reason",
+    "active_seconds",
+    "idle_seconds",
+    "idle_ratio",
+    "is_flagged",
+    "flag_source",
+]
+
+
+# =====================================================
+# Filters (shared by the admin list and the export)
+# =====================================================
+def parse_moment(value, *, end_of_day=False):
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        moment = datetime.combine(day, time.max if end_of_day else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_sessions(queryset, params):
+    """
+    Supported params: user_id, contract_id, status (running|ended),
+    started_after, started_before (ISO date or datetime).
+    Raises ValueError on malformed dates.
+    """
+    if params.get("user_id"):
+        queryset = queryset.filter(user_id=params["user_id"])
+    if params.get("contract_id"):
+        queryset = queryset.filter(contract_id=params["contract_id"])
+
+    status = params.get("status")
+    if status == "running":
+        queryset = queryset.filter(ended_at__isnull=True)
+    elif status == "ended":
+        queryset = queryset.filter(ended_at__isnull=False)
+
+    started_after = parse_moment(params.get("started_after"))
+    started_before = parse_moment(params.get("started_before"), end_of_day=True)
+    if started_after:
+        queryset = queryset.filter(started_at__gte=started_after)
+    if started_before:
+        queryset = queryset.filter(started_at__lte=started_before)
+
+    return queryset
+
+
+# =====================================================
+# Streaming export
+# =====================================================
+class _Echo:
+    """File-like object whose write() just returns the line (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(sessions, level="sessions"):
+    """
+    (columns, row iterator) for the filtered sessions, or for their
+    blocks when level="blocks". Rows are plain dicts read with a
+    chunked iterator, so memory stays flat however long the range is.
+    """
+    if level == "blocks":
+        queryset = (
+            TimeBlock.objects
+            .filter(session__in=sessions.values("id"))
+            .order_by("session_id", "id")
+            .annotate(user_id=F("session__user_id"), contract_id=F("session__contract_id"))
+            .values(*BLOCK_COLUMNS)
+        )
+        columns = BLOCK_COLUMNS
+    else:
+        queryset = (
+            sessions
+            .order_by("id")
+            .annotate(username=F("user__username"))
+            .values(*SESSION_COLUMNS)
+        )
+        columns = SESSION_COLUMNS
+
+    return columns, queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in (row[column] for column in columns)
+        ])
+
+
+def stream_ndjson(columns, rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
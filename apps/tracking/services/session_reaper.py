@@ -0,0 +1,203 @@
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from apps.tracking.models import TimeBlock, WorkSession
+from apps.tracking.services.activity_logger import log_activities
+from apps.tracking.services.heartbeat import forget_heartbeats_on_commit, get_heartbeat_store
+from apps.tracking.services.live_feed import publish_block_closed, publish_session
+from apps.tracking.services.timeblock_flagger import FLAG_FIELDS, evaluate_blocks
+from apps.tracking.services.tracking_state import publish_tracking_state
+from apps.tracking.services.work_rollups import schedule_rollup_refresh
+
+
+logger = logging.getLogger(__name__)
+
+SESSION_CLOSE_FIELDS = [
+    "ended_at",
+    "paused_at",
+    "open_block_started_at",
+    "closed_seconds",
+    "closed_idle_seconds",
+    "closed_active_seconds",
+]
+
+
+def _as_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
+
+
+# =====================================================
+# Reaper
+# =====================================================
+def reap_stale_sessions(*, timeout=None, batch_size=None):
+    """
+    Stop every running session whose last heartbeat is older than
+    `timeout` seconds: its open block is closed as SYSTEM_SLEEP at the
+    last heartbeat, the session ends there, and billing is queued.
+    Works in batches of `batch_size` sessions, one transaction each.
+    """
+    timeout = timeout or settings.TRACKING_HEARTBEAT_TIMEOUT_SECONDS
+    batch_size = batch_size or settings.TRACKING_REAPER_BATCH_SIZE
+    store = get_heartbeat_store()
+
+    now = time.time()
+    summary = {"adopted": _adopt_untracked_sessions(store, now), "sessions": 0, "blocks": 0}
+    cutoff = now - timeout
+
+    while True:
+        expired = dict(store.expired(cutoff, batch_size))
+        if not expired:
+            return summary
+
+        reaped, blocks, dropped = _reap_batch(store, expired, cutoff)
+        summary["sessions"] += reaped
+        summary["blocks"] += blocks
+
+        # Rows locked by a concurrent request stay expired; retry next run
+        if len(expired) < batch_size or not (reaped or dropped):
+            return summary
+
+
+def _adopt_untracked_sessions(store, now):
+    """
+    Running sessions with no heartbeat entry (started before heartbeats
+    existed, or lost with Redis) get one now, so a dead tracker is
+    still reaped one timeout later.
+    """
+    open_ids = list(
+        WorkSession.objects
+        .filter(ended_at__isnull=True)
+        .values_list("pk", flat=True)
+    )
+    missing = [sid for sid, at in store.last_beats(open_ids).items() if at is None]
+    store.beat(missing, now, only_new=True)
+    return len(missing)
+
+
+def _reap_batch(store, expired, cutoff):
+    with transaction.atomic():
+        sessions = list(
+            WorkSession.objects
+            .select_for_update(skip_locked=True, of=("self",))
+            .select_related("user__freelancer_profile")
+            .filter(pk__in=list(expired), ended_at__isnull=True)
+        )
+
+        # Already stopped (or locked right now): drop the entry, the
+        # next beat or adoption pass re-adds it if still running
+        found = {session.pk for session in sessions}
+        dropped = [sid for sid in expired if sid not in found]
+
+        # A beat may have landed since the range query
+        latest = store.last_beats(list(found))
+        sessions = [s for s in sessions if (latest.get(s.pk) or 0) <= cutoff]
+        if not sessions:
+            forget_heartbeats_on_commit(dropped)
+            return 0, 0, len(dropped)
+
+        by_id = {session.pk: session for session in sessions}
+        last_beat = {
+            session.pk: _as_datetime(latest.get(session.pk) or expired[session.pk])
+            for session in sessions
+        }
+
+        blocks = list(
+            TimeBlock.objects
+            .filter(session_id__in=list(by_id), ended_at__isnull=True)
+            .annotate(user_timezone=F("session__user__timezone"))
+        )
+        for block in blocks:
+            session = by_id[block.session_id]
+            duration = block.finish(
+                reason="SYSTEM_SLEEP",
+                at=max(block.started_at, last_beat[session.pk]),
+            )
+            session.closed_seconds += duration
+            session.closed_idle_seconds += block.idle_seconds
+            session.closed_active_seconds += block.active_seconds
+            last_beat[session.pk] = max(last_beat[session.pk], block.ended_at)
+
+        if blocks:
+            evaluate_blocks(blocks)
+            TimeBlock.objects.bulk_update(blocks, TimeBlock.CLOSE_FIELDS + FLAG_FIELDS)
+            for block in blocks:
+                publish_block_closed(block, by_id[block.session_id].contract_id)
+
+        for session in sessions:
+            session.ended_at = max(session.started_at, last_beat[session.pk])
+            session.paused_at = None
+            session.open_block_started_at = None
+            publish_tracking_state(session.user_id, None)
+            publish_session(session)
+        WorkSession.objects.bulk_update(sessions, SESSION_CLOSE_FIELDS)
+
+        log_activities(
+            {
+                "freelancer_profile": session.user.freelancer_profile,
+                "action": "SESSION_STOP",
+                "session": session,
+                "metadata": {
+                    "reason": "HEARTBEAT_EXPIRED",
+                    "last_heartbeat": last_beat[session.pk].isoformat(),
+                    "total_seconds": session.closed_seconds,
+                },
+            }
+            for session in sessions
+        )
+
+        schedule_rollup_refresh(block.pk for block in blocks)
+        forget_heartbeats_on_commit([*by_id, *dropped])
+        schedule_session_billing(list(by_id))
+
+    return len(sessions), len(blocks), len(dropped)
+
+
+# =====================================================
+# Billing
+# =====================================================
+def schedule_session_billing(session_ids):
+    from apps.tracking.tasks import bill_work_sessions_task
+
+    if session_ids:
+        transaction.on_commit(lambda: bill_work_sessions_task.delay(session_ids), robust=True)
+
+
+def bill_work_sessions(session_ids):
+    """
+    Create billing units for stopped sessions, each in its own
+    transaction. A session that cannot be billed (escrow not funded,
+    budget exhausted) is logged and skipped so it does not hold up the
+    rest of the batch; one a concurrent run billed first trips the
+    unit's OneToOne on session and counts as already billed.
+    """
+    from django.core.exceptions import ValidationError
+
+    from apps.billing.models import BillingUnit
+    from apps.billing.services import create_billing_unit_for_session
+
+    billed = 0
+    sessions = (
+        WorkSession.objects
+        .select_related("contract__offer")
+        .filter(pk__in=session_ids, ended_at__isnull=False)
+    )
+    for session in sessions:
+        try:
+            with transaction.atomic():
+                unit = create_billing_unit_for_session(session)
+        except ValidationError as exc:
+            logger.warning("Session %s not billed: %s", session.pk, "; ".join(exc.messages))
+            continue
+        except IntegrityError:
+            if not BillingUnit.objects.filter(session=session).exists():
+                logger.exception("Session %s not billed", session.pk)
+            continue
+
+        if unit:
+            billed += 1
+    return billed
@@ -0,0 +1,262 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.tracking.models import Screenshot, ScreenshotWindow, TimeBlock
+
+
+# Bucket size (seconds) per zoom level; "detail" returns every screenshot
+ZOOM_LEVELS = {
+    "detail": None,
+    "10m": 600,
+    "1h": 3600,
+    "6h": 6 * 3600,
+    "1d": 24 * 3600,
+}
+
+# zoom=auto: ranges up to this long are returned in detail, longer ones
+# use the smallest bucket size that stays under MAX_BUCKETS
+AUTO_DETAIL_SECONDS = 4 * 3600
+MAX_BUCKETS = 96
+
+BLOCK_FIELDS = [
+    "id",
+    "session_id",
+    "started_at",
+    "ended_at",
+    "active_seconds",
+    "idle_seconds",
+    "idle_ratio",
+    "end_reason",
+    "is_flagged",
+    "flag_reason",
+    "created_at",
+]
+
+WINDOW_FIELDS = ["id", "block_id", "start_at", "end_at", "max_count", "used_count"]
+
+SCREENSHOT_FIELDS = [
+    "id",
+    "window_id",
+    "image",
+    "thumbnail",
+    "preview",
+    "taken_at_client",
+    "uploaded_at",
+    "resolution",
+    "is_near_duplicate",
+    "image_bytes",
+    "thumbnail_bytes",
+    "processing_status",
+]
+
+
+def resolve_zoom(zoom, range_seconds):
+    if zoom not in ("auto", *ZOOM_LEVELS):
+        raise ValueError(f"zoom must be auto or one of: {', '.join(ZOOM_LEVELS)}")
+    if zoom != "auto":
+        return zoom
+    if range_seconds <= AUTO_DETAIL_SECONDS:
+        return "detail"
+    for name, size in ZOOM_LEVELS.items():
+        if size and range_seconds / size <= MAX_BUCKETS:
+            return name
+    return "1d"
+
+
+# =====================================================
+# Builder
+# =====================================================
+def build_timeline(session, *, start=None, end=None, zoom="auto", full_resolution=False):
+    """
+    Timeline of one session as plain dicts: blocks, windows and
+    screenshots are read with one values() query each and stitched
+    together here, no model instances or nested serializers.
+
+    `start` / `end` clip to a time range. Zoomed-out views (explicit, or
+    zoom=auto on a long range) replace the per-window screenshots with
+    fixed-size buckets of tracked / idle time and screenshot counts.
+    Raises ValueError on an unknown zoom or an empty range.
+    """
+    now = timezone.now()
+    session_end = session.ended_at or now
+    range_start = max(start, session.started_at) if start else session.started_at
+    range_end = min(end, session_end) if end else session_end
+    if range_end < range_start:
+        raise ValueError("end must be after start")
+
+    zoom = resolve_zoom(zoom, (range_end - range_start).total_seconds())
+    bucket_seconds = ZOOM_LEVELS[zoom]
+
+    blocks = list(
+        TimeBlock.objects
+        .filter(session=session, started_at__lte=range_end)
+        .filter(Q(ended_at__isnull=True) | Q(ended_at__gte=range_start))
+        .order_by("started_at", "id")
+        .values(*BLOCK_FIELDS)
+    )
+    for block in blocks:
+        block["session"] = block.pop("session_id")
+        block["duration_seconds"] = (
+            int((block["ended_at"] - block["started_at"]).total_seconds())
+            if block["ended_at"] else None
+        )
+
+    screenshots = (
+        Screenshot.objects
+        .filter(
+            block__session=session,
+            taken_at_client__gte=range_start,
+            taken_at_client__lte=range_end,
+        )
+        .order_by("taken_at_client", "id")
+        .values(*SCREENSHOT_FIELDS)
+    )
+
+    timeline = {
+        "id": session.id,
+        "started_at": session.started_at,
+        "ended_at": session.ended_at,
+        "total_seconds": session.total_seconds,
+        "range": {"start": range_start, "end": range_end},
+        "zoom": zoom,
+        "bucket_seconds": bucket_seconds,
+        "time_blocks": blocks,
+    }
+
+    if bucket_seconds:
+        timeline["buckets"] = _bucketize(blocks, screenshots, range_start, range_end, bucket_seconds, now)
+    else:
+        _attach_windows(session, blocks, screenshots, range_start, range_end, full_resolution)
+
+    return timeline
+
+
+# -----------------------------------------------------
+# Detail: block -> window -> screenshot tree
+# -----------------------------------------------------
+def _attach_windows(session, blocks, screenshots, range_start, range_end, full_resolution):
+    windows = (
+        ScreenshotWindow.objects
+        .filter(
+            block__session=session,
+            start_at__lte=range_end,
+            end_at__gte=range_start,
+        )
+        .order_by("start_at", "id")
+        .values(*WINDOW_FIELDS)
+    )
+
+    by_block = {block["id"]: block for block in blocks}
+    for block in blocks:
+        block["windows"] = []
+
+    by_id = {}
+    for window in windows:
+        block = by_block.get(window.pop("block_id"))
+        if block is None:
+            continue
+        window["screenshots"] = []
+        block["windows"].append(window)
+        by_id[window["id"]] = window
+
+    for row in screenshots:
+        window = by_id.get(row["window_id"])
+        if window is not None:
+            window["screenshots"].append(_screenshot(row, full_resolution))
+
+
+def _url(field_name, name):
+    if not name:
+        return None
+    return Screenshot._meta.get_field(field_name).storage.url(name)
+
+
+def _screenshot(row, full_resolution):
+    """Same keys as FreelancerScreenshotSerializer."""
+    original = _url("image", row["image"])
+    thumbnail = _url("thumbnail", row["thumbnail"])
+    return {
+        "id": row["id"],
+        "image": original if full_resolution or not thumbnail else thumbnail,
+        "preview": _url("preview", row["preview"]) or original,
+        "original": original,
+        "taken_at_client": row["taken_at_client"],
+        "uploaded_at": row["uploaded_at"],
+        "resolution": row["resolution"],
+        "is_near_duplicate": row["is_near_duplicate"],
+        "image_bytes": row["image_bytes"],
+        "thumbnail_bytes": row["thumbnail_bytes"],
+        "processing_status": row["processing_status"],
+    }
+
+
+# -----------------------------------------------------
+# Zoomed out: fixed-size buckets
+# -----------------------------------------------------
+def _bucket_index(moment, size):
+    return int(moment.timestamp() // size)
+
+
+def _bucket_start(index, size):
+    return datetime.fromtimestamp(index * size, tz=dt_timezone.utc)
+
+
+def _bucketize(blocks, screenshots, range_start, range_end, size, now):
+    buckets = defaultdict(lambda: {
+        "tracked_seconds": 0,
+        "idle_seconds": 0,
+        "screenshot_count": 0,
+        "near_duplicate_count": 0,
+        "cover": None,
+    })
+
+    # Tracked / idle time, split across the buckets each block overlaps.
+    # Idle is spread evenly over the block (only its total is stored).
+    for block in blocks:
+        block_end = block["ended_at"] or now
+        duration = (block_end - block["started_at"]).total_seconds()
+        if duration <= 0:
+            continue
+        idle_rate = min(block["idle_seconds"], duration) / duration
+
+        cursor = max(block["started_at"], range_start)
+        stop = min(block_end, range_end)
+        while cursor < stop:
+            index = _bucket_index(cursor, size)
+            edge = min(_bucket_start(index + 1, size), stop)
+            seconds = (edge - cursor).total_seconds()
+            buckets[index]["tracked_seconds"] += seconds
+            buckets[index]["idle_seconds"] += seconds * idle_rate
+            cursor = edge
+
+    for row in screenshots.values("id", "thumbnail", "image", "taken_at_client", "is_near_duplicate"):
+        bucket = buckets[_bucket_index(row["taken_at_client"], size)]
+        bucket["screenshot_count"] += 1
+        if row["is_near_duplicate"]:
+            bucket["near_duplicate_count"] += 1
+        elif bucket["cover"] is None:
+            bucket["cover"] = {
+                "id": row["id"],
+                "image": _url("thumbnail", row["thumbnail"]) or _url("image", row["image"]),
+                "taken_at_client": row["taken_at_client"],
+            }
+
+    result = []
+    for index in sorted(buckets):
+        bucket = buckets[index]
+        tracked = int(bucket["tracked_seconds"])
+        idle = min(int(round(bucket["idle_seconds"])), tracked)
+        result.append({
+            "start": _bucket_start(index, size),
+            "end": _bucket_start(index, size) + timedelta(seconds=size),
+            "tracked_seconds": tracked,
+            "idle_seconds": idle,
+            "active_seconds": tracked - idle,
+            "screenshot_count": bucket["screenshot_count"],
+            "near_duplicate_count": bucket["near_duplicate_count"],
+            "cover": bucket["cover"],
+        })
+    return result
@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models import F
+
+from apps.tracking.models import TimeBlock, WorkSession
+from apps.tracking.services.activity_logger import log_activities
+from apps.tracking.services.heartbeat import record_heartbeat_on_commit
+
+
+MAX_BATCH_EVENTS = 500
+
+
+class TelemetryRejected(Exception):
+    pass
+
+
+# =====================================================
+# Batched idle / heartbeat ingestion
+# =====================================================
+def ingest_telemetry(*, user, session_id, events):
+    """
+    Apply an ordered batch of tracker events to the open block.
+
+    - Events carry a per-session client sequence number; anything at or
+      below the session's `last_event_seq` (or repeated inside the batch)
+      is a replay and is skipped.
+    - Idle from all accepted events lands in ONE F() update on the block.
+    - IDLE activity entries are written with a single bulk insert.
+
+    One session row lock per batch instead of one per flush.
+    """
+    events = sorted(events, key=lambda e: e["seq"])
+
+    with transaction.atomic():
+        session = (
+            WorkSession.objects
+            .select_for_update()
+            .select_related("user__freelancer_profile")
+            .filter(
+                id=session_id,
+                user=user,
+                ended_at__isnull=True,
+                paused_at__isnull=True,
+            )
+            .first()
+        )
+        if not session:
+            raise TelemetryRejected("No active session")
+
+        block = session.time_blocks.filter(ended_at__isnull=True).first()
+        if not block:
+            raise TelemetryRejected("No active block")
+
+        accepted = []
+        last_seq = session.last_event_seq
+        for event in events:
+            if event["seq"] <= last_seq:
+                continue
+            accepted.append(event)
+            last_seq = event["seq"]
+
+        idle_events = [
+            e for e in accepted
+            if e["type"] == "IDLE" and e.get("idle_seconds", 0) > 0
+        ]
+        idle_total = sum(e["idle_seconds"] for e in idle_events)
+
+        if idle_total:
+            TimeBlock.objects.filter(
+                pk=block.pk,
+                ended_at__isnull=True,
+            ).update(idle_seconds=F("idle_seconds") + idle_total)
+
+        if last_seq != session.last_event_seq:
+            WorkSession.objects.filter(pk=session.pk).update(last_event_seq=last_seq)
+
+        # Any batch (even a replay) proves the tracker is alive
+        record_heartbeat_on_commit(session.id)
+
+        freelancer = session.user.freelancer_profile
+        log_activities(
+            {
+                "freelancer_profile": freelancer,
+                "action": "IDLE",
+                "session": session,
+                "metadata": {
+                    "idle_seconds": e["idle_seconds"],
+                    "block_id": block.id,
+                    "seq": e["seq"],
+                },
+            }
+            for e in idle_events
+        )
+
+    return {
+        "block_id": block.id,
+        "accepted": len(accepted),
+        "duplicates": len(events) - len(accepted),
+        "idle_seconds": idle_total,
+        "last_seq": last_seq,
+    }
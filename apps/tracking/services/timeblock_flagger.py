@@ -1,100 +1,277 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
-from apps.tracking.models import TimeBlock
+
+from apps.tracking.models import FlagRuleSet, Screenshot, TimeBlock
+from apps.tracking.services.work_rollups import schedule_rollup_refresh
+
+FLAG_FIELDS = [
+    "is_flagged",
+    "flag_source",
+    "flag_reason",
+    "flagged_at",
+    "flag_rules_version",
+]
+
+
+# ============================================
+# ACTIVE RULES
+# ============================================
+
+def get_active_rules():
+    """
+    The activated FlagRuleSet, or the built-in defaults (idle >= 30 min
+    on blocks of 5 min or more) when none has been activated yet.
+    """
+    return FlagRuleSet.objects.filter(is_active=True).first() or FlagRuleSet.defaults()
+
+
+# ============================================
+# RULES
+# ============================================
+# Each rule returns a reason string when the block breaks it, else None.
+
+def _idle_seconds_rule(block, rules, context):
+    limit = rules.idle_seconds_threshold
+    if limit is not None and block.idle_seconds >= limit:
+        return f"Idle exceeded {limit // 60} min: {block.idle_seconds // 60} minutes"
+
+
+def _idle_ratio_rule(block, rules, context):
+    limit = rules.idle_ratio_threshold
+    duration = block.total_seconds
+    if limit is not None and duration and block.idle_seconds / duration >= limit:
+        return f"Idle ratio {block.idle_seconds / duration:.0%} (limit {limit:.0%})"
+
+
+def _screenshot_gap_rule(block, rules, context):
+    limit = rules.screenshot_gap_seconds
+    if limit is None:
+        return None
+
+    moments = [block.started_at, *context.get("screenshots", []), block.ended_at]
+    gap = max(
+        (later - earlier).total_seconds()
+        for earlier, later in zip(moments, moments[1:])
+    )
+    if gap > limit:
+        return f"No screenshot for {int(gap) // 60} minutes"
+
+
+def _off_hours_rule(block, rules, context):
+    if rules.off_hours_start is None:
+        return None
+
+    seconds = off_hours_overlap(
+        block.started_at,
+        block.ended_at,
+        rules.off_hours_start,
+        rules.off_hours_end,
+        context.get("timezone") or "UTC",
+    )
+    if seconds >= rules.off_hours_min_seconds:
+        return f"{int(seconds) // 60} minutes tracked in off-hours"
+
+
+RULES = [
+    _idle_seconds_rule,
+    _idle_ratio_rule,
+    _screenshot_gap_rule,
+    _off_hours_rule,
+]
+
+
+def off_hours_overlap(started_at, ended_at, start, end, tz_name):
+    """Seconds of [started_at, ended_at) inside the daily local window."""
+    try:
+        tz = ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        tz = ZoneInfo("UTC")
+
+    local_start = started_at.astimezone(tz)
+    local_end = ended_at.astimezone(tz)
+
+    overlap = 0.0
+    day = local_start.date() - timedelta(days=1)
+    while day <= local_end.date():
+        window_start = datetime.combine(day, start, tzinfo=tz)
+        window_end = datetime.combine(day, end, tzinfo=tz)
+        if window_end <= window_start:
+            window_end += timedelta(days=1)  # wraps midnight
+
+        latest_start = max(window_start, local_start)
+        earliest_end = min(window_end, local_end)
+        if earliest_end > latest_start:
+            overlap += (earliest_end - latest_start).total_seconds()
+        day += timedelta(days=1)
+
+    return overlap
+
+
+def flag_reasons(block, rules, context=None):
+    """
+    Reasons the block should carry a SYSTEM flag under `rules`.
+    `context` holds the inputs that are not on the block row:
+    "screenshots" (sorted taken_at times) and "timezone".
+    """
+    if block.total_seconds < rules.min_block_seconds:
+        return []
+
+    context = context or {}
+    return [reason for rule in RULES if (reason := rule(block, rules, context))]
+
 
 # ============================================
-# CONFIG
+# APPLY
 # ============================================
 
-# Flag automatically if idle reaches 30 minutes
-IDLE_FLAG_SECONDS = 30 * 60  # 1800 seconds
+def apply_flag_decision(block, reasons, rules, now=None):
+    """
+    Set the SYSTEM flag fields on the instance (no save).
+    Returns True if anything changed. ADMIN decisions are never touched.
+    """
+    if block.flag_source == "ADMIN":
+        return False
+
+    before = [getattr(block, f) for f in FLAG_FIELDS]
+
+    if reasons:
+        if block.flag_source != "SYSTEM":
+            block.flagged_at = now or timezone.now()
+        block.is_flagged = True
+        block.flag_source = "SYSTEM"
+        block.flag_reason = "; ".join(reasons)
+    elif block.flag_source == "SYSTEM":
+        block.is_flagged = False
+        block.flag_source = "NONE"
+        block.flag_reason = ""
+        block.flagged_at = None
+
+    block.flag_rules_version = rules.version
 
-# Ignore very small blocks (avoid false flags)
-MIN_BLOCK_DURATION = 5 * 60  # 5 minutes
+    return before != [getattr(block, f) for f in FLAG_FIELDS]
 
 
 # ============================================
 # MAIN FLAGGING FUNCTION
 # ============================================
 
-def evaluate_timeblock_flag(block: TimeBlock):
+def evaluate_timeblock_flag(block: TimeBlock, rules=None):
     """
-    SYSTEM automatic flagging.
+    SYSTEM automatic flagging of one block (called when it closes).
 
-    Rules:
     - Only evaluates CLOSED blocks
-    - Flags if idle >= 30 minutes
     - SYSTEM never overrides ADMIN decisions
     - Flagging is only for dispute/review (not billing)
     """
 
     # ✅ Only closed blocks are evaluated
-    if not block.ended_at:
-        return
-
-    # ✅ Admin decisions are FINAL
-    if block.flag_source == "ADMIN":
+    if not block.ended_at or block.flag_source == "ADMIN":
         return
 
-    duration = block.total_seconds
+    rules = rules or get_active_rules()
 
-    # ✅ Guardrail: ignore tiny blocks
-    if duration < MIN_BLOCK_DURATION:
-        _clear_system_flag(block)
-        return
+    context = {"timezone": block.session.user.timezone}
+    if rules.screenshot_gap_seconds is not None:
+        context["screenshots"] = list(
+            Screenshot.objects
+            .filter(block=block)
+            .order_by("taken_at_client")
+            .values_list("taken_at_client", flat=True)
+        )
 
-    # ✅ Absolute idle rule: 30 minutes or more
-    if block.idle_seconds >= IDLE_FLAG_SECONDS:
-        _apply_system_flag(block)
-    else:
-        _clear_system_flag(block)
+    if apply_flag_decision(block, flag_reasons(block, rules, context), rules):
+        block.save(update_fields=FLAG_FIELDS)
 
 
 # ============================================
-# APPLY SYSTEM FLAG
+# BULK RE-EVALUATION
 # ============================================
 
-def _apply_system_flag(block: TimeBlock):
+def reevaluate_timeblock_flags(*, rules=None, chunk_size=1000, include_current=False, dry_run=False):
     """
-    Apply a SYSTEM flag when idle >= threshold.
+    Re-run the rules over closed, non-ADMIN blocks in primary key
+    chunks and write the changes with bulk_update. By default only
+    blocks evaluated under another version (or never) are scanned.
+    Returns counts of scanned / changed / flagged / cleared blocks.
     """
+    rules = rules or get_active_rules()
+    summary = {"version": rules.version, "scanned": 0, "changed": 0, "flagged": 0, "cleared": 0}
 
-    block.is_flagged = True
-    block.flag_source = "SYSTEM"
-    block.flag_reason = (
-        f"Idle exceeded 30 min: {block.idle_seconds // 60} minutes"
+    queryset = (
+        TimeBlock.objects
+        .filter(ended_at__isnull=False)
+        .exclude(flag_source="ADMIN")
+        .annotate(user_timezone=F("session__user__timezone"))
+        .only(
+            "id",
+            "started_at",
+            "ended_at",
+            "idle_seconds",
+            *FLAG_FIELDS,
+        )
+        .order_by("pk")
     )
-    block.flagged_at = timezone.now()
+    if not include_current:
+        queryset = queryset.filter(
+            Q(flag_rules_version__isnull=True) | ~Q(flag_rules_version=rules.version)
+        )
 
-    block.save(update_fields=[
-        "is_flagged",
-        "flag_source",
-        "flag_reason",
-        "flagged_at",
-    ])
+    now = timezone.now()
+    last_pk = 0
+    while True:
+        # Rows stay locked until their chunk is written, so an admin
+        # decision made meanwhile is not overwritten by bulk_update
+        with transaction.atomic():
+            chunk = list(queryset.select_for_update(of=("self",)).filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                return summary
+            last_pk = chunk[-1].pk
 
+            changed, flipped = evaluate_blocks(chunk, rules, now=now)
+            summary["scanned"] += len(chunk)
+            summary["changed"] += len(changed)
+            for block in flipped:
+                summary["flagged" if block.is_flagged else "cleared"] += 1
 
-# ============================================
-# CLEAR SYSTEM FLAG
-# ============================================
+            if changed and not dry_run:
+                TimeBlock.objects.bulk_update(changed, FLAG_FIELDS)
+                # Flagged seconds in the daily rollups
+                schedule_rollup_refresh(block.pk for block in flipped)
 
-def _clear_system_flag(block: TimeBlock):
+
+def evaluate_blocks(blocks, rules=None, *, now=None):
     """
-    Clears ONLY system-generated flags.
-    Never touches admin flags.
+    Apply the rules to many closed blocks in memory (no save). Blocks
+    need a `user_timezone` attribute (annotate session__user__timezone).
+    Returns (changed, flipped): blocks whose flag fields changed, and
+    the subset whose is_flagged value flipped.
     """
+    rules = rules or get_active_rules()
 
-    if block.flag_source != "SYSTEM":
-        return
-
-    block.is_flagged = False
-    block.flag_source = "NONE"
-    block.flag_reason = ""
-    block.flagged_at = None
+    screenshots = defaultdict(list)
+    if rules.screenshot_gap_seconds is not None:
+        rows = (
+            Screenshot.objects
+            .filter(block_id__in=[b.pk for b in blocks])
+            .order_by("taken_at_client")
+            .values_list("block_id", "taken_at_client")
+        )
+        for block_id, taken_at in rows:
+            screenshots[block_id].append(taken_at)
 
-    block.save(update_fields=[
-        "is_flagged",
-        "flag_source",
-        "flag_reason",
-        "flagged_at",
-    ])
+    changed = []
+    flipped = []
+    for block in blocks:
+        was_flagged = block.is_flagged
+        context = {"timezone": block.user_timezone, "screenshots": screenshots[block.pk]}
+        if apply_flag_decision(block, flag_reasons(block, rules, context), rules, now):
+            changed.append(block)
+            if block.is_flagged != was_flagged:
+                flipped.append(block)
 
+    return changed, flipped
@@ -0,0 +1,149 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.adminpanel.models import TrackingPolicy
+from apps.contract.models import Contract
+from apps.tracking.models import WorkConsent
+
+
+ACTIVE_POLICY_KEY = "tracking:policy:active"
+
+# Cached "no active policy" (None would read as a miss)
+NO_POLICY = False
+
+
+def _consent_key(policy_id, user_id, contract_id, generation):
+    # The active policy is part of the key, so a new policy version
+    # retires every cached resolution without touching them
+    return f"tracking:consent:{policy_id}:{user_id}:{contract_id}:{generation}"
+
+
+def _generation_key(user_id, contract_id):
+    return f"tracking:consent:gen:{user_id}:{contract_id}"
+
+
+def _generation(user_id, contract_id):
+    """
+    Current generation of the (user, contract) resolution. Invalidation
+    bumps it, so a resolution loaded before a revoke and cached after
+    it lands under a key nobody reads any more. A missing counter
+    (evicted) restarts from a fresh value, never from an old one.
+    """
+    key = _generation_key(user_id, contract_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+# =====================================================
+# Active policy
+# =====================================================
+def get_active_policy():
+    """The newest active TrackingPolicy (cached), or None."""
+    policy = cache.get(ACTIVE_POLICY_KEY)
+    if policy is None:
+        policy = (
+            TrackingPolicy.objects
+            .filter(is_active=True)
+            .order_by("-created_at")
+            .first()
+        ) or NO_POLICY
+        cache.set(ACTIVE_POLICY_KEY, policy, settings.TRACKING_CONSENT_CACHE_SECONDS)
+    return policy or None
+
+
+def invalidate_active_policy():
+    transaction.on_commit(lambda: cache.delete(ACTIVE_POLICY_KEY), robust=True)
+
+
+# =====================================================
+# Consent resolution per (user, contract)
+# =====================================================
+def resolve_consent(user_id, contract_id):
+    """
+    Whether `user_id` may be tracked on `contract_id`, as a dict:
+    allowed / reason, plus the contract and consent details the
+    tracking endpoints need. Served from the cache after the first call.
+    """
+    policy = get_active_policy()
+    # Read before the database so a concurrent invalidation retires it
+    generation = _generation(user_id, contract_id)
+    key = _consent_key(policy.pk if policy else 0, user_id, contract_id, generation)
+
+    resolution = cache.get(key)
+    if resolution is None:
+        resolution = _load_resolution(user_id, contract_id, policy)
+        cache.set(key, resolution, settings.TRACKING_CONSENT_CACHE_SECONDS)
+    return resolution
+
+
+def _load_resolution(user_id, contract_id, policy):
+    contract = (
+        Contract.objects
+        .select_related("tracking_policy")
+        .filter(pk=contract_id, offer__freelancer__user_id=user_id)
+        .first()
+    )
+    consent = (
+        WorkConsent.objects
+        .filter(freelancer_id=user_id, contract_id=contract_id, is_active=True)
+        .first()
+    ) if contract else None
+
+    reason = None
+    if not contract:
+        reason = "Invalid contract or not accessible"
+    elif contract.status != "active":
+        reason = "Contract is not active"
+    elif not consent:
+        reason = "Tracking policy has not been accepted on this contract"
+
+    return {
+        "allowed": reason is None,
+        "reason": reason,
+        "contract_id": contract_id,
+        "contract_status": contract.status if contract else None,
+        "contract_started_at": contract.started_at.isoformat() if contract else None,
+        "tracking_required": contract.tracking_required if contract else False,
+        "contract_policy_version": (
+            contract.tracking_policy.version if contract and contract.tracking_policy else None
+        ),
+        "consent_policy_version": consent.policy_version if consent else None,
+        "consented_at": consent.consented_at.isoformat() if consent else None,
+        "active_policy_version": policy.version if policy else None,
+        # Consent was given under an older policy than the active one
+        "policy_outdated": bool(consent and policy and consent.policy_version != policy.version),
+    }
+
+
+def invalidate_consent(user_id, contract_id):
+    """
+    Retire the cached resolution once the current transaction commits.
+    A cache outage is logged rather than failing the committed change;
+    the stale entry then lives out TRACKING_CONSENT_CACHE_SECONDS.
+    """
+    def _bump():
+        try:
+            cache.incr(_generation_key(user_id, contract_id))
+        except ValueError:
+            # No counter: the next read starts a fresh generation anyway
+            pass
+
+    transaction.on_commit(_bump, robust=True)
+
+
+def invalidate_contract_consent(contract_id):
+    """Contract changes (status, tracking policy) affect its freelancer."""
+    user_id = (
+        Contract.objects
+        .filter(pk=contract_id)
+        .values_list("offer__freelancer__user_id", flat=True)
+        .first()
+    )
+    if user_id:
+        invalidate_consent(user_id, contract_id)
@@ -0,0 +1,159 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.freelancer.models import FreelancerProfile
+from apps.tracking.models import TimeBlock, WorkSession
+
+
+# Cached "no running session" marker (a plain None would read as a miss)
+NO_ACTIVE_SESSION = {"session_id": None}
+
+
+def _state_key(user_id):
+    return f"tracking:state:{user_id}"
+
+
+# =====================================================
+# State shape
+# =====================================================
+def build_state(session, block=None, window=None):
+    """
+    Everything the tracker's hot endpoints need to know about a
+    running session. `block` is the open block (None while paused).
+    """
+    return {
+        "session_id": session.id,
+        "user_id": session.user_id,
+        "freelancer_id": session.user.freelancer_profile.pk,
+        "contract_id": session.contract_id,
+        "device_id": session.device_id,
+        "closed_seconds": session.closed_seconds,
+        "paused": block is None,
+        "block_id": block.id if block else None,
+        "block_started_at": block.started_at.isoformat() if block else None,
+        "window_slot": window.slot if window else None,
+        "window_id": window.id if window else None,
+    }
+
+
+def block_started_at(state):
+    return datetime.fromisoformat(state["block_started_at"])
+
+
+def live_total_seconds(state):
+    """Same as WorkSession.live_total_seconds, from the cached state."""
+    total = state["closed_seconds"]
+    if state["block_id"]:
+        total += int((timezone.now() - block_started_at(state)).total_seconds())
+    return total
+
+
+def state_session(state):
+    """Running session by reference (no query), for FKs and activity logs."""
+    return WorkSession(
+        id=state["session_id"],
+        user_id=state["user_id"],
+        contract_id=state["contract_id"],
+    )
+
+
+def state_freelancer(state):
+    return FreelancerProfile(pk=state["freelancer_id"])
+
+
+def state_block(state):
+    """Open block by reference (no query), enough for FKs and window slots."""
+    return TimeBlock(
+        id=state["block_id"],
+        session_id=state["session_id"],
+        started_at=block_started_at(state),
+    )
+
+
+# =====================================================
+# Read
+# =====================================================
+def get_tracking_state(user_id):
+    """
+    Cached state of the user's running session, or None when nothing
+    is running. Falls back to the database on a miss.
+    """
+    state = cache.get(_state_key(user_id))
+    if state is None:
+        state = load_tracking_state(user_id)
+    return state if state and state["session_id"] else None
+
+
+def load_tracking_state(user_id):
+    """
+    Rebuild the state from the database and re-prime the cache.
+
+    The cache is primed with add(), never set(): a lifecycle change that
+    commits between our read and the write has already deleted the key
+    and set the fresher state on commit, and that entry must win. If our
+    add lands first, the lifecycle's on-commit set overwrites it.
+    """
+    session = (
+        WorkSession.objects
+        .select_related("user__freelancer_profile")
+        .filter(user_id=user_id, ended_at__isnull=True)
+        .order_by("-started_at")
+        .first()
+    )
+
+    state = NO_ACTIVE_SESSION
+    if session:
+        block = None
+        if session.open_block_started_at:
+            block = (
+                TimeBlock.objects
+                .filter(session=session, ended_at__isnull=True)
+                .only("id", "started_at")
+                .first()
+            )
+        state = build_state(session, block)
+
+    cache.add(_state_key(user_id), state, settings.TRACKING_STATE_CACHE_SECONDS)
+    return state if state["session_id"] else None
+
+
+# =====================================================
+# Write-through (session lifecycle)
+# =====================================================
+def publish_tracking_state(user_id, state):
+    """
+    Call inside the lifecycle transaction. The old entry is dropped
+    right away (a failing cache aborts the transaction rather than
+    leaving stale state behind) and the new one is written only once
+    the transaction commits. `state=None` means no running session.
+    """
+    key = _state_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(
+        lambda: cache.set(key, state or NO_ACTIVE_SESSION, settings.TRACKING_STATE_CACHE_SECONDS),
+        robust=True,
+    )
+
+
+def remember_window(state, window):
+    """
+    Record the screenshot window just claimed so the next upload in the
+    same slot skips the window lookup. Only applied if the entry still
+    describes the same block when the upload commits.
+    """
+    if state["window_id"] == window.id:
+        return
+
+    key = _state_key(state["user_id"])
+    updated = {**state, "window_slot": window.slot, "window_id": window.id}
+
+    def _write():
+        current = cache.get(key)
+        if current and current.get("block_id") == state["block_id"]:
+            cache.set(key, updated, settings.TRACKING_STATE_CACHE_SECONDS)
+
+    transaction.on_commit(_write, robust=True)
@@ -0,0 +1,347 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.freelancer.models import FreelancerProfile
+from apps.tracking.models import DailyWorkRollup, Screenshot, TimeBlock, WorkSession
+
+
+ROLLUP_FIELDS = [
+    "tracked_seconds",
+    "worked_seconds",
+    "idle_seconds",
+    "flagged_seconds",
+    "block_count",
+    "screenshot_count",
+]
+
+BLOCK_FIELDS = ["started_at", "ended_at", "idle_seconds", "active_seconds", "is_flagged"]
+
+
+def get_zone(name):
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def day_start(day, tz):
+    """Local midnight of `day` as a UTC datetime (DST-safe)."""
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(dt_timezone.utc)
+
+
+def _days_between(first, last):
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+# =====================================================
+# Aggregation
+# =====================================================
+def aggregate_days(blocks, screenshot_times, tz):
+    """
+    {local day: totals} from closed block rows and screenshot times.
+    Blocks crossing local midnight are split by wall time; idle and
+    active seconds are prorated over the split. A block counts towards
+    block_count on the day it started.
+    """
+    totals = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0.0))
+
+    for block in blocks:
+        start, end = block["started_at"], block["ended_at"]
+        duration = (end - start).total_seconds()
+        if duration <= 0:
+            continue
+
+        totals[start.astimezone(tz).date()]["block_count"] += 1
+
+        cursor = start
+        while cursor < end:
+            day = cursor.astimezone(tz).date()
+            edge = min(day_start(day + timedelta(days=1), tz), end)
+            seconds = (edge - cursor).total_seconds()
+            share = seconds / duration
+
+            row = totals[day]
+            row["tracked_seconds"] += seconds
+            row["idle_seconds"] += block["idle_seconds"] * share
+            row["worked_seconds"] += block["active_seconds"] * share
+            if block["is_flagged"]:
+                row["flagged_seconds"] += seconds
+            cursor = edge
+
+    for taken_at in screenshot_times:
+        totals[taken_at.astimezone(tz).date()]["screenshot_count"] += 1
+
+    return {
+        day: {field: int(round(value)) for field, value in row.items()}
+        for day, row in totals.items()
+    }
+
+
+def _closed_blocks(user_id, contract_id):
+    return TimeBlock.objects.filter(
+        session__user_id=user_id,
+        session__contract_id=contract_id,
+        ended_at__isnull=False,
+    )
+
+
+def _screenshot_times(user_id, contract_id):
+    return Screenshot.objects.filter(
+        block__session__user_id=user_id,
+        block__session__contract_id=contract_id,
+        block__ended_at__isnull=False,
+    ).values_list("taken_at_client", flat=True)
+
+
+def _lock_freelancer(freelancer_id):
+    # Serializes refreshes / rebuilds of one freelancer's rollups
+    list(FreelancerProfile.objects.select_for_update().filter(pk=freelancer_id).values_list("pk"))
+
+
+# =====================================================
+# Incremental refresh
+# =====================================================
+def refresh_rollups(*, freelancer_id, user_id, contract_id, days, tz):
+    """
+    Recompute the given local days of one (freelancer, contract) pair
+    from their blocks. Idempotent, so it is safe to run on every block
+    close or flag change.
+    """
+    days = sorted(days)
+    start = day_start(days[0], tz)
+    end = day_start(days[-1] + timedelta(days=1), tz)
+
+    with transaction.atomic():
+        _lock_freelancer(freelancer_id)
+
+        blocks = (
+            _closed_blocks(user_id, contract_id)
+            .filter(started_at__lt=end, ended_at__gt=start)
+            .values(*BLOCK_FIELDS)
+        )
+        screenshots = _screenshot_times(user_id, contract_id).filter(
+            taken_at_client__gte=start,
+            taken_at_client__lt=end,
+        )
+        totals = aggregate_days(blocks, screenshots, tz)
+
+        _write_days(freelancer_id, contract_id, days, totals)
+
+
+def _write_days(freelancer_id, contract_id, days, totals):
+    rows = [
+        DailyWorkRollup(
+            freelancer_id=freelancer_id,
+            contract_id=contract_id,
+            day=day,
+            **totals[day],
+        )
+        for day in days
+        if totals.get(day, {}).get("tracked_seconds")
+    ]
+    if rows:
+        DailyWorkRollup.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["freelancer", "contract", "day"],
+            update_fields=[*ROLLUP_FIELDS, "updated_at"],
+        )
+
+    DailyWorkRollup.objects.filter(
+        freelancer_id=freelancer_id,
+        contract_id=contract_id,
+        day__in=[day for day in days if day not in {row.day for row in rows}],
+    ).delete()
+
+
+def refresh_rollups_for_blocks(block_ids):
+    """Refresh every (freelancer, contract, day) the given blocks touch."""
+    rows = (
+        TimeBlock.objects
+        .filter(pk__in=block_ids, ended_at__isnull=False)
+        .values(
+            "started_at",
+            "ended_at",
+            user_id=F("session__user_id"),
+            contract_id=F("session__contract_id"),
+            freelancer_id=F("session__user__freelancer_profile__id"),
+            tz_name=F("session__user__timezone"),
+        )
+    )
+
+    groups = defaultdict(set)
+    for row in rows:
+        if row["freelancer_id"] is None:
+            continue
+        tz = get_zone(row["tz_name"])
+        key = (row["freelancer_id"], row["user_id"], row["contract_id"], row["tz_name"])
+        groups[key].update(_days_between(
+            row["started_at"].astimezone(tz).date(),
+            row["ended_at"].astimezone(tz).date(),
+        ))
+
+    for (freelancer_id, user_id, contract_id, tz_name), days in groups.items():
+        refresh_rollups(
+            freelancer_id=freelancer_id,
+            user_id=user_id,
+            contract_id=contract_id,
+            days=days,
+            tz=get_zone(tz_name),
+        )
+    return len(groups)
+
+
+def schedule_rollup_refresh(block_ids):
+    """Refresh in the background once the current transaction commits."""
+    from apps.tracking.tasks import refresh_work_rollups_task
+
+    block_ids = list(block_ids)
+    if block_ids:
+        transaction.on_commit(lambda: refresh_work_rollups_task.delay(block_ids), robust=True)
+
+
+# =====================================================
+# Full rebuild
+# =====================================================
+def rebuild_rollups(*, freelancer_id=None, contract_id=None):
+    """
+    Recompute rollups from scratch (all pairs, or those matching the
+    filters) and drop rows whose pair no longer has any closed block.
+    Also the fix-up after a freelancer changes timezone.
+    """
+    started = timezone.now()
+
+    sessions = WorkSession.objects.filter(user__freelancer_profile__isnull=False)
+    if freelancer_id:
+        sessions = sessions.filter(user__freelancer_profile__id=freelancer_id)
+    if contract_id:
+        sessions = sessions.filter(contract_id=contract_id)
+
+    pairs = (
+        sessions
+        .values(
+            "user_id",
+            "contract_id",
+            profile_id=F("user__freelancer_profile__id"),
+            tz_name=F("user__timezone"),
+        )
+        .order_by("user_id", "contract_id")
+        .distinct()
+    )
+
+    rebuilt = 0
+    for pair in pairs:
+        tz = get_zone(pair["tz_name"])
+        with transaction.atomic():
+            _lock_freelancer(pair["profile_id"])
+
+            totals = aggregate_days(
+                _closed_blocks(pair["user_id"], pair["contract_id"]).values(*BLOCK_FIELDS).iterator(chunk_size=2000),
+                _screenshot_times(pair["user_id"], pair["contract_id"]).iterator(chunk_size=2000),
+                tz,
+            )
+            DailyWorkRollup.objects.filter(
+                freelancer_id=pair["profile_id"],
+                contract_id=pair["contract_id"],
+            ).delete()
+            DailyWorkRollup.objects.bulk_create(
+                [
+                    DailyWorkRollup(
+                        freelancer_id=pair["profile_id"],
+                        contract_id=pair["contract_id"],
+                        day=day,
+                        **row,
+                    )
+                    for day, row in totals.items()
+                    if row["tracked_seconds"]
+                ],
+                batch_size=1000,
+            )
+        rebuilt += 1
+
+    leftovers = DailyWorkRollup.objects.filter(updated_at__lt=started)
+    if freelancer_id:
+        leftovers = leftovers.filter(freelancer_id=freelancer_id)
+    if contract_id:
+        leftovers = leftovers.filter(contract_id=contract_id)
+    removed = leftovers.delete()[0]
+
+    return {"pairs": rebuilt, "removed": removed}
+
+
+# =====================================================
+# Weekly timesheets (rollups only)
+# =====================================================
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def weekly_timesheet(rollups, start):
+    """
+    One row per (freelancer, contract) for the Monday-based week that
+    starts at `start`, with seven daily entries and week totals.
+    """
+    days = [start + timedelta(days=i) for i in range(7)]
+    rows = (
+        rollups
+        .filter(day__gte=days[0], day__lte=days[-1])
+        .values(
+            "freelancer_id",
+            "contract_id",
+            "day",
+            *ROLLUP_FIELDS,
+            freelancer_username=F("freelancer__user__username"),
+        )
+        .order_by("contract_id", "freelancer_id", "day")
+    )
+
+    sheets = {}
+    for row in rows:
+        key = (row["freelancer_id"], row["contract_id"])
+        sheet = sheets.get(key)
+        if sheet is None:
+            sheet = sheets[key] = {
+                "freelancer_id": row["freelancer_id"],
+                "freelancer_username": row["freelancer_username"],
+                "contract_id": row["contract_id"],
+                "days": {day: _empty_day(day) for day in days},
+                "totals": dict.fromkeys(ROLLUP_FIELDS, 0),
+            }
+        entry = sheet["days"][row["day"]]
+        for field in ROLLUP_FIELDS:
+            entry[field] = row[field]
+            sheet["totals"][field] += row[field]
+
+    timesheets = []
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    for sheet in sheets.values():
+        sheet["days"] = list(sheet["days"].values())
+        for field in ROLLUP_FIELDS:
+            totals[field] += sheet["totals"][field]
+        timesheets.append(sheet)
+
+    return {
+        "week_start": days[0],
+        "week_end": days[-1],
+        "timesheets": timesheets,
+        "totals": totals,
+    }
+
+
+def _empty_day(day):
+    return {"day": day, **dict.fromkeys(ROLLUP_FIELDS, 0)}
+
+
+def parse_week(value, tz_name):
+    """Monday of the week containing `value` (ISO date), default this week."""
+    if not value:
+        return week_start(timezone.now().astimezone(get_zone(tz_name)).date())
+    try:
+        return week_start(date.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"Invalid week: {value}")
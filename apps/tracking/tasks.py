@@ -0,0 +1,69 @@
+from celery import shared_task
+
+from apps.tracking.services.activity_logger import flush_activity_logs
+
+
+@shared_task
+def flush_activity_logs_task():
+    return flush_activity_logs()
+
+
+@shared_task
+def compact_activity_logs_task():
+    from apps.tracking.services.activity_archive import compact_activity_logs
+
+    summary = compact_activity_logs()
+    return {
+        "compacted": sum(count for _, count in summary["compacted"]),
+        "expired": len(summary["expired"]),
+    }
+
+
+@shared_task
+def process_screenshot_task(screenshot_id):
+    from apps.tracking.services.screenshot_pipeline import process_screenshot
+
+    screenshot = process_screenshot(screenshot_id)
+    return screenshot.processing_status if screenshot else None
+
+
+@shared_task
+def reevaluate_timeblock_flags_task():
+    from apps.tracking.services.timeblock_flagger import reevaluate_timeblock_flags
+
+    return reevaluate_timeblock_flags()
+
+
+@shared_task
+def refresh_work_rollups_task(block_ids):
+    from apps.tracking.services.work_rollups import refresh_rollups_for_blocks
+
+    return refresh_rollups_for_blocks(block_ids)
+
+
+@shared_task
+def reap_stale_sessions_task():
+    from apps.tracking.services.session_reaper import reap_stale_sessions
+
+    return reap_stale_sessions()
+
+
+@shared_task
+def bill_work_sessions_task(session_ids):
+    from apps.tracking.services.session_reaper import bill_work_sessions
+
+    return bill_work_sessions(session_ids)
+
+
+@shared_task
+def flush_device_last_seen_task():
+    from apps.tracking.services.device_registry import flush_device_last_seen
+
+    return flush_device_last_seen()
+
+
+@shared_task
+def flush_live_feed_task():
+    from apps.tracking.services.live_feed import flush_live_feed
+
+    return flush_live_feed()
@@ -1,3 +1,115 @@
+import unittest
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F, Q
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.tracking.models import TimeBlock, WorkSession
+
+
+# =====================================================
+# Query plans of the hot tracking queries
+# =====================================================
+def hot_tracking_queries():
+    """
+    (name, queryset, table) for the queries the tracker and the admin
+    screens run all the time. Mirrors the filters used in views /
+    services; the table is the one that must not be scanned.
+    """
+    now = timezone.now()
+    sessions = WorkSession._meta.db_table
+    blocks = TimeBlock._meta.db_table
+
+    return [
+        (
+            "running session of a user (start, state rebuild)",
+            WorkSession.objects.filter(user_id=1, ended_at__isnull=True).order_by("-started_at"),
+            sessions,
+        ),
+        (
+            "running, unpaused session (telemetry)",
+            WorkSession.objects.filter(user_id=1, ended_at__isnull=True, paused_at__isnull=True),
+            sessions,
+        ),
+        (
+            "running session ids (reaper adoption)",
+            WorkSession.objects.filter(ended_at__isnull=True).values_list("pk", flat=True),
+            sessions,
+        ),
+        (
+            "freelancer session history",
+            WorkSession.objects.filter(user_id=1).order_by("-started_at"),
+            sessions,
+        ),
+        (
+            "admin session list",
+            WorkSession.objects.order_by("-started_at")[:50],
+            sessions,
+        ),
+        (
+            "open block of a session",
+            TimeBlock.objects.filter(session_id=1, ended_at__isnull=True),
+            blocks,
+        ),
+        (
+            "open blocks of many sessions (reaper)",
+            TimeBlock.objects.filter(session_id__in=[1, 2, 3], ended_at__isnull=True),
+            blocks,
+        ),
+        (
+            "session timeline range",
+            TimeBlock.objects
+            .filter(session_id=1, started_at__lte=now)
+            .filter(Q(ended_at__isnull=True) | Q(ended_at__gte=now - timedelta(hours=8)))
+            .order_by("started_at", "id"),
+            blocks,
+        ),
+        (
+            "closed blocks of a freelancer on a contract (rollups)",
+            TimeBlock.objects
+            .filter(
+                session__user_id=1,
+                session__contract_id=1,
+                ended_at__isnull=False,
+                started_at__lt=now,
+                ended_at__gt=now - timedelta(days=1),
+            )
+            .values("started_at", "ended_at", user_timezone=F("session__user__timezone")),
+            blocks,
+        ),
+        (
+            "flag review queue",
+            TimeBlock.objects.filter(is_flagged=True).order_by("-flagged_at")[:50],
+            blocks,
+        ),
+    ]
+
+
+def query_plan(queryset):
+    """EXPLAIN QUERY PLAN detail lines for a queryset (SQLite)."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def full_scans(plan, table):
+    """Plan lines that read every row of `table` (no index involved)."""
+    return [
+        line for line in plan
+        if line.startswith("SCAN") and table in line.split() and "USING" not in line
+    ]
+
 
-# Create your tests here.
+@unittest.skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN is SQLite specific")
+class TrackingQueryPlanTests(TestCase):
+    def test_hot_queries_use_an_index(self):
+        for name, queryset, table in hot_tracking_queries():
+            with self.subTest(name):
+                plan = query_plan(queryset)
+                self.assertFalse(
+                    full_scans(plan, table),
+                    f"{name} scans {table}:\n" + "\n".join(plan),
+                )
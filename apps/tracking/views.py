@@ -5,16 +5,29 @@ from rest_framework import status, generics, serializers
 from rest_framework.generics import GenericAPIView
 from rest_framework.parsers import MultiPartParser, FormParser
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
 from django.db import transaction
 from django.utils import timezone
 
 from apps.billing.models import BillingUnit
 from apps.billing.serializers import BillingUnitListSerializer
-from apps.tracking.models import ActivityLog, Device, TimeBlock, TimeBlockExplanation, WorkSession
+from apps.tracking.models import ActivityLog, DailyWorkRollup, Device, FlagRuleSet, TimeBlock, TimeBlockExplanation, WorkSession
+from apps.tracking.services.session_export import export_rows, filter_sessions, parse_moment, stream_csv, stream_ndjson
+from apps.tracking.services.session_timeline import build_timeline
+from apps.tracking.services.device_registry import get_or_register_device, touch_device
+from apps.tracking.services.heartbeat import record_heartbeat
+from apps.tracking.services.offline_sync import new_sync_secret, rotate_sync_secret, verify_signature
+from apps.tracking.services.tracking_state import get_tracking_state, live_total_seconds
+from apps.tracking.services.work_rollups import parse_week, weekly_timesheet
+from apps.tracking.tasks import reevaluate_timeblock_flags_task
 from .serializers import (
     ActivityLogSerializer,
+    FlagRuleSetSerializer,
+    AdminWorkSessionSummarySerializer,
     FreelancerSessionListSerializer,
     ScreenshotUploadSerializer,
+    ScreenshotBatchSerializer,
     TimeBlockExplanationCreateSerializer,
     TimeBlockExplanationReviewSerializer,
     TimeBlockFlagUpdateSerializer,
@@ -25,6 +38,8 @@ from .serializers import (
     WorkSessionStopSerializer,
     WorkSessionDetailSerializer,
     IdleFlushSerializer,
+    TelemetryBatchSerializer,
+    OfflineSyncSerializer,
 )
 
 
@@ -148,6 +163,29 @@ class UploadScreenshotView(APIView):
         )
 
 
+class UploadScreenshotBatchView(APIView):
+    """
+    Several screenshots in one multipart request with a compact
+    manifest; responds with one result per image. File parts are
+    spooled to temporary files as they stream in, so a batch is never
+    held in memory, and storage reads them back in chunks.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        # Must be set before request.data is parsed
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+
+        serializer = ScreenshotBatchSerializer(
+            data=request.data,
+            context={"request": request, "files": request.FILES},
+        )
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response({"status": "ok", **result})
+
+
 # ===============================
 # Device Check or Create
 # ===============================
@@ -156,16 +194,78 @@ class DeviceCheckOrCreateView(generics.GenericAPIView):
 
     def post(self, request):
         data = request.data
-        device, created = Device.objects.get_or_create(
-            device_id=data["device_id"],
-            freelancer=request.user,
+        device_id = data.get("device_id")
+        if not device_id:
+            return Response(
+                {"detail": "device_id is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        sync_secret = new_sync_secret()
+        device, created = get_or_register_device(
+            request.user,
+            device_id,
             defaults={
                 "device_name": data.get("device_name", ""),
                 "os_name": data.get("os_name", ""),
                 "os_version": data.get("os_version", ""),
+                "sync_secret": sync_secret,
             },
         )
-        return Response({"status": "ok", "created": created})
+        touch_device(request.user.id, device_id)
+
+        response = {
+            "status": "ok",
+            "created": created,
+            "is_active": device["is_active"],
+        }
+        if created:
+            # Only handed out once; see DevicePairView to replace it
+            response["sync_key"] = sync_secret
+        return Response(response)
+
+
+# ===============================
+# Device Re-pair
+# ===============================
+class DevicePairView(APIView):
+    """
+    Replace a device's offline-sync secret. A rotation is signed with
+    the current secret (X-Tracker-Signature over the body); a tracker
+    that lost its secret re-pairs with the account password instead.
+    Accounts without a usable password (Google sign-in) re-pair on
+    their authenticated session alone. Devices registered before
+    per-device secrets get their first one.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        body = request.body
+        device = Device.objects.filter(
+            freelancer=request.user,
+            device_id=request.data.get("device_id", ""),
+            is_active=True,
+        ).first()
+        if not device:
+            return Response(
+                {"detail": "Device is not registered or has been deactivated"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        allowed = (
+            not device.sync_secret
+            or verify_signature(device.sync_secret, body, request.headers.get("X-Tracker-Signature"))
+            or request.user.check_password(request.data.get("password") or "")
+            # No password to confirm with: the login itself is the proof
+            or not request.user.has_usable_password()
+        )
+        if not allowed:
+            return Response(
+                {"detail": "Sign with the current sync key or provide the account password"},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        return Response({"status": "ok", "sync_key": rotate_sync_secret(device)})
 
 
 # ===============================
@@ -175,25 +275,17 @@ class ActiveSessionView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        session = (
-            WorkSession.objects
-            .filter(user=request.user, ended_at__isnull=True)
-            .first()
-        )
+        state = get_tracking_state(request.user.id)
 
-        if not session:
+        if not state:
             return Response({"status": "no_active_session"})
 
-        open_block = session.time_blocks.filter(
-            ended_at__isnull=True
-        ).first()
-
         return Response({
             "status": "running",
-            "session_id": session.id,
-            "is_paused": open_block is None,
-            "live_total_seconds": session.live_total_seconds,
-            "total_seconds": session.total_seconds,
+            "session_id": state["session_id"],
+            "is_paused": state["paused"],
+            "live_total_seconds": live_total_seconds(state),
+            "total_seconds": state["closed_seconds"],
         })
 
 
@@ -202,18 +294,28 @@ class ActiveSessionView(APIView):
 # Freelancer Session Timeline
 # ===============================
 class FreelancerSessionTimelineView(APIView):
+    """
+    Query params: start / end (ISO date or datetime) to clip the range,
+    zoom=auto|detail|10m|1h|6h|1d. Long ranges come back as buckets.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request, session_id):
-        session = get_object_or_404(
-            WorkSession.objects.prefetch_related(
-                "time_blocks__windows__screenshots"
-            ),
-            id=session_id,
-            user=request.user,
-        )
-        serializer = WorkSessionDetailSerializer(session)
-        return Response(serializer.data)
+        session = get_object_or_404(WorkSession, id=session_id, user=request.user)
+        params = request.query_params
+
+        try:
+            timeline = build_timeline(
+                session,
+                start=parse_moment(params.get("start")),
+                end=parse_moment(params.get("end"), end_of_day=True),
+                zoom=params.get("zoom", "auto"),
+                full_resolution=params.get("full_resolution") in ("1", "true"),
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(timeline)
 
 
 # ===============================
@@ -228,6 +330,65 @@ class FreelancerSessionListView(APIView):
         return Response(serializer.data)
 
 
+# ===============================
+# Weekly Timesheets (daily rollups only)
+# ===============================
+def _id_param(params, name):
+    """Optional integer query parameter; ValueError when malformed."""
+    value = params.get(name)
+    if not value:
+        return None
+    if not value.isdigit():
+        raise ValueError(f"{name} must be an integer.")
+    return int(value)
+
+
+class WeeklyTimesheetView(APIView):
+    """
+    ?week=YYYY-MM-DD (any day of the week, default: current week in the
+    viewer's timezone), optional ?contract_id=. Subclasses scope the
+    rollups to what the caller may see.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_rollups(self, request):
+        raise NotImplementedError
+
+    def get(self, request):
+        try:
+            rollups = self.get_rollups(request)
+            contract_id = _id_param(request.query_params, "contract_id")
+            start = parse_week(request.query_params.get("week"), request.user.timezone)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if contract_id:
+            rollups = rollups.filter(contract_id=contract_id)
+        return Response(weekly_timesheet(rollups, start))
+
+
+class FreelancerWeeklyTimesheetView(WeeklyTimesheetView):
+    def get_rollups(self, request):
+        return DailyWorkRollup.objects.filter(freelancer__user=request.user)
+
+
+class ClientWeeklyTimesheetView(WeeklyTimesheetView):
+    def get_rollups(self, request):
+        return DailyWorkRollup.objects.filter(contract__offer__client=request.user)
+
+
+class AdminWeeklyTimesheetView(WeeklyTimesheetView):
+    """Also accepts ?freelancer_id= (FreelancerProfile id)."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get_rollups(self, request):
+        rollups = DailyWorkRollup.objects.all()
+        freelancer_id = _id_param(request.query_params, "freelancer_id")
+        if freelancer_id:
+            rollups = rollups.filter(freelancer_id=freelancer_id)
+        return rollups
+
+
 # ===============================
 # Idle Flush
 # ===============================
@@ -244,23 +405,135 @@ class IdleFlushView(APIView):
         return Response({"status": "idle_flushed"})
 
 
+# ===============================
+# Heartbeat
+# ===============================
+class HeartbeatView(APIView):
+    """
+    Liveness ping from the desktop tracker. Only touches Redis (tracking
+    state + heartbeat timestamp). A session the reaper has stopped gets
+    409 so the tracker knows to start a new one.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        state = get_tracking_state(request.user.id)
+        if not state or state["session_id"] != session_id:
+            return Response({"status": "no_active_session"}, status=status.HTTP_409_CONFLICT)
+
+        record_heartbeat(session_id)
+        if state.get("device_id"):
+            touch_device(request.user.id, state["device_id"])
+        return Response({"status": "ok", "is_paused": state["paused"]})
+
+
+# ===============================
+# Batched Telemetry
+# ===============================
+class TelemetryBatchView(APIView):
+    """
+    Ordered batch of idle / heartbeat events from the desktop tracker.
+    Replayed sequence numbers are acknowledged but not re-applied.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, session_id):
+        serializer = TelemetryBatchSerializer(
+            data={"session_id": session_id, **request.data},
+            context={"request": request},
+        )
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response({"status": "ok", **result})
+
+
+# ===============================
+# Offline Sync
+# ===============================
+class OfflineSyncView(APIView):
+    """
+    Replays the tracker's offline event log: blocks, idle and
+    screenshot metadata land in one transaction instead of one request
+    per action. Screenshot images are uploaded afterwards against the
+    returned windows.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        # Read before request.data so the signed bytes stay available
+        body = request.body
+        serializer = OfflineSyncSerializer(
+            data=request.data,
+            context={"request": request, "body": body},
+        )
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response({"status": "ok", **result})
+
+
 # ===============================
 # Admin Views
 # ===============================
-class AdminWorkSessionListView(APIView):
+class AdminWorkSessionListView(generics.ListAPIView):
+    """
+    Paginated, summary-only rows (totals come from the session columns).
+    Full timelines stay on the detail view.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    serializer_class = AdminWorkSessionSummarySerializer
+
+    def get_queryset(self):
+        queryset = WorkSession.objects.select_related("user").order_by("-started_at")
+        try:
+            return filter_sessions(queryset, self.request.query_params)
+        except ValueError as exc:
+            raise serializers.ValidationError({"detail": str(exc)})
+
+
+class AdminWorkSessionExportView(APIView):
+    """
+    Streams sessions (or their blocks with ?level=blocks) as CSV or
+    NDJSON (?output=ndjson). Same filters as the admin list.
+    """
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request):
-        sessions = WorkSession.objects.all().order_by("-started_at")
-        serializer = WorkSessionDetailSerializer(sessions, many=True)
-        return Response(serializer.data)
+        output = request.query_params.get("output", "csv")
+        level = request.query_params.get("level", "sessions")
+
+        if output not in ("csv", "ndjson") or level not in ("sessions", "blocks"):
+            return Response(
+                {"detail": "output must be csv|ndjson and level sessions|blocks."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            sessions = filter_sessions(WorkSession.objects.all(), request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns, rows = export_rows(sessions, level=level)
+
+        if output == "csv":
+            response = StreamingHttpResponse(stream_csv(columns, rows), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(stream_ndjson(columns, rows), content_type="application/x-ndjson")
+
+        filename = f"work-{level}-{timezone.now():%Y%m%d%H%M}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
 
 
 class AdminWorkSessionDetailView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request, session_id):
-        session = get_object_or_404(WorkSession, id=session_id)
+        session = get_object_or_404(
+            WorkSession.objects.prefetch_related(
+                "time_blocks__windows__screenshots"
+            ),
+            id=session_id,
+        )
         session_serializer = WorkSessionDetailSerializer(session)
 
         billing_units = BillingUnit.objects.filter(session=session)
@@ -349,6 +622,33 @@ class AdminTimeBlockFlagUpdateView(APIView):
 
 
 
+class AdminFlagRuleSetListCreateView(generics.ListCreateAPIView):
+    """
+    Versions of the SYSTEM flag rules. New versions start inactive;
+    they apply once activated.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    serializer_class = FlagRuleSetSerializer
+    queryset = FlagRuleSet.objects.all()
+
+
+class AdminFlagRuleSetActivateView(APIView):
+    """
+    Make a rule version the active one and re-evaluate closed blocks
+    under it in the background (ADMIN flags are left alone).
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request, version):
+        rule_set = get_object_or_404(FlagRuleSet, version=version)
+
+        with transaction.atomic():
+            rule_set.activate()
+            transaction.on_commit(lambda: reevaluate_timeblock_flags_task.delay(), robust=True)
+
+        return Response(FlagRuleSetSerializer(rule_set).data)
+
+
 class AdminExplanationReviewView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
 
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 from apps.contract.models import Contract
 from apps.tracking.models import Device, TimeBlock, WorkSession,Screenshot,ScreenshotWindow
-from.models import ClientProfile,User,UserSubscription,Project
+from.models import ClientProfile,User,UserSubscription,Project,StripeEvent
 from apps.applications.models import Proposal,ProposalScore,Meeting,Offer
 from apps.freelancer.models import Education,EmploymentHistory ,FreelancerProfile,Skill,FreelancerSkill,Category
 from apps.tracking.models import WorkConsent
@@ -19,6 +19,7 @@ admin.site.register(FreelancerSkill)
 admin.site.register(Category)
 admin.site.register(UserSubscription)
 admin.site.register(Project)
+admin.site.register(StripeEvent)
 admin.site.register(Proposal)
 admin.site.register(ProposalScore)
 admin.site.register(Meeting)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.users.models import StripeEvent
+from apps.users.services.stripe_events import process_stripe_event
+from apps.users.tasks import process_stripe_event_task
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run stored Stripe events. Processed events are never replayed; "
+        "failed/ignored events and events stuck in 'processing' or "
+        "'received' (never queued) are reset and queued again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_ids", nargs="*", help="Stripe event ids to replay.")
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=["failed", "ignored", "processing", "received"],
+            help="Replay every event in this status (repeatable). Default: failed.",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=15,
+            help="Only reclaim 'processing' / 'received' events claimed / received longer ago than this.",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Process in this process instead of queueing Celery tasks.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        statuses = options["status"] or ["failed"]
+        stale_before = timezone.now() - timedelta(minutes=options["stale_minutes"])
+
+        replayable = Q(status__in=[s for s in statuses if s not in ("processing", "received")])
+        if "processing" in statuses:
+            replayable |= Q(status="processing", claimed_at__lt=stale_before)
+        if "received" in statuses:
+            replayable |= Q(status="received", received_at__lt=stale_before)
+
+        qs = StripeEvent.objects.filter(replayable)
+        if options["event_ids"]:
+            qs = qs.filter(event_id__in=options["event_ids"])
+
+        event_pks = list(qs.order_by("received_at").values_list("pk", flat=True))
+
+        if options["dry_run"]:
+            self.stdout.write(f"{len(event_pks)} event(s) would be replayed.")
+            return
+
+        for pk in event_pks:
+            # Conditional reset: a worker that finished meanwhile wins
+            reset = StripeEvent.objects.filter(pk=pk).filter(replayable).update(
+                status="received",
+            )
+            if not reset:
+                continue
+
+            if options["sync"]:
+                try:
+                    outcome = process_stripe_event(pk)
+                except Exception as exc:
+                    outcome = f"failed ({exc!r})"
+                self.stdout.write(f"Event #{pk} → {outcome}")
+            else:
+                process_stripe_event_task.delay(pk)
+                self.stdout.write(f"Event #{pk} → queued")
+
+        self.stdout.write(self.style.SUCCESS(f"Replayed {len(event_pks)} event(s)."))
@@ -0,0 +1,70 @@
+from celery import current_app
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from apps.users.models import StripeEvent
+from apps.users.services.stripe_fakes import (
+    encode_event,
+    escrow_funded_event,
+    sign_payload,
+    subscription_paid_event,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Post a signed fake Stripe checkout event to the local webhook. "
+        "Use --repeat to simulate Stripe retries of the same event."
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--offer-id", type=int)
+        target.add_argument("--subscription-id", type=int)
+
+        parser.add_argument("--event-id", help="Reuse a fixed Stripe event id.")
+        parser.add_argument("--repeat", type=int, default=1)
+        parser.add_argument(
+            "--secret",
+            help="Webhook secret (defaults to STRIPE_WEBHOOK_SECRET).",
+        )
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Process queued events in-process instead of via Celery.",
+        )
+
+    def handle(self, *args, **options):
+        secret = options["secret"] or settings.STRIPE_WEBHOOK_SECRET
+        if not secret:
+            raise CommandError("No webhook secret: pass --secret or set STRIPE_WEBHOOK_SECRET.")
+
+        if options["offer_id"]:
+            event = escrow_funded_event(options["offer_id"], event_id=options["event_id"])
+        else:
+            event = subscription_paid_event(options["subscription_id"], event_id=options["event_id"])
+
+        if options["sync"]:
+            current_app.conf.task_always_eager = True
+
+        payload = encode_event(event)
+        client = Client()
+
+        with override_settings(STRIPE_WEBHOOK_SECRET=secret):
+            for _ in range(options["repeat"]):
+                response = client.post(
+                    reverse("stripe-webhook"),
+                    data=payload,
+                    content_type="application/json",
+                    HTTP_STRIPE_SIGNATURE=sign_payload(payload, secret),
+                )
+                self.stdout.write(f"POST {event['id']} → {response.status_code}")
+
+        stored = StripeEvent.objects.filter(event_id=event["id"]).first()
+        if stored:
+            self.stdout.write(
+                f"Stored event {stored.event_id}: status={stored.status} "
+                f"attempts={stored.attempts} {stored.last_error}".rstrip()
+            )
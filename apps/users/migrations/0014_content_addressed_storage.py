@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 01:42
+
+import apps.cores.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_stripeevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='clientprofile',
+            name='profile_picture',
+            field=models.ImageField(blank=True, null=True, storage=apps.cores.storage.get_content_addressed_storage, upload_to='client_profiles/'),
+        ),
+    ]
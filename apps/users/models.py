@@ -4,6 +4,7 @@ from django.utils import timezone
 from apps.freelancer.models import Category, Skill
 from django.core.exceptions import ValidationError
 from apps.adminpanel.models import SubscriptionPlan
+from apps.cores.storage import get_content_addressed_storage
 
 
 
@@ -80,6 +81,15 @@ class User(AbstractUser):
             models.Index(fields=["timezone"]), 
         ]
 
+    def save(self, *args, **kwargs):
+        from apps.applications.services.offer_summary import schedule_party_name_refresh
+
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if not created:
+            # The display name is denormalized into OfferSummary
+            schedule_party_name_refresh(self, kwargs.get("update_fields"))
+
     def __str__(self):
         return f"{self.email} ({self.role})"
 
@@ -101,7 +111,7 @@ class ClientProfile(models.Model):
     verified = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
-    profile_picture = models.ImageField(upload_to='client_profiles/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='client_profiles/', storage=get_content_addressed_storage, blank=True, null=True)
     country = models.CharField(max_length=100, blank=True, null=True)
     city = models.CharField(max_length=100, blank=True, null=True)
     stripe_customer_id = models.CharField(max_length=255, blank=True, null=True)
@@ -196,6 +206,15 @@ class Project(models.Model):
         if self.assignment_type == "single" and self.team_size:
             raise ValidationError("Single freelancer projects cannot have a team size.")
 
+    def save(self, *args, **kwargs):
+        from apps.applications.services.offer_summary import schedule_project_title_refresh
+
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if not created:
+            # The title is denormalized into OfferSummary
+            schedule_project_title_refresh(self, kwargs.get("update_fields"))
+
     def __str__(self):
         return f"Project: {self.title} by {self.client.username}"
 
@@ -244,3 +263,45 @@ class UserSubscription(models.Model):
 
 
 
+
+
+
+class StripeEvent(models.Model):
+    """
+    Raw Stripe webhook event, persisted before any processing.
+    The Stripe event id is the idempotency key: retries and replays
+    of the same event map onto the same row.
+    """
+
+    STATUS_CHOICES = (
+        ("received", "Received"),
+        ("processing", "Processing"),
+        ("processed", "Processed"),
+        ("ignored", "Ignored"),
+        ("failed", "Failed"),
+    )
+
+    # Statuses a worker is allowed to pick up
+    CLAIMABLE_STATUSES = ("received", "failed")
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="received")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "stripe_events"
+        ordering = ["-received_at"]
+        indexes = [
+            models.Index(fields=["status", "received_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id}) → {self.status}"
@@ -565,6 +565,20 @@ class ProjectSerializer(serializers.ModelSerializer):
         return instance
 
 
+class OpenProjectSerializer(ProjectSerializer):
+    """
+    Freelancer-facing project listing. `already_applied` is read from the
+    `applied_project_ids` set passed in the context (no per-row query).
+    """
+    already_applied = serializers.SerializerMethodField()
+
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ["already_applied"]
+
+    def get_already_applied(self, obj):
+        return obj.id in self.context.get("applied_project_ids", ())
+
+
 class ProjectMiniSerializer(serializers.ModelSerializer):
     class Meta:
         model = Project
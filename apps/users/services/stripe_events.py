@@ -0,0 +1,213 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.applications.models import EscrowPayment, Offer
+from apps.applications.services.create_contract import create_contract_for_offer
+from apps.notifications.services.create_notifications import notify_user
+from apps.users.models import StripeEvent, UserSubscription
+
+
+class IgnoreEvent(Exception):
+    """
+    Raised by a handler when an event is valid but has nothing to do
+    (unknown payment type, missing object, already handled...).
+    """
+
+
+# =====================================================
+# Ingestion
+# =====================================================
+def record_stripe_event(event):
+    """
+    Persist a verified Stripe event keyed by its id.
+    Returns (stripe_event, created).
+    """
+    return StripeEvent.objects.get_or_create(
+        event_id=event["id"],
+        defaults={
+            "event_type": event["type"],
+            "payload": event,
+        },
+    )
+
+
+# =====================================================
+# Processing
+# =====================================================
+def process_stripe_event(event_pk):
+    """
+    Process a stored event exactly once.
+
+    1. Claim the row with a conditional UPDATE (only one worker wins).
+    2. Apply the business effects and mark the event processed in the
+       SAME transaction, so effects and the processed marker commit or
+       roll back together.
+
+    Returns the final status, or None if the event was not claimable.
+    """
+    claimed = StripeEvent.objects.filter(
+        pk=event_pk,
+        status__in=StripeEvent.CLAIMABLE_STATUSES,
+    ).update(
+        status="processing",
+        attempts=F("attempts") + 1,
+        claimed_at=timezone.now(),
+    )
+
+    if not claimed:
+        return None
+
+    stripe_event = StripeEvent.objects.get(pk=event_pk)
+
+    try:
+        with transaction.atomic():
+            try:
+                handle_event(stripe_event.payload)
+                outcome, note = "processed", ""
+            except IgnoreEvent as exc:
+                outcome, note = "ignored", str(exc)
+
+            StripeEvent.objects.filter(pk=event_pk).update(
+                status=outcome,
+                last_error=note,
+                processed_at=timezone.now(),
+            )
+    except Exception as exc:
+        StripeEvent.objects.filter(pk=event_pk).update(
+            status="failed",
+            last_error=repr(exc),
+        )
+        raise
+
+    return outcome
+
+
+def handle_event(event):
+    handler = EVENT_HANDLERS.get(event["type"])
+    if handler is None:
+        raise IgnoreEvent(f"Unhandled event type '{event['type']}'")
+    handler(event["data"]["object"])
+
+
+# =====================================================
+# Handlers
+# =====================================================
+def handle_checkout_session_completed(session):
+    metadata = session.get("metadata") or {}
+    payment_type = metadata.get("payment_type")
+    payment_intent_id = session.get("payment_intent")
+
+    if not payment_type or not payment_intent_id:
+        raise IgnoreEvent("Missing payment_type or payment_intent")
+
+    if payment_type == "escrow":
+        _handle_escrow_funded(metadata, payment_intent_id)
+    elif payment_type == "subscription":
+        _handle_subscription_paid(metadata, payment_intent_id)
+    else:
+        raise IgnoreEvent(f"Unknown payment_type '{payment_type}'")
+
+
+def _handle_escrow_funded(metadata, payment_intent_id):
+    offer_id = metadata.get("offer_id")
+    if not offer_id:
+        raise IgnoreEvent("Missing offer_id")
+
+    try:
+        offer = Offer.objects.select_for_update().get(id=offer_id)
+        payment = offer.payment
+    except (Offer.DoesNotExist, EscrowPayment.DoesNotExist):
+        raise IgnoreEvent(f"No escrow payment for offer {offer_id}")
+
+    # ✅ Idempotency Guard
+    if payment.status == "escrowed":
+        return
+
+    if payment.stripe_payment_intent_id == payment_intent_id:
+        return
+
+    if payment.status != "pending":
+        return
+
+    # ✅ Mark Escrowed
+    payment.status = "escrowed"
+    payment.escrowed_at = timezone.now()
+    payment.stripe_payment_intent_id = payment_intent_id
+    payment.save()
+
+    # ✅ Create Contract
+    contract = create_contract_for_offer(offer)
+
+    freelancer_user = offer.proposal.freelancer
+    client_user = offer.client
+    project = offer.proposal.project
+
+    # Notifications go out only once the escrow/contract rows are committed
+    def send_notifications():
+        notify_user(
+            recipient=freelancer_user,
+            notif_type="ESCROW_FUNDED",
+            title="Escrow Funded 💰",
+            message=f"Client funded escrow for '{project.title}'.",
+            data={"offer_id": offer.id}
+        )
+
+        if contract is None:
+            return
+
+        notify_user(
+            recipient=freelancer_user,
+            notif_type="CONTRACT_STARTED",
+            title="Contract Started ✅",
+            message=f"Contract is now active for '{project.title}'.",
+            data={"contract_id": contract.id}
+        )
+
+        notify_user(
+            recipient=client_user,
+            notif_type="CONTRACT_STARTED",
+            title="Contract Started ✅",
+            message=f"You successfully hired {freelancer_user.username}.",
+            data={"contract_id": contract.id}
+        )
+
+    transaction.on_commit(send_notifications)
+
+
+def _handle_subscription_paid(metadata, payment_intent_id):
+    subscription_id = metadata.get("subscription_id")
+    if not subscription_id:
+        raise IgnoreEvent("Missing subscription_id")
+
+    try:
+        subscription = UserSubscription.objects.select_for_update().get(
+            id=subscription_id
+        )
+    except UserSubscription.DoesNotExist:
+        raise IgnoreEvent(f"Subscription {subscription_id} not found")
+
+    # ✅ Idempotency Guard
+    if subscription.status == "active":
+        return
+
+    # ✅ Activate Subscription
+    subscription.status = "active"
+    subscription.activated_at = timezone.now()
+    subscription.stripe_payment_intent_id = payment_intent_id
+    subscription.save()
+
+    client_user = subscription.user
+
+    transaction.on_commit(lambda: notify_user(
+        recipient=client_user,
+        notif_type="SUBSCRIPTION_ACTIVE",
+        title="Plan Activated 🎉",
+        message="Your subscription payment was successful. You can now post new projects.",
+        data={"subscription_id": subscription.id}
+    ))
+
+
+EVENT_HANDLERS = {
+    "checkout.session.completed": handle_checkout_session_completed,
+}
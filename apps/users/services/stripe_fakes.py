@@ -0,0 +1,66 @@
+import hashlib
+import hmac
+import json
+import time
+import uuid
+
+
+# =====================================================
+# Local fake Stripe events (tests / local development)
+# =====================================================
+def build_event(event_type, data_object, event_id=None):
+    return {
+        "id": event_id or f"evt_fake_{uuid.uuid4().hex[:24]}",
+        "object": "event",
+        "type": event_type,
+        "created": int(time.time()),
+        "livemode": False,
+        "data": {"object": data_object},
+    }
+
+
+def build_checkout_completed_event(metadata, payment_intent_id=None, event_id=None):
+    """
+    Shape of a `checkout.session.completed` event, with only the fields
+    our handlers read.
+    """
+    return build_event(
+        "checkout.session.completed",
+        {
+            "id": f"cs_fake_{uuid.uuid4().hex[:24]}",
+            "object": "checkout.session",
+            "payment_intent": payment_intent_id or f"pi_fake_{uuid.uuid4().hex[:24]}",
+            "payment_status": "paid",
+            "metadata": {key: str(value) for key, value in metadata.items()},
+        },
+        event_id=event_id,
+    )
+
+
+def escrow_funded_event(offer_id, **kwargs):
+    return build_checkout_completed_event(
+        {"payment_type": "escrow", "offer_id": offer_id},
+        **kwargs,
+    )
+
+
+def subscription_paid_event(subscription_id, **kwargs):
+    return build_checkout_completed_event(
+        {"payment_type": "subscription", "subscription_id": subscription_id},
+        **kwargs,
+    )
+
+
+def sign_payload(payload: bytes, secret: str, timestamp=None) -> str:
+    """
+    Build a `Stripe-Signature` header that stripe.Webhook.construct_event
+    accepts for the given secret.
+    """
+    timestamp = int(timestamp or time.time())
+    signed = f"{timestamp}.".encode() + payload
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def encode_event(event) -> bytes:
+    return json.dumps(event).encode()
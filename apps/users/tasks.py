@@ -9,3 +9,19 @@ def send_otp_email(email: str, otp: str, purpose: str = "register"):
     message = f"Your verification code is {otp}. It will expire in 5 minutes."
     from_email = getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@example.com")
     send_mail(subject, message, from_email, [email])
+
+
+@shared_task(
+    bind=True,
+    autoretry_for=(Exception,),
+    retry_backoff=10,
+    retry_kwargs={"max_retries": 5},
+)
+def process_stripe_event_task(self, event_pk):
+    """
+    Apply a stored Stripe webhook event. Safe to run more than once:
+    only the worker that claims the row applies its effects.
+    """
+    from apps.users.services.stripe_events import process_stripe_event
+
+    return process_stripe_event(event_pk)
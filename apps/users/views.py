@@ -1,11 +1,12 @@
+import json
 from rest_framework import status, generics
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny,IsAuthenticated
 from rest_framework.views import APIView
 
-from apps.applications.services.create_contract import create_contract_for_offer
-from apps.notifications.services import create_notifications
-from .models import ClientProfile,Project, UserSubscription
+from .models import ClientProfile,Project, StripeEvent, UserSubscription
+from .services.stripe_events import record_stripe_event
+from .tasks import process_stripe_event_task
 from rest_framework.exceptions import NotFound
 from django.contrib.auth import get_user_model
 from rest_framework import viewsets
@@ -24,7 +25,7 @@ from rest_framework.generics import ListAPIView
 from .serializers import CreatePaymentSerializer, UserSubscriptionSerializer
 from apps.freelancer.models import FreelancerProfile
 from apps. freelancer.serializers import FreelancerProfileSerializer
-from apps.applications.models import EscrowPayment, Offer, Proposal, ProposalScore
+from apps.applications.models import Proposal, ProposalScore
 from django.db.models import OuterRef, Subquery, FloatField, BooleanField
 from django.db.models.functions import Coalesce
 from .serializers import (
@@ -443,6 +444,11 @@ class CreateCheckoutSession(APIView):
 
 @csrf_exempt
 def stripe_webhook(request):
+    """
+    Verify, persist and acknowledge. The event itself is applied
+    asynchronously by process_stripe_event_task, so Stripe retries and
+    bursts never wait on row locks inside the request.
+    """
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
     endpoint_secret = settings.STRIPE_WEBHOOK_SECRET
@@ -451,136 +457,29 @@ def stripe_webhook(request):
     # 1. Verify Stripe Signature
     # -----------------------------------
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload, sig_header, endpoint_secret
         )
+        event = json.loads(payload)
     except Exception:
         return HttpResponse(status=400)
 
     # -----------------------------------
-    # 2. Only Handle Checkout Success
+    # 2. Persist raw event (idempotent on Stripe event id)
     # -----------------------------------
-    if event["type"] != "checkout.session.completed":
-        return HttpResponse(status=200)
-
-    session = event["data"]["object"]
-
-    metadata = session.get("metadata", {})
-    payment_type = metadata.get("payment_type")
-    payment_intent_id = session.get("payment_intent")
-
-    if not payment_type or not payment_intent_id:
-        return HttpResponse(status=400)
-
-    # ==========================================================
-    # ✅ CASE 1: ESCROW PAYMENT (Offer Contract Funding)
-    # ==========================================================
-    if payment_type == "escrow":
-
-        offer_id = metadata.get("offer_id")
-        if not offer_id:
-            return HttpResponse(status=400)
-
-        with transaction.atomic():
-            try:
-                offer = Offer.objects.select_for_update().get(id=offer_id)
-                payment = offer.payment
-            except Offer.DoesNotExist:
-                return HttpResponse(status=404)
-            except EscrowPayment.DoesNotExist:
-                return HttpResponse(status=404)
-
-            # ✅ Idempotency Guard
-            if payment.status == "escrowed":
-                return HttpResponse(status=200)
-
-            if payment.stripe_payment_intent_id == payment_intent_id:
-                return HttpResponse(status=200)
-
-            if payment.status != "pending":
-                return HttpResponse(status=200)
-
-            # ✅ Mark Escrowed
-            payment.status = "escrowed"
-            payment.escrowed_at = timezone.now()
-            payment.stripe_payment_intent_id = payment_intent_id
-            payment.save()
-
-            freelancer_user = offer.proposal.freelancer
-            client_user = offer.client
-            project = offer.proposal.project
-
-            # ✅ Notify Freelancer: Escrow Funded
-            create_notifications.notify_user(
-                recipient=freelancer_user,
-                notif_type="ESCROW_FUNDED",
-                title="Escrow Funded 💰",
-                message=f"Client funded escrow for '{project.title}'.",
-                data={"offer_id": offer.id}
-            )
-
-            # ✅ Create Contract
-            contract = create_contract_for_offer(offer)
+    stripe_event, created = record_stripe_event(event)
 
-            # ✅ Notify Both: Contract Started
-            create_notifications.notify_user(
-                recipient=freelancer_user,
-                notif_type="CONTRACT_STARTED",
-                title="Contract Started ✅",
-                message=f"Contract is now active for '{project.title}'.",
-                data={"contract_id": contract.id}
-            )
-
-            create_notifications.notify_user(
-                recipient=client_user,
-                notif_type="CONTRACT_STARTED",
-                title="Contract Started ✅",
-                message=f"You successfully hired {freelancer_user.username}.",
-                data={"contract_id": contract.id}
-            )
-
-        return HttpResponse(status=200)
-
-    # ==========================================================
-    # ✅ CASE 2: SUBSCRIPTION PAYMENT (Plan Purchase)
-    # ==========================================================
-    elif payment_type == "subscription":
-
-        subscription_id = metadata.get("subscription_id")
-        if not subscription_id:
-            return HttpResponse(status=400)
-
-        with transaction.atomic():
-            try:
-                subscription = UserSubscription.objects.select_for_update().get(
-                    id=subscription_id
-                )
-            except UserSubscription.DoesNotExist:
-                return HttpResponse(status=404)
-
-            # ✅ Idempotency Guard
-            if subscription.status == "active":
-                return HttpResponse(status=200)
-
-            # ✅ Activate Subscription
-            subscription.status = "active"
-            subscription.activated_at = timezone.now()
-            subscription.stripe_payment_intent_id = payment_intent_id
-            subscription.save()
-
-            client_user = subscription.user
-
-            # ✅ Notify Client: Subscription Activated
-            create_notifications.notify_user(
-                recipient=client_user,
-                notif_type="SUBSCRIPTION_ACTIVE",
-                title="Plan Activated 🎉",
-                message="Your subscription payment was successful. You can now post new projects.",
-                data={"subscription_id": subscription.id}
-            )
+    # -----------------------------------
+    # 3. Queue processing. A retry of an event that was never picked up
+    #    (queueing failed) or that failed is queued again; the worker's
+    #    conditional claim makes a double queue harmless.
+    # -----------------------------------
+    if created or stripe_event.status in StripeEvent.CLAIMABLE_STATUSES:
+        transaction.on_commit(
+            lambda: process_stripe_event_task.delay(stripe_event.pk)
+        )
 
-        return HttpResponse(status=200)
-    return HttpResponse(status=400)
+    return HttpResponse(status=200)
 
 
 